@@ -0,0 +1,238 @@
+import hashlib
+import heapq
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from .canonical import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+class EnumBlocklistMatch:
+    URL = "url"
+    DOMAIN = "domain"
+
+
+# 파일 구조(URL fingerprint에서 스킴을 뺀 0002부터): header(magic, count) | bucket offset table(상위 16bit 기준, uint32 x 65537) | 정렬된 uint64 fingerprint 배열
+_MAGIC = b"SQBL0002"
+_HEADER = struct.Struct("<8sQ")
+_BUCKET_BITS = 16
+_BUCKETS = 1 << _BUCKET_BITS
+_TABLE = struct.Struct(f"<{_BUCKETS + 1}I")
+_TABLE_OFFSET = _HEADER.size
+_DATA_OFFSET = _HEADER.size + _TABLE.size
+_OFFSET_PAIR = struct.Struct("<II")
+_ITEM = struct.Struct("<Q")
+
+
+def fingerprint(kind: str, value: str) -> int:
+    digest = hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _url_key(url: str) -> str:
+    """
+    정규화된 URL에서 스킴을 뺀 값(host/path?query). 피드에 http로 올라온 주소가 https 요청과도 일치하고,
+    스킴 없이 적힌 항목(docs.google.com/forms/...)도 같은 키가 되도록 함
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"http://{url}"
+    return canonicalize_url(url).split("://", 1)[1]
+
+
+def url_fingerprint(url: str) -> int:
+    return fingerprint(EnumBlocklistMatch.URL, _url_key(url))
+
+
+def domain_fingerprint(domain: str) -> int:
+    # URL과 동일한 호스트 정규화(소문자, IDNA)를 거치도록 임시 URL로 감싸서 처리
+    host = urlsplit(canonicalize_url(f"http://{domain.strip()}/")).hostname or domain.strip().lower()
+    return fingerprint(EnumBlocklistMatch.DOMAIN, host)
+
+
+def index_path() -> str:
+    return str(getattr(settings, "BLOCKLIST_INDEX_PATH", os.path.join(settings.BASE_DIR, "data", "blocklist.idx")))
+
+
+class _MappedIndex:
+    """
+    읽기 전용 mmap 인덱스. 파일은 OS 페이지 캐시를 통해 worker 프로세스 간에 공유되며,
+    조회는 버킷 테이블로 구간을 정한 뒤 (평균 수 개 항목) 이진 탐색하므로 사실상 O(1)이다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mm = None
+        self._count = 0
+        self._stamp = None
+        self._checked_at = 0.0
+
+    def _reload_if_changed(self) -> None:
+        now = time.monotonic()
+        interval = float(getattr(settings, "BLOCKLIST_RELOAD_INTERVAL", 30))
+        if self._checked_at and now - self._checked_at < interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self._mm, self._count, self._stamp = None, 0, None
+                return
+            stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if stamp == self._stamp:
+                return
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count = _HEADER.unpack_from(mm, 0)
+            if magic != _MAGIC:
+                # 이전 형식 인덱스는 URL 항목이 일치하지 않으므로 사용하지 않음 (import_blocklist --replace로 다시 생성)
+                mm.close()
+                logger.error("Unsupported blocklist index format. path=%s magic=%r", self.path, magic)
+                self._mm, self._count, self._stamp = None, 0, stamp
+                return
+            # 교체 전 mmap은 진행 중인 조회가 끝나도록 닫지 않고 GC에 맡김
+            self._mm, self._count, self._stamp = mm, count, stamp
+
+    def __len__(self) -> int:
+        self._reload_if_changed()
+        return self._count
+
+    def contains(self, value: int) -> bool:
+        self._reload_if_changed()
+        mm = self._mm
+        if mm is None:
+            return False
+        lo, hi = _OFFSET_PAIR.unpack_from(mm, _TABLE_OFFSET + (value >> (64 - _BUCKET_BITS)) * 4)
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            item = _ITEM.unpack_from(mm, _DATA_OFFSET + mid * 8)[0]
+            if item == value:
+                return True
+            if item < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return False
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> _MappedIndex:
+    global _index
+    if _index is None or _index.path != index_path():
+        with _index_lock:
+            if _index is None or _index.path != index_path():
+                _index = _MappedIndex(index_path())
+    return _index
+
+
+def _domain_candidates(host: str):
+    labels = host.split(".")
+    for i in range(len(labels) - 1):
+        yield ".".join(labels[i:])
+
+
+def lookup(url: str) -> str | None:
+    """차단 목록에 있으면 일치 종류(EnumBlocklistMatch)를, 없으면 None을 반환한다."""
+    index = get_index()
+    if index.contains(url_fingerprint(url)):
+        return EnumBlocklistMatch.URL
+    try:
+        host = urlsplit(canonicalize_url(url)).hostname or ""
+    except ValueError:
+        return None
+    for domain in _domain_candidates(host):
+        if index.contains(fingerprint(EnumBlocklistMatch.DOMAIN, domain)):
+            return EnumBlocklistMatch.DOMAIN
+    return None
+
+
+def read_fingerprints(path: str) -> array:
+    items = array("Q")
+    try:
+        with open(path, "rb") as f:
+            magic, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"blocklist 인덱스 형식이 올바르지 않습니다. --replace로 다시 생성하세요. path={path}")
+            f.seek(_DATA_OFFSET)
+            items.fromfile(f, count)
+            if sys.byteorder != "little":
+                items.byteswap()
+    except FileNotFoundError:
+        pass
+    return items
+
+
+def _dedupe(sorted_values):
+    previous = None
+    for value in sorted_values:
+        if value != previous:
+            yield value
+            previous = value
+
+
+def _write_index(path: str, sorted_values) -> int:
+    """정렬된 fingerprint를 스트리밍으로 임시 파일에 쓰고 원자적으로 교체한다. 저장된 항목 수를 반환."""
+    table = [0] * (_BUCKETS + 1)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".blocklist-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.seek(_DATA_OFFSET)
+            count = 0
+            chunk = array("Q")
+            for value in sorted_values:
+                table[(value >> (64 - _BUCKET_BITS)) + 1] += 1
+                chunk.append(value)
+                if len(chunk) >= 65536:
+                    _write_chunk(f, chunk)
+                    count += len(chunk)
+                    chunk = array("Q")
+            _write_chunk(f, chunk)
+            count += len(chunk)
+
+            for i in range(1, _BUCKETS + 1):
+                table[i] += table[i - 1]
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, count))
+            f.write(_TABLE.pack(*table))
+        # mkstemp 기본 권한(0600)으로는 다른 계정의 worker가 읽을 수 없음
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return count
+
+
+def _write_chunk(f, chunk: array) -> None:
+    if sys.byteorder != "little":
+        chunk.byteswap()
+    chunk.tofile(f)
+
+
+def merge_index(path: str, fingerprints, replace: bool = False) -> tuple[int, int]:
+    """
+    새 fingerprint를 기존 인덱스와 병합한다(replace=True면 새로 생성).
+    기존 항목은 이미 정렬되어 있으므로 새 항목만 정렬한 뒤 병합하며, (전체 항목 수, 추가된 항목 수)를 반환한다.
+    """
+    existing = array("Q") if replace else read_fingerprints(path)
+    new_values = sorted(set(fingerprints))
+    total = _write_index(path, _dedupe(heapq.merge(existing, new_values)))
+    return total, total - len(existing)
@@ -0,0 +1,125 @@
+import hashlib
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+from django.conf import settings
+
+
+DEFAULT_TRACKING_PARAMS = (
+    "utm_*",
+    "fbclid",
+    "gclid",
+    "dclid",
+    "gbraid",
+    "wbraid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_ga",
+    "_gl",
+    "napm",
+)
+
+DEFAULT_RULES = {
+    "lowercase_scheme": True,
+    "lowercase_host": True,
+    "idna": True,
+    "drop_default_port": True,
+    "drop_fragment": True,
+    "empty_path_as_slash": True,
+    "sort_query": True,
+    "strip_tracking_params": True,
+    "tracking_params": DEFAULT_TRACKING_PARAMS,
+}
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _resolve_rules(rules: dict | None = None) -> dict:
+    resolved = dict(DEFAULT_RULES)
+    resolved.update(getattr(settings, "URL_CANONICAL_RULES", None) or {})
+    if rules:
+        resolved.update(rules)
+    return resolved
+
+
+def _is_tracking_param(name: str, patterns) -> bool:
+    name = name.lower()
+    for pattern in patterns:
+        pattern = pattern.lower()
+        if pattern.endswith("*"):
+            if name.startswith(pattern[:-1]):
+                return True
+        elif name == pattern:
+            return True
+    return False
+
+
+def _canonical_host(host: str, rules: dict) -> str:
+    if rules["lowercase_host"]:
+        host = host.lower().rstrip(".")
+    if rules["idna"] and not host.isascii():
+        try:
+            host = host.encode("idna").decode("ascii")
+        except UnicodeError:
+            # IDNA 변환이 불가능한 호스트는 원본 그대로 사용
+            pass
+    return host
+
+
+def _canonical_query(query: str, rules: dict) -> str:
+    pieces = [piece for piece in query.split("&") if piece]
+    if rules["strip_tracking_params"]:
+        patterns = rules["tracking_params"] or ()
+        pieces = [
+            piece for piece in pieces
+            if not _is_tracking_param(unquote_plus(piece.split("=", 1)[0]), patterns)
+        ]
+    if rules["sort_query"]:
+        # 원본 인코딩을 보존하기 위해 디코딩/재인코딩 없이 정렬
+        pieces.sort()
+    return "&".join(pieces)
+
+
+def canonicalize_url(url: str, rules: dict | None = None) -> str:
+    """
+    동일한 리소스를 가리키는 http(s) URL을 하나의 표준 표기로 변환한다.
+    http/https 이외의 스킴이나 파싱할 수 없는 URL은 공백만 제거하여 반환한다.
+    """
+    url = (url or "").strip()
+    rules = _resolve_rules(rules)
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower() if rules["lowercase_scheme"] else parts.scheme
+    if scheme.lower() not in _DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    # urlsplit().hostname은 항상 소문자이므로 netloc에서 원본 호스트를 직접 추출
+    hostinfo = parts.netloc.rpartition("@")[2]
+    if hostinfo.startswith("["):
+        host = hostinfo[: hostinfo.find("]") + 1]
+    else:
+        host = hostinfo.split(":", 1)[0]
+    host = _canonical_host(host, rules)
+
+    userinfo = parts.netloc.rpartition("@")[0]
+    netloc = f"{userinfo}@{host}" if userinfo else host
+    if port is not None and not (rules["drop_default_port"] and _DEFAULT_PORTS[scheme.lower()] == port):
+        netloc = f"{netloc}:{port}"
+
+    path = parts.path
+    if not path and rules["empty_path_as_slash"]:
+        path = "/"
+    query = _canonical_query(parts.query, rules)
+    fragment = "" if rules["drop_fragment"] else parts.fragment
+    return urlunsplit((scheme, netloc, path, query, fragment))
+
+
+def url_hash(url: str) -> str:
+    """정규화된 URL의 SHA-256 hex digest(64자). URL 단위 레코드의 고정 길이 조회 키로 사용한다."""
+    return hashlib.sha256(canonicalize_url(url).encode("utf-8")).hexdigest()
@@ -0,0 +1,236 @@
+import logging
+import time
+import uuid
+
+from django.conf import settings
+
+from . import metrics
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class EnumProvider:
+    OPENAI = "openai"
+    GEMINI = "gemini"
+    URLSCAN = "urlscan"
+
+
+class EnumBreakerState:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, provider: str, retry_after: int):
+        super().__init__(f"{provider} 호출이 일시적으로 차단되었습니다. ({retry_after}초 후 재시도)")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+# 오류율은 window를 _BUCKETS개 시간 구간으로 나눈 성공/실패 카운터의 합으로 계산
+_BUCKETS = 6
+
+
+def _enabled() -> bool:
+    return bool(getattr(settings, "CIRCUIT_BREAKER_ENABLED", True))
+
+
+def _window() -> int:
+    return max(_BUCKETS, int(getattr(settings, "CIRCUIT_BREAKER_WINDOW", 60)))
+
+
+def _cooldown() -> int:
+    return max(1, int(getattr(settings, "CIRCUIT_BREAKER_COOLDOWN", 30)))
+
+
+def _open_key(provider: str) -> str:
+    # 존재하는 동안 OPEN. 만료되면 tripped 키만 남아 HALF_OPEN
+    return f"cb:{provider}:open"
+
+
+def _tripped_key(provider: str) -> str:
+    return f"cb:{provider}:tripped"
+
+
+def _probe_key(provider: str) -> str:
+    return f"cb:{provider}:probe"
+
+
+# 시험 호출 권한을 가진 호출(토큰 일치)만 권한을 반납. 반납한 경우 1
+_RELEASE_PROBE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _bucket_keys(provider: str, kind: str, now: float) -> list[str]:
+    size = _window() // _BUCKETS
+    current = int(now) // size
+    return [f"cb:{provider}:{kind}:{current - i}" for i in range(_BUCKETS)]
+
+
+def _trip(redis, provider: str) -> None:
+    pipe = redis.pipeline()
+    pipe.set(_open_key(provider), int(time.time()) + _cooldown(), ex=_cooldown())
+    pipe.set(_tripped_key(provider), 1)
+    pipe.delete(_probe_key(provider))
+    pipe.execute()
+
+
+def _reset(redis, provider: str) -> None:
+    now = time.time()
+    redis.delete(
+        _open_key(provider),
+        _tripped_key(provider),
+        _probe_key(provider),
+        *_bucket_keys(provider, "ok", now),
+        *_bucket_keys(provider, "err", now),
+    )
+
+
+def _retry_after(redis, provider: str) -> int:
+    ttl = redis.ttl(_open_key(provider))
+    return ttl if ttl and ttl > 0 else _cooldown()
+
+
+def state(provider: str) -> str:
+    if not _enabled():
+        return EnumBreakerState.CLOSED
+    try:
+        redis = get_redis()
+        if redis.exists(_open_key(provider)):
+            return EnumBreakerState.OPEN
+        if redis.exists(_tripped_key(provider)):
+            return EnumBreakerState.HALF_OPEN
+    except Exception:
+        logger.exception("Failed to read circuit breaker state. provider=%s", provider)
+    return EnumBreakerState.CLOSED
+
+
+def is_open(provider: str) -> bool:
+    """호출 가능 여부를 확인만 한다(HALF_OPEN 시험 호출 권한을 소비하지 않음)."""
+    current = state(provider)
+    if current == EnumBreakerState.HALF_OPEN:
+        try:
+            return bool(get_redis().exists(_probe_key(provider)))
+        except Exception:
+            return False
+    return current == EnumBreakerState.OPEN
+
+
+def check(provider: str) -> str | None:
+    """
+    호출 직전에 사용. OPEN이면 CircuitOpenError를 발생시키고, HALF_OPEN이면
+    시험 호출 1건만 통과시킨다(SET NX). 시험 호출이면 권한 토큰을 반환하며, 호출 결과를
+    record_success/record_failure에 이 토큰과 함께 알려야 한다. Redis 장애 시에는 차단하지 않는다.
+    """
+    if not _enabled():
+        return None
+    try:
+        redis = get_redis()
+        probe = uuid.uuid4().hex
+        if redis.exists(_open_key(provider)):
+            retry_after = _retry_after(redis, provider)
+        elif not redis.exists(_tripped_key(provider)):
+            return None
+        elif redis.set(
+            _probe_key(provider),
+            probe,
+            nx=True,
+            ex=max(1, int(getattr(settings, "CIRCUIT_BREAKER_PROBE_TIMEOUT", 30))),
+        ):
+            return probe
+        else:
+            retry_after = max(1, _cooldown() // 3)
+    except Exception:
+        logger.exception("Failed to check circuit breaker. provider=%s", provider)
+        return None
+    metrics.incr(f"circuit.{provider}.rejected")
+    raise CircuitOpenError(provider, retry_after)
+
+
+def record_success(provider: str, probe: str | None = None, client_error: bool = False) -> None:
+    """
+    probe: check()가 반환한 시험 호출 토큰. 차단(OPEN/HALF_OPEN) 중에는 시험 호출의 성공만 차단을 해제하고,
+    차단 전에 시작된 호출의 성공은 무시한다.
+    client_error: provider는 응답했지만 요청 자체가 실패(4xx)한 경우. 정상 상태에서는 성공으로 집계하지만
+    시험 호출이면 차단을 해제하지 않고 권한만 반납하여 다른 호출이 다시 시험하도록 한다.
+    """
+    if not _enabled():
+        return
+    try:
+        redis = get_redis()
+        if redis.exists(_tripped_key(provider)):
+            if not probe or not redis.eval(_RELEASE_PROBE_SCRIPT, 1, _probe_key(provider), probe):
+                return
+            if client_error:
+                return
+            # 시험 호출 성공: 닫고 이전 구간의 오류 기록도 초기화
+            _reset(redis, provider)
+            metrics.incr(f"circuit.{provider}.closed")
+            logger.warning("Circuit breaker closed. provider=%s", provider)
+            return
+        key = _bucket_keys(provider, "ok", time.time())[0]
+        pipe = redis.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, _window())
+        pipe.execute()
+    except Exception:
+        logger.exception("Failed to record circuit breaker success. provider=%s", provider)
+
+
+def record_failure(provider: str) -> None:
+    if not _enabled():
+        return
+    try:
+        redis = get_redis()
+        if redis.exists(_tripped_key(provider)):
+            # 시험 호출 실패(또는 OPEN 중 진행되던 호출의 실패): cooldown 다시 시작
+            if not redis.exists(_open_key(provider)):
+                _trip(redis, provider)
+                metrics.incr(f"circuit.{provider}.reopened")
+            return
+
+        now = time.time()
+        key = _bucket_keys(provider, "err", now)[0]
+        pipe = redis.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, _window())
+        pipe.mget(_bucket_keys(provider, "ok", now))
+        pipe.mget(_bucket_keys(provider, "err", now))
+        _, _, ok_counts, err_counts = pipe.execute()
+        errors = sum(int(v) for v in err_counts if v)
+        total = errors + sum(int(v) for v in ok_counts if v)
+        if (
+            total >= int(getattr(settings, "CIRCUIT_BREAKER_MIN_CALLS", 10))
+            and errors / total >= float(getattr(settings, "CIRCUIT_BREAKER_ERROR_RATE", 0.5))
+        ):
+            _trip(redis, provider)
+            metrics.incr(f"circuit.{provider}.opened")
+            logger.warning("Circuit breaker opened. provider=%s errors=%s total=%s", provider, errors, total)
+    except Exception:
+        logger.exception("Failed to record circuit breaker failure. provider=%s", provider)
+
+
+def states() -> list[dict]:
+    """관리자 대시보드/지표용 provider별 상태와 최근 window의 호출 수"""
+    now = time.time()
+    result = []
+    for provider in (EnumProvider.OPENAI, EnumProvider.GEMINI, EnumProvider.URLSCAN):
+        item = {"provider": provider, "state": state(provider), "successes": 0, "errors": 0, "retry_after": 0}
+        try:
+            redis = get_redis()
+            item["successes"] = sum(int(v) for v in redis.mget(_bucket_keys(provider, "ok", now)) if v)
+            item["errors"] = sum(int(v) for v in redis.mget(_bucket_keys(provider, "err", now)) if v)
+            if item["state"] == EnumBreakerState.OPEN:
+                item["retry_after"] = _retry_after(redis, provider)
+        except Exception:
+            logger.exception("Failed to read circuit breaker stats. provider=%s", provider)
+        total = item["successes"] + item["errors"]
+        item["error_rate"] = round(item["errors"] / total, 4) if total else 0.0
+        result.append(item)
+    return result
@@ -1,17 +1,29 @@
 
+import hashlib
 import json
+import logging
+import threading
 import time
-import urllib.error
-import urllib.request
+from collections import defaultdict
 
+import httpx
 import openai
+import requests
 from google import genai
+from google.genai import errors as genai_errors
 from google.genai import types as genai_types
+from requests.adapters import HTTPAdapter
 
 from django.conf import settings
 
+from . import circuit_breaker, parsing, rate_limit
+from .circuit_breaker import EnumProvider
+from .rate_limit import EnumPriority, RateLimited
+from .models import EnumTier
 from .prompts import PROMPTS, EnumCategory
+from .redis_client import get_redis
 
+logger = logging.getLogger(__name__)
 
 _URLSCANIO_API_KEY = settings.URLSCANIO_API_KEY
 _OPENAI_API_KEY = settings.OPENAI_API_KEY
@@ -21,6 +33,8 @@ _GEMINI_API_KEY = settings.GEMINI_API_KEY
 class EnumModel:
     OPENAI = "openai"
     GEMINI = "gemini"
+    HEURISTIC = "heuristic"
+    BLOCKLIST = "blocklist"
 
 
 class EnumOpenAIModel:
@@ -29,6 +43,7 @@ class EnumOpenAIModel:
     GPT_4O = "gpt-4o"
     GPT_4O_MINI = "gpt-4o-mini"
     GPT_4O_SEARCH_PREVIEW = "gpt-4o-search-preview"
+    GPT_5_NANO = "gpt-5-nano"
     GPT_5_MINI = "gpt-5-mini"
     GPT_5_2 = "gpt-5.2"
 
@@ -41,13 +56,91 @@ class EnumGeminiModel:
     GEMINI_2_5_FLASH_LITE = "gemini-2.5-flash-lite"
 
 
+# 용도/provider별 tier 구성. lite로 먼저 응답받고 불확실한 경우에만 heavy로 재요청한다.
+# - web_search: 웹 검색 도구 사용 여부
+# - effort: OpenAI reasoning effort / Gemini thinking_level (None이면 모델 기본값)
+DEFAULT_MODEL_TIERS = {
+    EnumCategory.SCAN_URL: {
+        EnumModel.OPENAI: {
+            EnumTier.LITE: {"model": EnumOpenAIModel.GPT_5_NANO, "web_search": False, "effort": "minimal"},
+            EnumTier.HEAVY: {"model": EnumOpenAIModel.GPT_5_MINI, "web_search": True, "effort": "low"},
+        },
+        EnumModel.GEMINI: {
+            EnumTier.LITE: {"model": EnumGeminiModel.GEMINI_2_5_FLASH_LITE, "web_search": False, "effort": None},
+            EnumTier.HEAVY: {"model": EnumGeminiModel.GEMINI_3_FLASH_PREVIEW, "web_search": True, "effort": "low"},
+        },
+    },
+    # 보고서는 하이퍼링크 탐색이 필수이므로 lite도 웹 검색을 유지하고 reasoning만 낮춤
+    EnumCategory.GENERATE_REPORT: {
+        EnumModel.OPENAI: {
+            EnumTier.LITE: {"model": EnumOpenAIModel.GPT_5_MINI, "web_search": True, "effort": "low"},
+            EnumTier.HEAVY: {"model": EnumOpenAIModel.GPT_5_MINI, "web_search": True, "effort": "medium"},
+        },
+        EnumModel.GEMINI: {
+            EnumTier.LITE: {"model": EnumGeminiModel.GEMINI_3_FLASH_PREVIEW, "web_search": True, "effort": "low"},
+            EnumTier.HEAVY: {"model": EnumGeminiModel.GEMINI_3_FLASH_PREVIEW, "web_search": True, "effort": "medium"},
+        },
+    },
+}
+
+
+def tier_config(category: str, provider: str, tier: str) -> dict:
+    """DEFAULT_MODEL_TIERS에 settings.MODEL_TIERS[category][provider][tier]를 덮어쓴 구성"""
+    config = dict(DEFAULT_MODEL_TIERS[category][provider][tier])
+    overrides = getattr(settings, "MODEL_TIERS", None) or {}
+    config.update(overrides.get(category, {}).get(provider, {}).get(tier, {}))
+    return config
+
+
+class OpenAIResponseFailed(RuntimeError):
+    pass
+
+
+def _is_provider_failure(exc: Exception) -> bool:
+    """
+    circuit breaker 오류율에 반영할 예외(연결 실패, 시간 초과, 5xx). 요청 자체의 오류(4xx)와
+    한도 초과(429, rate_limit에서 Retry-After로 처리)는 제외
+    """
+    if isinstance(exc, (openai.APIConnectionError, openai.InternalServerError)):
+        return True
+    if isinstance(exc, genai_errors.ServerError):
+        return True
+    return isinstance(exc, (httpx.TransportError, requests.exceptions.RequestException))
+
+
+def _raise_rate_limited(name: str, exc: Exception):
+    """provider의 429 응답을 Retry-After 기간 동안 공유 버킷 차단으로 반영하고 RateLimited로 변환"""
+    response = getattr(exc, "response", None)
+    seconds = rate_limit.penalize(name, rate_limit.retry_after_seconds(getattr(response, "headers", None)))
+    raise RateLimited(name, seconds) from exc
+
+
+def _guarded_call(provider: str, func, *args, **kwargs):
+    probe = circuit_breaker.check(provider)
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        # 4xx 등 요청 자체의 오류는 오류율에 넣지 않되, 차단 해제 근거로도 쓰지 않음
+        if _is_provider_failure(e):
+            circuit_breaker.record_failure(provider)
+        else:
+            circuit_breaker.record_success(provider, probe, client_error=True)
+        raise
+    circuit_breaker.record_success(provider, probe)
+    return result
+
+
 class URLScanIOClient:
-    def __init__(self, api_key: str = _URLSCANIO_API_KEY):
+    def __init__(self, api_key: str = _URLSCANIO_API_KEY, session: requests.Session | None = None):
         self.api_key = api_key
         self.base_url = "https://urlscan.io"
+        self.session = session or get_http_session()
 
 
-    def _request(self, method: str, path: str, json_body: dict | None = None, timeout: int = 30):
+    def _request(self, method: str, path: str, endpoint: str, json_body: dict | None = None, timeout: int = 30):
+        """endpoint: 요청 한도 구분(submit/result/screenshot)"""
+        limit_name = f"{EnumProvider.URLSCAN}:{endpoint}"
+        rate_limit.acquire(limit_name, EnumPriority.BACKGROUND)
         url = f"{self.base_url}{path}"
         data = None
         headers = {"api-key": self.api_key}
@@ -56,18 +149,27 @@ class URLScanIOClient:
             headers["Content-Type"] = "application/json"
             headers["Accept"] = "application/json"
 
-        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+        probe = circuit_breaker.check(EnumProvider.URLSCAN)
         try:
-            with urllib.request.urlopen(req, timeout=timeout) as resp:
-                return resp.status, resp.read(), resp.headers
-        except urllib.error.HTTPError as e:
-            return e.code, e.read(), e.headers
+            resp = self.session.request(method, url, data=data, headers=headers, timeout=timeout)
+        except requests.exceptions.RequestException:
+            circuit_breaker.record_failure(EnumProvider.URLSCAN)
+            raise
+        if resp.status_code >= 500:
+            circuit_breaker.record_failure(EnumProvider.URLSCAN)
+        else:
+            circuit_breaker.record_success(EnumProvider.URLSCAN, probe, client_error=resp.status_code >= 400)
+        if resp.status_code == 429:
+            seconds = rate_limit.penalize(limit_name, rate_limit.retry_after_seconds(resp.headers))
+            raise RateLimited(limit_name, seconds)
+        return resp.status_code, resp.content, resp.headers
 
 
     def scan_url(self, url: str):
         status, body, _ = self._request(
             "POST",
             "/api/v1/scan",
+            "submit",
             json_body={"url": url, "visibility": "public"},
         )
         if status != 200:
@@ -76,7 +178,7 @@ class URLScanIOClient:
 
 
     def get_result(self, scan_id: str):
-        status, body, _ = self._request("GET", f"/api/v1/result/{scan_id}/")
+        status, body, _ = self._request("GET", f"/api/v1/result/{scan_id}/", "result")
         if status == 404:
             return None
         if status == 410:
@@ -87,7 +189,7 @@ class URLScanIOClient:
 
 
     def screenshot(self, scan_id: str):
-        status, body, _ = self._request("GET", f"/screenshots/{scan_id}.png")
+        status, body, _ = self._request("GET", f"/screenshots/{scan_id}.png", "screenshot")
         if status == 404:
             return None
         if status != 200:
@@ -103,12 +205,14 @@ class OpenAIClient:
         poll_interval: int = 2,
         poll_timeout: int = 240,
         use_background: bool = True,
+        http_client: httpx.Client | None = None,
     ):
         self.api_key = api_key
         self.client = openai.OpenAI(
             api_key=self.api_key,
             timeout=request_timeout,
             max_retries=2,
+            http_client=http_client,
         )
         self.poll_interval = max(1, poll_interval)
         self.poll_timeout = max(10, poll_timeout)
@@ -119,61 +223,189 @@ class OpenAIClient:
         deadline = time.monotonic() + self.poll_timeout
         delay = self.poll_interval
         while time.monotonic() < deadline:
-            resp = self.client.responses.retrieve(response_id)
-            status = getattr(resp, "status", None)
-            if status == "completed":
+            resp = self.retrieve_response(response_id)
+            if resp is not None:
                 return resp
-            if status in ("failed", "canceled"):
-                raise RuntimeError(f"OpenAI 응답이 실패했습니다. status={status}")
             time.sleep(delay)
             delay = min(delay * 1.5, 10)
         raise TimeoutError("OpenAI 응답 대기 시간이 초과되었습니다.")
 
 
-    def _create_response(self, **kwargs):
+    def _create(self, limit_name: str, **kwargs):
+        try:
+            return _guarded_call(EnumProvider.OPENAI, self.client.responses.create, **kwargs)
+        except openai.RateLimitError as e:
+            _raise_rate_limited(limit_name, e)
+
+
+    def start_response(self, priority: str = EnumPriority.INTERACTIVE, **kwargs):
+        """
+        배경(background) 응답을 시작만 하고 즉시 반환한다. status가 queued/in_progress면
+        이후 retrieve_response(response.id)로 이어서 조회한다.
+        """
         use_background = kwargs.pop("use_background", self.use_background)
+        limit_name = f"{EnumProvider.OPENAI}:{kwargs.get('model')}"
+        rate_limit.acquire(limit_name, priority)
         if not use_background:
-            return self.client.responses.create(**kwargs)
+            return self._create(limit_name, **kwargs)
         try:
-            initial = self.client.responses.create(
-                **kwargs,
-                background=True,
-                store=True,
-            )
-            return self._wait_for_response(initial.id)
+            return self._create(limit_name, **kwargs, background=True, store=True)
         except openai.BadRequestError:
             # 배경 모드가 허용되지 않는 경우(예: ZDR) 일반 요청으로 폴백
-            return self.client.responses.create(**kwargs)
+            return self._create(limit_name, **kwargs)
+
+
+    def retrieve_response(self, response_id: str):
+        """완료된 응답을 반환하고, 아직 진행 중이면 None을 반환한다."""
+        resp = _guarded_call(EnumProvider.OPENAI, self.client.responses.retrieve, response_id)
+        status = getattr(resp, "status", None)
+        if status in ("queued", "in_progress"):
+            return None
+        if status in ("failed", "cancelled", "canceled", "incomplete"):
+            raise OpenAIResponseFailed(f"OpenAI 응답이 실패했습니다. status={status}")
+        return resp
+
+
+    def _pending_key(self, kwargs: dict) -> str:
+        # 같은 요청(모델/입력/옵션)이면 같은 키. 재시도/재실행된 worker가 진행 중인 배경 응답을 이어서 기다리도록 함
+        request = json.dumps(kwargs, sort_keys=True, ensure_ascii=False, default=str)
+        return f"openai:pending_response:{hashlib.sha256(request.encode()).hexdigest()}"
+
+
+    def _claim_pending(self, pending_key: str, response_id: str | None = None) -> str | None:
+        """response_id가 있으면 기록하고, 없으면 기록된 진행 중 응답 id를 반환 (Redis 장애 시 이어받기 없이 진행)"""
+        try:
+            redis = get_redis()
+            if response_id:
+                redis.set(pending_key, response_id, ex=self.poll_timeout + 60)
+                return response_id
+            stored = redis.get(pending_key)
+            return stored.decode() if stored else None
+        except Exception:
+            logger.exception("Failed to access pending OpenAI response. key=%s", pending_key)
+            return None
+
+
+    def _release_pending(self, pending_key: str) -> None:
+        try:
+            get_redis().delete(pending_key)
+        except Exception:
+            logger.exception("Failed to clear pending OpenAI response. key=%s", pending_key)
+
+
+    def _await_pending(self, pending_key: str, response_id: str):
+        try:
+            response = self._wait_for_response(response_id)
+        except (OpenAIResponseFailed, TimeoutError):
+            self._release_pending(pending_key)
+            raise
+        # 일시적 오류(네트워크/차단기 등)로 재시도되는 경우에는 기록을 남겨 두어 같은 응답을 이어서 기다림
+        self._release_pending(pending_key)
+        return response
+
+
+    def _create_response(self, priority: str = EnumPriority.INTERACTIVE, **kwargs):
+        """
+        배경 응답을 시작하고 완료될 때까지 기다린다(동기 경로: hedging, 차단기 우회, 동기 보고서 생성).
+        진행 중인 응답 id를 Redis에 남겨 두어, 대기 중 worker가 종료/재시도되어도 같은 요청은 새 응답을 만들지 않고
+        기존 응답을 이어서 기다린다. 한 번의 대기 시간은 poll_timeout으로 제한
+        """
+        if not kwargs.get("use_background", self.use_background):
+            return self.start_response(priority, **kwargs)
+        pending_key = self._pending_key(kwargs)
+        response_id = self._claim_pending(pending_key)
+        if response_id:
+            try:
+                return self._await_pending(pending_key, response_id)
+            except openai.NotFoundError:
+                # 보관 기간이 지난 응답은 새로 시작
+                self._release_pending(pending_key)
+
+        initial = self.start_response(priority, **kwargs)
+        if getattr(initial, "status", None) not in ("queued", "in_progress"):
+            return initial
+        self._claim_pending(pending_key, initial.id)
+        return self._await_pending(pending_key, initial.id)
+
+
+    def _tier_request(self, category: str, tier: str, model: str | None, user_content: str) -> dict:
+        config = tier_config(category, EnumModel.OPENAI, tier)
+        request = dict(
+            model=model or config["model"],
+            text=self._text_options(category),
+            input=[
+                {"role": "developer", "content": PROMPTS[category]},
+                {"role": "user", "content": user_content},
+            ],
+        )
+        if config.get("web_search"):
+            request["tools"] = [{"type": "web_search"}]
+            request["tool_choice"] = "auto"
+        if config.get("effort"):
+            request["reasoning"] = {"effort": config["effort"]}
+        return request
+
+
+    def _text_options(self, category: str) -> dict:
+        text = {"verbosity": "low"}
+        if getattr(settings, "STRUCTURED_OUTPUT_ENABLED", True):
+            text["format"] = parsing.openai_text_format(category)
+        return text
+
+
+    def repair_json(self, category: str, text: str):
+        """형식이 잘못된 응답을 웹 검색 없이 lite 모델로 JSON 교정만 요청"""
+        config = tier_config(EnumCategory.SCAN_URL, EnumModel.OPENAI, EnumTier.LITE)
+        request = dict(
+            model=config["model"],
+            text=self._text_options(category),
+            input=[
+                {
+                    "role": "developer",
+                    "content": PROMPTS[EnumCategory.REPAIR_JSON] + json.dumps(parsing.JSON_SCHEMAS[category], ensure_ascii=False),
+                },
+                {"role": "user", "content": text},
+            ],
+            use_background=False,
+        )
+        if config.get("effort"):
+            request["reasoning"] = {"effort": config["effort"]}
+        priority = EnumPriority.BACKGROUND if category == EnumCategory.GENERATE_REPORT else EnumPriority.INTERACTIVE
+        return self._create_response(priority, **request)
+
+
+    def _scan_url_request(self, url: str, tier: str, model: str | None) -> dict:
+        return self._tier_request(EnumCategory.SCAN_URL, tier, model, url)
 
 
     def scan_url(
         self,
         url: str,
-        model: str = EnumOpenAIModel.GPT_5_MINI
+        tier: str = EnumTier.HEAVY,
+        model: str | None = None,
     ):
-        response = self._create_response(
-            model=model,
-            tools=[{"type": "web_search"}],
-            tool_choice="auto",
-            reasoning={"effort": "low"},
-            text={"verbosity": "low"},
-            input=[
-                {"role": "developer", "content": PROMPTS[EnumCategory.SCAN_URL]},
-                {"role": "user", "content": url},
-            ],
-        )
-        return response
+        return self._create_response(**self._scan_url_request(url, tier, model))
 
 
-    def generate_report(
+    def start_scan_url(
+        self,
+        url: str,
+        tier: str = EnumTier.HEAVY,
+        model: str | None = None,
+    ):
+        return self.start_response(**self._scan_url_request(url, tier, model))
+
+
+    def _generate_report_request(
         self,
         url: str,
         site_name: str,
         threat_type: str,
         description: str,
         threat_score: int,
-        model: str = EnumOpenAIModel.GPT_5_MINI
-    ):
+        tier: str,
+        model: str | None,
+    ) -> dict:
         input_content = str({
             "url": url,
             "site_name": site_name,
@@ -181,24 +413,44 @@ class OpenAIClient:
             "description": description,
             "threat_score": threat_score,
         })
-        response = self._create_response(
-            model=model,
-            tools=[{"type": "web_search"}],
-            tool_choice="auto",
-            reasoning={"effort": "medium"},
-            text={"verbosity": "low"},
-            input=[
-                {"role": "developer", "content": PROMPTS[EnumCategory.GENERATE_REPORT]},
-                {"role": "user", "content": input_content},
-            ],
-        )
-        return response
+        return self._tier_request(EnumCategory.GENERATE_REPORT, tier, model, input_content)
+
+
+    def generate_report(
+        self,
+        url: str,
+        site_name: str,
+        threat_type: str,
+        description: str,
+        threat_score: int,
+        tier: str = EnumTier.HEAVY,
+        model: str | None = None,
+    ):
+        return self._create_response(EnumPriority.BACKGROUND, **self._generate_report_request(
+            url, site_name, threat_type, description, threat_score, tier, model,
+        ))
+
+
+    def start_generate_report(
+        self,
+        url: str,
+        site_name: str,
+        threat_type: str,
+        description: str,
+        threat_score: int,
+        tier: str = EnumTier.HEAVY,
+        model: str | None = None,
+    ):
+        return self.start_response(EnumPriority.BACKGROUND, **self._generate_report_request(
+            url, site_name, threat_type, description, threat_score, tier, model,
+        ))
 
 
 class GeminiClient:
-    def __init__(self, api_key: str = _GEMINI_API_KEY):
+    def __init__(self, api_key: str = _GEMINI_API_KEY, http_client: httpx.Client | None = None):
         self.api_key = api_key
-        self.client = genai.Client(api_key=self.api_key)
+        http_options = genai_types.HttpOptions(httpx_client=http_client) if http_client else None
+        self.client = genai.Client(api_key=self.api_key, http_options=http_options)
 
 
     def _build_contents(self, prompt: str, user_content: str):
@@ -208,21 +460,76 @@ class GeminiClient:
         ]
 
 
+    def _generate(
+        self,
+        category: str,
+        prompt: str,
+        config: dict,
+        user_content: str,
+        priority: str = EnumPriority.INTERACTIVE,
+    ):
+        """category: 응답 스키마 구분. config: tier_config() 결과(model, web_search, effort)"""
+        limit_name = f"{EnumProvider.GEMINI}:{config['model']}"
+        rate_limit.acquire(limit_name, priority)
+        # 고정 스키마가 있는 용도(스캔)만 JSON 스키마 구조화 출력 사용
+        schema = None
+        if category == EnumCategory.SCAN_URL and getattr(settings, "STRUCTURED_OUTPUT_ENABLED", True):
+            schema = parsing.SCAN_URL_SCHEMA
+        try:
+            return _guarded_call(
+                EnumProvider.GEMINI,
+                self.client.models.generate_content,
+                model=config["model"],
+                contents=self._build_contents(prompt, user_content),
+                config=genai_types.GenerateContentConfig(
+                    tools=(
+                        [genai_types.Tool(google_search=genai_types.GoogleSearch())]
+                        if config.get("web_search") else None
+                    ),
+                    thinking_config=(
+                        genai_types.ThinkingConfig(thinking_level=config["effort"])
+                        if config.get("effort") else None
+                    ),
+                    response_mime_type="application/json",
+                    response_json_schema=schema,
+                )
+            )
+        except genai_errors.ClientError as e:
+            if getattr(e, "code", None) != 429:
+                raise
+            _raise_rate_limited(limit_name, e)
+
+
+    def _tier_config(self, category: str, tier: str, model: str | None) -> dict:
+        config = tier_config(category, EnumModel.GEMINI, tier)
+        if model:
+            config["model"] = model
+        return config
+
+
+    def repair_json(self, category: str, text: str):
+        """형식이 잘못된 응답을 웹 검색 없이 lite 모델로 JSON 교정만 요청"""
+        return self._generate(
+            category,
+            PROMPTS[EnumCategory.REPAIR_JSON] + json.dumps(parsing.JSON_SCHEMAS[category], ensure_ascii=False),
+            tier_config(EnumCategory.SCAN_URL, EnumModel.GEMINI, EnumTier.LITE),
+            text,
+            EnumPriority.BACKGROUND if category == EnumCategory.GENERATE_REPORT else EnumPriority.INTERACTIVE,
+        )
+
+
     def scan_url(
         self,
         url: str,
-        model: str = EnumGeminiModel.GEMINI_3_FLASH_PREVIEW
+        tier: str = EnumTier.HEAVY,
+        model: str | None = None,
     ):
-        response = self.client.models.generate_content(
-            model=model,
-            contents=self._build_contents(PROMPTS[EnumCategory.SCAN_URL], url),
-            config=genai_types.GenerateContentConfig(
-                tools=[genai_types.Tool(google_search=genai_types.GoogleSearch())],
-                thinking_config=genai_types.ThinkingConfig(thinking_level="low"),
-                response_mime_type="application/json",
-            )
+        return self._generate(
+            EnumCategory.SCAN_URL,
+            PROMPTS[EnumCategory.SCAN_URL],
+            self._tier_config(EnumCategory.SCAN_URL, tier, model),
+            url,
         )
-        return response
 
 
     def generate_report(
@@ -232,7 +539,8 @@ class GeminiClient:
         threat_type: str,
         description: str,
         threat_score: int,
-        model: str = EnumGeminiModel.GEMINI_3_FLASH_PREVIEW
+        tier: str = EnumTier.HEAVY,
+        model: str | None = None,
     ):
         input_content = str({
             "url": url,
@@ -241,14 +549,136 @@ class GeminiClient:
             "description": description,
             "threat_score": threat_score,
         })
-        response = self.client.models.generate_content(
-            model=model,
-            contents=self._build_contents(PROMPTS[EnumCategory.GENERATE_REPORT], input_content),
-            config=genai_types.GenerateContentConfig(
-                tools=[genai_types.Tool(google_search=genai_types.GoogleSearch())],
-                thinking_config=genai_types.ThinkingConfig(thinking_level="medium"),
-                response_mime_type="application/json",
-            )
+        return self._generate(
+            EnumCategory.GENERATE_REPORT,
+            PROMPTS[EnumCategory.GENERATE_REPORT],
+            self._tier_config(EnumCategory.GENERATE_REPORT, tier, model),
+            input_content,
+            EnumPriority.BACKGROUND,
         )
-        return response
 
+
+class _ConnectionStats:
+    """호스트별 요청 수와 새로 맺은 연결 수(httpx 기반 LLM SDK용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.connections = defaultdict(int)
+
+    def on_request(self, request: httpx.Request) -> None:
+        host = request.url.host
+
+        def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                with self._lock:
+                    self.connections[host] += 1
+
+        request.extensions["trace"] = trace
+
+    def on_response(self, response: httpx.Response) -> None:
+        with self._lock:
+            self.requests[response.request.url.host] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                host: {"requests": count, "connections": self.connections.get(host, 0)}
+                for host, count in self.requests.items()
+            }
+
+
+_registry: dict = {}
+_registry_lock = threading.Lock()
+_llm_stats = _ConnectionStats()
+
+
+def _build_http_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=int(getattr(settings, "HTTP_POOL_CONNECTIONS", 10)),
+        pool_maxsize=int(getattr(settings, "HTTP_POOL_MAXSIZE", 20)),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _build_llm_http_client() -> httpx.Client:
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=int(getattr(settings, "LLM_HTTP_MAX_CONNECTIONS", 50)),
+            max_keepalive_connections=int(getattr(settings, "LLM_HTTP_MAX_KEEPALIVE", 20)),
+        ),
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        event_hooks={"request": [_llm_stats.on_request], "response": [_llm_stats.on_response]},
+    )
+
+
+_BUILDERS = {
+    "http_session": _build_http_session,
+    "urlscan": lambda: URLScanIOClient(session=get_http_session()),
+    "openai": lambda: OpenAIClient(http_client=_build_llm_http_client()),
+    "gemini": lambda: GeminiClient(http_client=_build_llm_http_client()),
+}
+
+
+def _get(name: str):
+    client = _registry.get(name)
+    if client is None:
+        with _registry_lock:
+            client = _registry.get(name)
+            if client is None:
+                client = _BUILDERS[name]()
+                _registry[name] = client
+    return client
+
+
+def get_http_session() -> requests.Session:
+    """urlscan API와 스크린샷 다운로드가 공유하는 keep-alive 세션"""
+    return _get("http_session")
+
+
+def get_urlscan_client() -> URLScanIOClient:
+    return _get("urlscan")
+
+
+def get_openai_client() -> OpenAIClient:
+    return _get("openai")
+
+
+def get_gemini_client() -> GeminiClient:
+    return _get("gemini")
+
+
+def init_client_registry() -> None:
+    """
+    worker 프로세스 시작 시 호출. fork 이전에 만들어진 커넥션 풀을 버리고
+    키가 설정된 provider 클라이언트를 미리 생성한다.
+    """
+    with _registry_lock:
+        _registry.clear()
+    get_http_session()
+    get_urlscan_client()
+    if _OPENAI_API_KEY:
+        get_openai_client()
+    if _GEMINI_API_KEY:
+        get_gemini_client()
+
+
+def connection_stats() -> dict:
+    """호스트별 요청 수, 새 연결 수, 재사용된 요청 수"""
+    stats = _llm_stats.snapshot()
+    session = _registry.get("http_session")
+    if session is not None:
+        for adapter in set(session.adapters.values()):
+            for pool_key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(pool_key)
+                if pool is None:
+                    continue
+                entry = stats.setdefault(pool.host, {"requests": 0, "connections": 0})
+                entry["requests"] += pool.num_requests
+                entry["connections"] += pool.num_connections
+    for entry in stats.values():
+        entry["reused"] = max(0, entry["requests"] - entry["connections"])
+    return stats
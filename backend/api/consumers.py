@@ -1,166 +1,208 @@
-import hashlib
+from abc import ABC, abstractmethod
+
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
-from django.core.cache import cache
+from django.conf import settings
 from urllib.parse import unquote
 
-from .models import GeneratedReport, URLScanIOResponse, ReportJob, ScannedURL
-from .ws import qr_scan_group_name, qr_scan_status_cache_key
+from . import status_store
+from .canonical import canonicalize_url
+from .report_queue import request_followups
+from .ws import qr_scan_group_name, report_status_group_name
+
 
+class _URLSubscriptionConsumer(AsyncJsonWebsocketConsumer, ABC):
+    """
+    한 연결에서 여러 URL의 상태를 구독한다.
+    - {"type": "subscribe", "urls": [...]} -> {"type": "subscribed", "urls": [...], "statuses": [...]}
+      "since": {url: version}을 함께 보내면 그 버전 이후 바뀌지 않은 URL은 {"url", "version", "unchanged": true}만 응답
+    - {"type": "unsubscribe", "urls": [...]} -> {"type": "unsubscribed", "urls": [...]}
+    - {"url": "..."} (기존 단일 URL 프로토콜) -> 해당 URL을 구독하고 상태 1건을 응답 ("version"으로 재개 가능)
+    연결당 구독 수는 WS_MAX_SUBSCRIPTIONS로 제한한다.
+    """
+
+    @abstractmethod
+    def group_name_for(self, url: str) -> str:
+        """URL별 channel layer group 이름"""
 
-class ReportStatusConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
-        self.url = ""
+        # 정규화 URL -> group 이름
+        self.subscriptions: dict[str, str] = {}
         await self.accept()
 
     async def receive_json(self, content, **kwargs):
+        message_type = content.get("type")
+        if message_type in ("subscribe", "unsubscribe"):
+            urls = content.get("urls")
+            if not isinstance(urls, list) or not urls or not all(isinstance(url, str) and url for url in urls):
+                await self.send_json({"type": "error", "message": "urls required"})
+                return
+            normalized_urls = list(dict.fromkeys(canonicalize_url(unquote(url)) for url in urls))
+            if message_type == "subscribe":
+                await self._subscribe(normalized_urls, self._since(content.get("since")))
+            else:
+                await self._unsubscribe(normalized_urls)
+            return
+
         url = content.get("url")
         if not url or not isinstance(url, str):
             await self.send_json({"type": "error", "message": "url required"})
             return
-        if not self.url:
-            self.url = unquote(url)
-            self.group_name = "report_status"
-            await self.channel_layer.group_add(self.group_name, self.channel_name)
-        elif self.url != unquote(url):
-            await self.send_json({"type": "error", "message": "url mismatch"})
+        normalized_url = canonicalize_url(unquote(url))
+        if normalized_url not in self.subscriptions and not await self._add([normalized_url]):
             return
-
-        status_payload = await self._get_status(self.url)
-        await self.send_json(status_payload)
+        statuses = await self._get_statuses([normalized_url])
+        since = {normalized_url: content["version"]} if isinstance(content.get("version"), int) else {}
+        await self.send_json(self._resume(statuses, since)[0])
 
     async def disconnect(self, close_code):
-        if getattr(self, "group_name", None):
-            await self.channel_layer.group_discard(self.group_name, self.channel_name)
-
-    async def report_status(self, event):
-        await self.send_json(event["payload"])
-
-    @database_sync_to_async
-    def _get_status(self, url):
-        report_ready = GeneratedReport.objects.filter(url=url, is_processed=True).exists()
-        urlscan = (
-            URLScanIOResponse.objects.filter(url=url)
-            .only("screenshot", "response")
-            .first()
-        )
-        screenshot_url = None
-        screenshot_ready = False
-        if urlscan:
-            if urlscan.screenshot:
-                screenshot_ready = True
-                screenshot_url = urlscan.screenshot.url
-            else:
-                response = urlscan.response or {}
-                task = response.get("task") if response else None
-                screenshot_url = task.get("screenshotURL") if task else None
-                screenshot_ready = bool(screenshot_url)
-        job = ReportJob.objects.filter(url=url).only("status", "last_error").first()
-        job_status = job.status if job else None
-        last_error = job.last_error if job else ""
+        for group_name in self.subscriptions.values():
+            await self.channel_layer.group_discard(group_name, self.channel_name)
+        self.subscriptions = {}
+
+    async def _add(self, urls: list[str]) -> list[str]:
+        """구독 한도 안에서 새 URL을 group에 추가. 한도를 넘는 URL은 오류로 알리고 추가하지 않는다."""
+        new_urls = [url for url in urls if url not in self.subscriptions]
+        limit = int(getattr(settings, "WS_MAX_SUBSCRIPTIONS", 50))
+        available = max(0, limit - len(self.subscriptions))
+        accepted, rejected = new_urls[:available], new_urls[available:]
+        if rejected:
+            await self.send_json({
+                "type": "error",
+                "message": "subscription limit exceeded",
+                "limit": limit,
+                "rejected": rejected,
+            })
+        for url in accepted:
+            group_name = self.group_name_for(url)
+            self.subscriptions[url] = group_name
+            await self.channel_layer.group_add(group_name, self.channel_name)
+        if accepted:
+            await self.on_subscribed(accepted)
+        return accepted
+
+    @staticmethod
+    def _since(since) -> dict[str, int]:
+        if not isinstance(since, dict):
+            return {}
         return {
-            "type": "status",
-            "url": url,
-            "is_processed": report_ready,
-            "report_ready": report_ready,
-            "screenshot_ready": screenshot_ready,
-            "screenshot_url": screenshot_url,
-            "job_status": job_status,
-            "last_error": last_error,
+            canonicalize_url(unquote(url)): version
+            for url, version in since.items()
+            if isinstance(url, str) and url and isinstance(version, int)
         }
 
+    @staticmethod
+    def _resume(statuses: list[dict], since: dict[str, int]) -> list[dict]:
+        """
+        클라이언트가 가진 버전과 같으면 상태 전체 대신 변경 없음만 응답.
+        문서가 만료되면 버전이 처음부터 다시 시작하므로 크기 비교가 아니라 같은지만 확인
+        """
+        resumed = []
+        for status in statuses:
+            version = status.get("version")
+            if version and since.get(status["url"]) == version:
+                status = {"type": status["type"], "url": status["url"], "version": version, "unchanged": True}
+            resumed.append(status)
+        return resumed
+
+    async def _subscribe(self, urls: list[str], since: dict[str, int]) -> None:
+        await self._add(urls)
+        subscribed = [url for url in urls if url in self.subscriptions]
+        statuses = await self._get_statuses(subscribed) if subscribed else []
+        await self.send_json({
+            "type": "subscribed",
+            "urls": subscribed,
+            "statuses": self._resume(statuses, since),
+        })
+
+    async def _unsubscribe(self, urls: list[str]) -> None:
+        removed = []
+        for url in urls:
+            group_name = self.subscriptions.pop(url, None)
+            if group_name:
+                await self.channel_layer.group_discard(group_name, self.channel_name)
+                removed.append(url)
+        await self.send_json({"type": "unsubscribed", "urls": removed})
+
+    async def on_subscribed(self, urls: list[str]) -> None:
+        pass
+
+    @abstractmethod
+    async def _get_statuses(self, urls: list[str]) -> list[dict]:
+        """URL 목록의 초기 상태를 한 번에 조회"""
+
+
+class ReportStatusConsumer(_URLSubscriptionConsumer):
+    def group_name_for(self, url: str) -> str:
+        return report_status_group_name(url)
+
+    async def on_subscribed(self, urls: list[str]) -> None:
+        # lazy/score_gated 정책에서 보류된 보고서/urlscan은 구독자가 생기면 요청
+        await self._request_followups(urls)
 
-class QrScanStatusConsumer(AsyncJsonWebsocketConsumer):
-    async def connect(self):
-        self.url = ""
-        self.group_name = None
-        await self.accept()
-
-    async def receive_json(self, content, **kwargs):
-        url = content.get("url")
-        if not url or not isinstance(url, str):
-            await self.send_json({"type": "error", "message": "url required"})
-            return
-
-        normalized_url = unquote(url)
-        if not self.url:
-            self.url = normalized_url
-            self.group_name = qr_scan_group_name(self.url)
-            await self.channel_layer.group_add(self.group_name, self.channel_name)
-        elif self.url != normalized_url:
-            await self.send_json({"type": "error", "message": "url mismatch"})
-            return
+    async def report_status(self, event):
+        await self.send_json(event["payload"])
 
-        payload = await self._get_qr_scan_status(self.url)
-        await self.send_json(payload)
+    @database_sync_to_async
+    def _request_followups(self, urls):
+        client = self.scope.get("client") or (None,)
+        for url in urls:
+            request_followups(url, client[0])
 
-    async def disconnect(self, close_code):
-        if self.group_name:
-            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+    @database_sync_to_async
+    def _get_statuses(self, urls):
+        statuses = []
+        for url, doc in zip(urls, status_store.load_many(urls)):
+            statuses.append({
+                "type": "status",
+                "url": url,
+                "is_processed": bool(doc.get("report_ready")),
+                "report_ready": bool(doc.get("report_ready")),
+                "screenshot_ready": bool(doc.get("screenshot_ready")),
+                "screenshot_url": doc.get("screenshot_url"),
+                "screenshot_srcset": doc.get("screenshot_srcset") or {},
+                "job_status": doc.get("report_job_status"),
+                "last_error": doc.get("report_last_error") or "",
+                "version": doc.get("version", 0),
+            })
+        return statuses
+
+
+class QrScanStatusConsumer(_URLSubscriptionConsumer):
+    def group_name_for(self, url: str) -> str:
+        return qr_scan_group_name(url)
 
     async def qr_scan_status(self, event):
         await self.send_json(event["payload"])
 
     @database_sync_to_async
-    def _get_qr_scan_status(self, url):
-        cached_status = cache.get(qr_scan_status_cache_key(url), {})
-        scanned = ScannedURL.objects.filter(url=url).first()
-        report_job = ReportJob.objects.filter(url=url).only("status", "last_error").first()
-        report_job_status = report_job.status if report_job else None
-        report_last_error = report_job.last_error if report_job else ""
-        report_ready = GeneratedReport.objects.filter(url=url, is_processed=True).exists()
-        urlscan = (
-            URLScanIOResponse.objects.filter(url=url)
-            .only("screenshot", "response")
-            .first()
-        )
-        screenshot_url = None
-        screenshot_ready = False
-        if urlscan:
-            if urlscan.screenshot:
-                screenshot_ready = True
-                screenshot_url = urlscan.screenshot.url
-            else:
-                response = urlscan.response or {}
-                task = response.get("task") if response else None
-                screenshot_url = task.get("screenshotURL") if task else None
-                screenshot_ready = bool(screenshot_url)
-
-        scan_lock_key = f"qrscan:scan:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
-        scan_task_running = bool(cache.get(scan_lock_key))
-
-        if scanned:
-            is_processing = False
-            job_status = "SCANNED"
-        else:
-            if scan_task_running:
-                is_processing = True
-                job_status = "SCANNING"
-            else:
-                job_status = cached_status.get("job_status") or "PENDING"
-                is_processing = job_status not in ("SCANNED", "FAILURE")
-
-        payload = {
-            "type": "qr_scan_status",
-            "url": url,
-            "is_processing": is_processing,
-            "job_status": job_status,
-            "report_job_status": report_job_status,
-            "report_ready": report_ready,
-            "screenshot_ready": screenshot_ready,
-            "screenshot_url": screenshot_url,
-        }
-        if report_last_error:
-            payload["report_last_error"] = report_last_error
-        if cached_status.get("error"):
-            payload["error"] = cached_status["error"]
-        if scanned:
-            payload.update(
-                {
-                    "site_name": scanned.site_name,
-                    "threat_type": scanned.threat_type,
-                    "description": scanned.description,
-                    "threat_score": scanned.threat_score,
-                }
-            )
-        return payload
+    def _get_statuses(self, urls):
+        statuses = []
+        for url, doc in zip(urls, status_store.load_many(urls)):
+            payload = {
+                "type": "qr_scan_status",
+                "url": url,
+                "is_processing": doc.get("is_processing", True),
+                "job_status": doc.get("job_status") or "PENDING",
+                "report_job_status": doc.get("report_job_status"),
+                "report_ready": bool(doc.get("report_ready")),
+                "screenshot_ready": bool(doc.get("screenshot_ready")),
+                "screenshot_url": doc.get("screenshot_url"),
+                "screenshot_srcset": doc.get("screenshot_srcset") or {},
+                "version": doc.get("version", 0),
+            }
+            if doc.get("report_last_error"):
+                payload["report_last_error"] = doc["report_last_error"]
+            if doc.get("error"):
+                payload["error"] = doc["error"]
+            if doc.get("job_status") == "SCANNED":
+                payload.update(
+                    {
+                        "site_name": doc.get("site_name"),
+                        "threat_type": doc.get("threat_type"),
+                        "description": doc.get("description"),
+                        "threat_score": doc.get("threat_score"),
+                    }
+                )
+            statuses.append(payload)
+        return statuses
@@ -0,0 +1,69 @@
+import logging
+import uuid
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# 소유 토큰이 일치할 때만 해제/연장하여 만료 후 다른 프로세스가 획득한 락을 건드리지 않도록 함
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_REFRESH_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def scan_lock_name(key: str) -> str:
+    return f"qrscan:scan:{key}"
+
+
+def urlscan_lock_name(key: str) -> str:
+    return f"urlscan:queue:{key}"
+
+
+def acquire(name: str, timeout: int = 300) -> str | None:
+    """락 획득 시 소유 토큰을, 이미 다른 소유자가 있으면 None을 반환한다. timeout(초) 이후 자동 만료."""
+    token = uuid.uuid4().hex
+    if get_redis().set(name, token, nx=True, ex=max(1, int(timeout))):
+        return token
+    return None
+
+
+def release(name: str, token: str | None) -> bool:
+    if not token:
+        return False
+    try:
+        return bool(get_redis().eval(_RELEASE_SCRIPT, 1, name, token))
+    except Exception:
+        # 해제 실패 시에도 timeout 경과 후 자동 만료됨
+        logger.exception("Failed to release lock. name=%s", name)
+        return False
+
+
+def refresh(name: str, token: str | None, timeout: int = 300) -> bool:
+    if not token:
+        return False
+    return bool(get_redis().eval(_REFRESH_SCRIPT, 1, name, token, max(1, int(timeout))))
+
+
+def is_locked(name: str) -> bool:
+    return bool(get_redis().exists(name))
+
+
+def are_locked(names: list[str]) -> list[bool]:
+    """여러 락의 점유 여부를 한 번의 왕복으로 조회"""
+    if not names:
+        return []
+    pipe = get_redis().pipeline(transaction=False)
+    for name in names:
+        pipe.exists(name)
+    return [bool(value) for value in pipe.execute()]
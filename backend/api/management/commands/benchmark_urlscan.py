@@ -0,0 +1,232 @@
+import heapq
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import clients, tasks
+from api.models import URLScanIOResponse
+
+_BENCH_URL_PREFIX = "https://bench-urlscan.invalid/"
+
+
+class _StubURLScanClient:
+    """제출 후 scan_seconds가 지나야 결과를 돌려주는 urlscan 대역. 동시에 진행 중인 스캔 수의 최댓값을 기록"""
+
+    def __init__(self, scan_seconds: float):
+        self.scan_seconds = scan_seconds
+        self._submitted: dict[str, float] = {}
+        self._done: set[str] = set()
+        self._lock = threading.Lock()
+        self.peak_in_flight = 0
+
+    def scan_url(self, url: str) -> dict:
+        scan_id = str(uuid.uuid4())
+        with self._lock:
+            self._submitted[scan_id] = time.monotonic()
+            self.peak_in_flight = max(self.peak_in_flight, len(self._submitted) - len(self._done))
+        return {"uuid": scan_id}
+
+    def get_result(self, scan_id: str) -> dict | None:
+        with self._lock:
+            if time.monotonic() - self._submitted[scan_id] < self.scan_seconds:
+                return None
+            self._done.add(scan_id)
+        return {"task": {"uuid": scan_id}, "page": {}}
+
+    def screenshot(self, scan_id: str):
+        return None
+
+
+class _ScaledWorker:
+    """countdown을 time_scale 배로 줄여 실행하는 스레드 수 고정 worker (Celery thread pool 대역)"""
+
+    def __init__(self, threads: int, time_scale: float):
+        self.time_scale = time_scale
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self._queue: list = []
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.running = 0
+        self.busy_seconds = 0.0
+
+    def apply_async(self, task, kwargs: dict, countdown: float = 0) -> None:
+        with self._lock:
+            self._seq += 1
+            heapq.heappush(self._queue, (time.monotonic() + countdown * self.time_scale, self._seq, task, kwargs))
+
+    def _run(self, task, kwargs: dict) -> None:
+        started = time.monotonic()
+        try:
+            task.apply(kwargs=kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.busy_seconds += time.monotonic() - started
+
+    def run_until_idle(self) -> None:
+        while True:
+            with self._lock:
+                if not self._queue and not self.running:
+                    break
+                due = self._queue and self._queue[0][0] <= time.monotonic()
+                if due:
+                    _, _, task, kwargs = heapq.heappop(self._queue)
+                    self.running += 1
+            if due:
+                self.executor.submit(self._run, task, kwargs)
+            else:
+                time.sleep(0.005)
+        self.executor.shutdown()
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # keep-alive 연결에서 헤더/본문 분할 전송 시 지연 ACK(약 40ms)가 측정에 섞이지 않도록 함
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with _CountingHandler.lock:
+            _CountingHandler.connections += 1
+
+    def do_GET(self):
+        body = b'{"task": {}, "page": {}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "urlscan 대역으로 결과 조회 방식(기존 sleep 대기 vs 재예약 poll task)과 "
+        "클라이언트 생성 방식(호출마다 생성 vs 프로세스 공유 registry)을 비교합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scans", type=int, default=300, help="동시에 요청할 스캔 수 (기본 300)")
+        parser.add_argument("--threads", type=int, default=4, help="worker 스레드 수 (기본 4)")
+        parser.add_argument("--scan-seconds", type=float, default=20, help="urlscan이 결과를 만드는 데 걸리는 시간(초) (기본 20)")
+        parser.add_argument(
+            "--time-scale",
+            type=float,
+            default=0.05,
+            help="대기/countdown/스캔 시간에 곱할 배율. 0.05면 20초 스캔을 1초로 줄여 실행 (기본 0.05)",
+        )
+        parser.add_argument("--client-calls", type=int, default=500, help="클라이언트 비교 시 요청 수 (기본 500)")
+
+    def _blocking(self, options) -> dict:
+        """기존 urlscanio_request: 제출 후 poll_delay 동안 sleep, 이후 sleep 간격으로 결과 조회"""
+        scale = options["time_scale"]
+        client = _StubURLScanClient(options["scan_seconds"] * scale)
+        poll_delay = int(getattr(settings, "URLSCAN_POLL_DELAY", 10)) * scale
+        interval = int(getattr(settings, "URLSCAN_POLL_INTERVAL", 2)) * scale
+
+        def scan(i: int) -> None:
+            scan_id = client.scan_url(f"{_BENCH_URL_PREFIX}{i}")["uuid"]
+            time.sleep(poll_delay)
+            while client.get_result(scan_id) is None:
+                time.sleep(interval)
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+            list(executor.map(scan, range(options["scans"])))
+        return {"elapsed": time.monotonic() - started, "peak": client.peak_in_flight, "busy": None}
+
+    def _state_machine(self, options) -> dict:
+        """urlscanio_task(제출) -> urlscanio_poll_task(조회 1회 후 countdown으로 재예약)"""
+        scale = options["time_scale"]
+        client = _StubURLScanClient(options["scan_seconds"] * scale)
+        worker = _ScaledWorker(options["threads"], scale)
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch("api.services.get_urlscan_client", return_value=client))
+            stack.enter_context(mock.patch("api.tasks.notify_urlscan_status"))
+            for task in (tasks.urlscanio_task, tasks.urlscanio_poll_task):
+                stack.enter_context(mock.patch.object(
+                    task, "apply_async",
+                    lambda kwargs, countdown=0, _task=task: worker.apply_async(_task, kwargs, countdown),
+                ))
+            started = time.monotonic()
+            for i in range(options["scans"]):
+                worker.apply_async(tasks.urlscanio_task, {"ip": None, "url": f"{_BENCH_URL_PREFIX}{i}"})
+            worker.run_until_idle()
+            elapsed = time.monotonic() - started
+        completed = URLScanIOResponse.objects.filter(
+            url__startswith=_BENCH_URL_PREFIX, status=URLScanIOResponse.Status.SUCCESS,
+        ).count()
+        return {"elapsed": elapsed, "peak": client.peak_in_flight, "busy": worker.busy_seconds, "completed": completed}
+
+    def _clients(self, calls: int) -> list[tuple[str, float, int]]:
+        """로컬 HTTP 서버에 결과 조회를 반복하며 새로 연 연결 수와 소요 시간을 비교"""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _CountingHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        shared = clients.URLScanIOClient(session=clients._build_http_session())
+        shared.base_url = base_url
+
+        def per_call():
+            client = clients.URLScanIOClient(session=clients._build_http_session())
+            client.base_url = base_url
+            return client
+
+        rows = []
+        with ExitStack() as stack:
+            # 전송 비용만 비교하도록 요청 한도/차단기(Redis)는 제외
+            stack.enter_context(mock.patch("api.clients.rate_limit.acquire"))
+            for name in ("check", "record_success", "record_failure"):
+                stack.enter_context(mock.patch(f"api.clients.circuit_breaker.{name}"))
+            for label, factory in (("호출마다 생성", per_call), ("공유 registry", lambda: shared)):
+                _CountingHandler.connections = 0
+                started = time.monotonic()
+                for _ in range(calls):
+                    factory().get_result(str(uuid.uuid4()))
+                rows.append((label, time.monotonic() - started, _CountingHandler.connections))
+        server.shutdown()
+        return rows
+
+    def handle(self, *args, **options):
+        URLScanIOResponse.objects.filter(url__startswith=_BENCH_URL_PREFIX).delete()
+        try:
+            before = self._blocking(options)
+            after = self._state_machine(options)
+        finally:
+            URLScanIOResponse.objects.filter(url__startswith=_BENCH_URL_PREFIX).delete()
+
+        scale = options["time_scale"]
+        lines = [
+            f"스캔 {options['scans']}건, worker {options['threads']}스레드, 스캔 {options['scan_seconds']:.0f}초 "
+            f"(실행 배율 {scale}, 아래 시간은 배율을 되돌린 값)",
+        ]
+        for label, result in (("기존 sleep 대기", before), ("poll task 재예약", after)):
+            elapsed = result["elapsed"] / scale
+            line = (
+                f"  {label}: 전체 {elapsed:.0f}s, 처리량 {options['scans'] / elapsed * 60:.0f}건/분, "
+                f"동시 진행 최대 {result['peak']}건"
+            )
+            if result["busy"] is not None:
+                line += (
+                    f", worker 스레드 사용률 {result['busy'] / (result['elapsed'] * options['threads']) * 100:.1f}%"
+                    f", 완료 {result['completed']}건"
+                )
+            lines.append(line)
+
+        lines.append(f"결과 조회 {options['client_calls']}회 (로컬 HTTP 서버)")
+        for label, elapsed, connections in self._clients(max(1, options["client_calls"])):
+            lines.append(
+                f"  {label}: {elapsed * 1000:.0f}ms (요청당 {elapsed / options['client_calls'] * 1000:.2f}ms), "
+                f"새 연결 {connections}개"
+            )
+        self.stdout.write(self.style.SUCCESS("\n".join(lines)))
@@ -0,0 +1,191 @@
+import asyncio
+import random
+import statistics
+import time
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import path
+
+from api import status_store, verdict_cache
+from api.canonical import url_hash
+from api.models import GeneratedReport, ReportJob, ScannedURL, URLScanIOResponse
+from api.redis_client import get_redis
+from api.views import GenerateReportView, QrScanView
+
+_BENCH_URL_PREFIX = "https://bench-views.invalid/"
+
+
+def _through_sync(view):
+    """async view를 sync view로 감싸 Django가 sync 스레드(thread_sensitive)에서 실행하게 함 (비교 기준)"""
+
+    def wrapper(request, *args, **kwargs):
+        return async_to_sync(view)(request, *args, **kwargs)
+
+    return wrapper
+
+
+# 측정 중에만 ROOT_URLCONF로 사용. 같은 view를 async로 직접 실행하는 경로와 sync 스레드를 거치는 경로를 함께 노출
+urlpatterns = [
+    path("async/qr-scan/", QrScanView.as_view()),
+    path("async/report/", GenerateReportView.as_view()),
+    path("sync/qr-scan/", _through_sync(QrScanView.as_view())),
+    path("sync/report/", _through_sync(GenerateReportView.as_view())),
+]
+
+
+async def _request(app, path_: str, query: dict) -> tuple[int, float]:
+    """ASGI app에 GET 요청 1건을 보내고 (status, 소요 시간)을 반환 (네트워크/HTTP 파서 없이 view까지의 비용만 측정)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path_,
+        "raw_path": path_.encode(),
+        "query_string": urlencode(query).encode(),
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    done = asyncio.Event()
+    received = {"status": 0, "body": False}
+
+    async def receive():
+        if not received["body"]:
+            received["body"] = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            received["status"] = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    done.set()
+    return received["status"], time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "판정/보고서가 저장된 URL로 /api/qr-scan/, /api/report/ view를 동시에 호출하여 "
+        "async로 직접 실행할 때와 sync 스레드를 거칠 때의 처리량/지연 시간을 비교합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--urls", type=int, default=500, help="판정/보고서를 미리 저장할 URL 수 (기본 500)")
+        parser.add_argument("--requests", type=int, default=2000, help="view별/방식별 요청 수 (기본 2000)")
+        parser.add_argument("--concurrency", type=int, default=100, help="동시에 보낼 요청 수 (기본 100)")
+
+    def _seed(self, count: int) -> list[str]:
+        urls = [f"{_BENCH_URL_PREFIX}{i}" for i in range(count)]
+        # bulk_create는 save()를 거치지 않으므로 url_hash/스크린샷 상태를 직접 채움
+        ScannedURL.objects.bulk_create(
+            ScannedURL(
+                url=url, url_hash=url_hash(url), site_name="bench", threat_type="안전",
+                description="benchmark", threat_score=1, model="benchmark",
+            )
+            for url in urls
+        )
+        reports = GeneratedReport.objects.bulk_create(
+            GeneratedReport(
+                url=url, url_hash=url_hash(url), site_name="bench", threat_type="안전",
+                description="benchmark", probability=1, reason="benchmark", depth={}, is_processed=True,
+            )
+            for url in urls
+        )
+        ReportJob.objects.bulk_create(
+            ReportJob(url=report.url, url_hash=report.url_hash, status=ReportJob.Status.SUCCESS, generated_report=report)
+            for report in reports
+        )
+        URLScanIOResponse.objects.bulk_create(
+            URLScanIOResponse(
+                url=url, url_hash=url_hash(url), status=URLScanIOResponse.Status.SUCCESS,
+                screenshot="screenshots/benchmark.png",
+                screenshot_state=URLScanIOResponse.ScreenshotState.STORED,
+            )
+            for url in urls
+        )
+        return urls
+
+    def _cleanup(self) -> None:
+        keys = list(ScannedURL.objects.filter(url__startswith=_BENCH_URL_PREFIX).values_list("url_hash", flat=True))
+        for model in (ReportJob, GeneratedReport, ScannedURL, URLScanIOResponse):
+            model.objects.filter(url__startswith=_BENCH_URL_PREFIX).delete()
+        for key in keys:
+            verdict_cache.invalidate(key)
+        if keys:
+            get_redis().delete(*(status_store.status_key(key) for key in keys))
+
+    async def _run(self, app, path_: str, urls: list[str], total: int, concurrency: int) -> dict:
+        targets = [random.choice(urls) for _ in range(total)]
+        latencies = []
+        errors = 0
+        index = 0
+
+        async def worker():
+            nonlocal index, errors
+            while index < len(targets):
+                url = targets[index]
+                index += 1
+                status, elapsed = await _request(app, path_, {"url": url})
+                latencies.append(elapsed)
+                if status != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        elapsed = time.perf_counter() - started
+        quantiles = statistics.quantiles(latencies, n=100)
+        return {
+            "rps": total / elapsed,
+            "p50": quantiles[49] * 1000,
+            "p95": quantiles[94] * 1000,
+            "p99": quantiles[98] * 1000,
+            "errors": errors,
+        }
+
+    async def _benchmark(self, urls: list[str], options) -> list[tuple[str, str, dict]]:
+        app = get_asgi_application()
+        rows = []
+        for endpoint in ("qr-scan", "report"):
+            # 상태 문서/2차 캐시를 채운 뒤 측정 (두 방식 모두 같은 조건에서 시작)
+            for url in urls:
+                await _request(app, f"/async/{endpoint}/", {"url": url})
+            for mode in ("async", "sync"):
+                verdict_cache._local = verdict_cache._LocalLRU(verdict_cache._local.max_size, verdict_cache._local.ttl)
+                result = await self._run(
+                    app, f"/{mode}/{endpoint}/", urls, options["requests"], options["concurrency"],
+                )
+                rows.append((endpoint, mode, result))
+        return rows
+
+    def handle(self, *args, **options):
+        self._cleanup()
+        try:
+            urls = self._seed(max(1, options["urls"]))
+            with override_settings(ROOT_URLCONF=__name__):
+                rows = asyncio.run(self._benchmark(urls, options))
+        finally:
+            self._cleanup()
+
+        lines = [
+            f"URL {options['urls']}개, view/방식별 요청 {options['requests']}건, 동시 요청 {options['concurrency']}개 "
+            "(ASGI app 직접 호출, 네트워크 제외)",
+        ]
+        labels = {"async": "async 직접 실행", "sync": "sync 스레드 경유"}
+        for endpoint, mode, result in rows:
+            lines.append(
+                f"  /api/{endpoint}/ {labels[mode]}: {result['rps']:.0f} req/s, "
+                f"p50 {result['p50']:.1f}ms, p95 {result['p95']:.1f}ms, p99 {result['p99']:.1f}ms, "
+                f"오류 {result['errors']}건"
+            )
+        self.stdout.write(self.style.SUCCESS("\n".join(lines)))
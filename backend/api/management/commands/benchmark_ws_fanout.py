@@ -0,0 +1,80 @@
+import asyncio
+import random
+import time
+
+from channels.layers import InMemoryChannelLayer
+from django.core.management.base import BaseCommand, CommandError
+
+from api import ws
+
+_BENCH_URL_PREFIX = "https://bench-ws.invalid/"
+# 변경 전 모든 보고서 페이지가 구독하던 전역 그룹
+_GLOBAL_GROUP = "report_status"
+
+
+def _parse_clients(value: str) -> list[int]:
+    try:
+        counts = [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise CommandError(f"--clients 값이 올바르지 않습니다: {value}")
+    if not counts or min(counts) < 1:
+        raise CommandError(f"--clients 값이 올바르지 않습니다: {value}")
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        "보고서 상태 알림을 전역 그룹으로 broadcast할 때와 URL별 그룹으로 보낼 때의 "
+        "group_send 1건당 소요 시간과 전달 수를 InMemoryChannelLayer로 비교합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clients", default="100,1000,10000", help="접속한 보고서 페이지 수, 쉼표로 구분 (기본 100,1000,10000)",
+        )
+        parser.add_argument("--events", type=int, default=200, help="보낼 상태 알림 수 (기본 200)")
+        parser.add_argument("--pages-per-url", type=int, default=2, help="같은 URL을 보고 있는 페이지 수 (기본 2)")
+
+    async def _run(self, clients: int, events: int, pages_per_url: int, per_url: bool) -> tuple[float, float]:
+        """(알림 1건당 group_send 평균 소요 시간(초), 알림 1건당 전달 수)"""
+        layer = InMemoryChannelLayer(capacity=events + 1)
+        # 만료 메시지 정리는 InMemoryChannelLayer에만 있는 비용(Redis layer에는 없음)이므로 측정에서 제외
+        layer._clean_expired = lambda: None
+        urls = [f"{_BENCH_URL_PREFIX}{i}" for i in range(max(1, clients // pages_per_url))]
+        for i in range(clients):
+            group = ws.report_status_group_name(urls[i % len(urls)]) if per_url else _GLOBAL_GROUP
+            await layer.group_add(group, await layer.new_channel())
+
+        elapsed = 0.0
+        deliveries = 0
+        for _ in range(events):
+            url = random.choice(urls)
+            group = ws.report_status_group_name(url) if per_url else _GLOBAL_GROUP
+            event = ws._report_event(url, {"is_processed": False, "job_status": "STARTED"}, 1)
+            started = time.perf_counter()
+            await layer.group_send(group, event)
+            elapsed += time.perf_counter() - started
+            # 다음 알림 전에 받은 메시지를 비워 큐 크기가 측정에 섞이지 않도록 함 (측정 시간 제외)
+            for queue in layer.channels.values():
+                deliveries += queue.qsize()
+            layer.channels.clear()
+        return elapsed / events, deliveries / events
+
+    def handle(self, *args, **options):
+        clients_list = _parse_clients(options["clients"])
+        events = max(1, options["events"])
+        pages_per_url = max(1, options["pages_per_url"])
+
+        lines = [
+            f"InMemoryChannelLayer, 알림 {events}건, URL당 보고서 페이지 {pages_per_url}개 "
+            "(만료 메시지 정리 제외, 시간은 group_send 1건당 평균)",
+            f"  {'페이지 수':>10}  {'전역 그룹':>28}  {'URL별 그룹':>28}",
+        ]
+        for clients in clients_list:
+            columns = []
+            for per_url in (False, True):
+                seconds, delivered = asyncio.run(self._run(clients, events, pages_per_url, per_url))
+                label = f"{seconds * 1000:.2f} ms" if seconds >= 0.001 else f"{seconds * 1_000_000:.0f} us"
+                columns.append(f"{label} / 전달 {delivered:,.0f}건")
+            lines.append(f"  {clients:>10,}  {columns[0]:>28}  {columns[1]:>28}")
+        self.stdout.write(self.style.SUCCESS("\n".join(lines)))
@@ -0,0 +1,125 @@
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from api import screenshots, status_store
+from api.models import ScreenshotBlob, URLScanIOResponse
+
+
+class Command(BaseCommand):
+    help = "저장된 스크린샷의 WebP/JPEG 축소본을 만들고, 원본 대비 전송량을 비교합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="축소본이 이미 있는 스크린샷도 다시 생성")
+        parser.add_argument("--compress-originals", action="store_true", help="원본 PNG도 무손실 재압축하여 새 이름으로 교체")
+        parser.add_argument("--limit", type=int, default=0, help="처리할 최대 건수 (기본 0: 전체)")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--benchmark-only",
+            action="store_true",
+            help="생성하지 않고 현재 축소본 기준으로 전송량만 비교",
+        )
+        parser.add_argument("--width", type=int, default=640, help="비교에 사용할 이미지 너비(px, CSS 너비 x DPR) (기본 640)")
+        parser.add_argument("--kbps", type=int, default=1600, help="예상 전송 시간 계산용 대역폭(kbps) (기본 1600)")
+
+    def _rows(self, regenerate: bool, batch_size: int):
+        queryset = ScreenshotBlob.objects.all()
+        if not regenerate:
+            queryset = queryset.filter(variants={})
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id).order_by("id")[:batch_size])
+            if not batch:
+                return
+            yield from batch
+            last_id = batch[-1].id
+
+    @staticmethod
+    def _size(name: str) -> int:
+        try:
+            return default_storage.size(name)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _served_variant(names: dict, width: int) -> str | None:
+        """srcset에서 브라우저가 고를 파일: width 이상 중 가장 작은 것, 없으면 가장 큰 것"""
+        if not names:
+            return None
+        widths = sorted(int(w) for w in names)
+        chosen = next((w for w in widths if w >= width), widths[-1])
+        return names[str(chosen)]
+
+    def _generate(self, blob: ScreenshotBlob, compress: bool, counts: dict) -> None:
+        previous = set(screenshots.blob_files(blob))
+        with default_storage.open(blob.name, "rb") as f:
+            content = f.read()
+        if compress:
+            compressed = screenshots.compress_original(content)
+            if compressed:
+                counts["compressed_saved"] += len(content) - len(compressed)
+                screenshots.replace_original(blob, compressed)
+                content = compressed
+        blob.variants = screenshots.build_variants(screenshots.blob_name(blob.sha256, ""), content)
+        # 이름이 바뀐 원본/축소본(재압축, 인코딩 설정 변경)은 --gc에서 유예 기간 후 삭제하도록 기록만 함
+        replaced = screenshots.retire_files(blob, previous)
+        blob.save(update_fields=["variants", "retired_files", "updated_at"])
+        blob.scans.update(screenshot_variants=blob.variants)
+        if replaced:
+            # 상태 문서의 스크린샷 URL/srcset을 DB 기준으로 다시 만듦
+            for key in blob.scans.values_list("url_hash", flat=True):
+                status_store.invalidate(key)
+        counts["generated"] += 1
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        counts = {"generated": 0, "failed": 0, "compressed_saved": 0}
+        bytes_original = 0
+        bytes_served = {"webp": 0, "jpeg": 0}
+        measured = 0
+        regenerate = options["all"] or options["benchmark_only"]
+        rows = self._rows(regenerate, max(1, options["batch_size"]))
+
+        for blob in rows:
+            if options["limit"] and measured >= options["limit"]:
+                break
+            if not options["benchmark_only"]:
+                try:
+                    self._generate(blob, options["compress_originals"], counts)
+                except Exception as e:
+                    counts["failed"] += 1
+                    self.stderr.write(f"축소본 생성 실패: sha256={blob.sha256} error={e}")
+                    continue
+            variants = blob.variants or {}
+            if not variants:
+                continue
+            measured += 1
+            original = self._size(blob.name)
+            bytes_original += original
+            for fmt in bytes_served:
+                name = self._served_variant(variants.get(fmt) or {}, options["width"])
+                bytes_served[fmt] += self._size(name) if name else original
+
+        bytes_per_second = max(1, options["kbps"]) * 1000 / 8
+        lines = [
+            f"축소본 생성 {counts['generated']}건, 실패 {counts['failed']}건, "
+            f"원본 재압축 절감 {counts['compressed_saved'] / 1024:.1f}KB ({time.monotonic() - started:.1f}s)",
+        ]
+        legacy = URLScanIOResponse.objects.filter(
+            screenshot_state=URLScanIOResponse.ScreenshotState.STORED, screenshot_blob__isnull=True,
+        ).count()
+        if legacy:
+            lines.append(f"blob으로 옮기지 않은 스크린샷 {legacy}건은 migrate_screenshot_blobs 실행 후 처리됩니다.")
+        if measured:
+            lines.append(
+                f"비교 대상 {measured}건 (이미지 너비 {options['width']}px). 전송 시간은 파일 크기를 "
+                f"{options['kbps']}kbps로 나눈 예상값이며 실제 reports.html 로드 시간을 측정한 값이 아닙니다."
+            )
+            for label, total in (("원본", bytes_original), ("WebP", bytes_served["webp"]), ("JPEG", bytes_served["jpeg"])):
+                ratio = total / bytes_original * 100 if bytes_original else 0
+                lines.append(
+                    f"  {label}: 평균 {total / measured / 1024:.1f}KB ({ratio:.0f}%), "
+                    f"예상 전송 시간 {total / measured / bytes_per_second * 1000:.0f}ms"
+                )
+        self.stdout.write(self.style.SUCCESS("\n".join(lines)))
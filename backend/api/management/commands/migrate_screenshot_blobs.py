@@ -0,0 +1,151 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from api import screenshots
+from api.models import ScreenshotBlob, URLScanIOResponse
+
+
+class Command(BaseCommand):
+    help = "스크린샷을 내용(SHA-256) 기준 blob 저장소로 옮기고, 참조가 없는 blob을 정리하여 회수한 용량을 출력합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--limit", type=int, default=0, help="옮길 최대 건수 (기본 0: 전체)")
+        parser.add_argument("--recount", action="store_true", help="blob 참조 수를 실제 참조 행 수로 다시 계산")
+        parser.add_argument("--gc", action="store_true", help="참조 수가 0인 blob과 파일, 교체된 이전 파일 삭제")
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=24,
+            help="--gc 시 참조 수가 0이 되거나 교체된 뒤 이 시간(시간)이 지난 blob/파일만 삭제 (기본 24)",
+        )
+
+    @staticmethod
+    def _size(name: str) -> int:
+        try:
+            return default_storage.size(name)
+        except OSError:
+            return 0
+
+    def _legacy_rows(self, batch_size: int):
+        queryset = URLScanIOResponse.objects.filter(
+            screenshot_state=URLScanIOResponse.ScreenshotState.STORED, screenshot_blob__isnull=True,
+        )
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id).order_by("id").defer("response")[:batch_size])
+            if not batch:
+                return
+            yield from batch
+            last_id = batch[-1].id
+
+    def _migrate(self, options, counts: dict) -> None:
+        for scanned in self._legacy_rows(max(1, options["batch_size"])):
+            if options["limit"] and counts["migrated"] >= options["limit"]:
+                break
+            old_files = [scanned.screenshot.name] + [
+                name for names in (scanned.screenshot_variants or {}).values() for name in names.values()
+            ]
+            try:
+                with scanned.screenshot.open("rb") as f:
+                    content = f.read()
+            except OSError:
+                counts["missing"] += 1
+                self.stderr.write(f"스크린샷 파일 없음: url={scanned.url} name={scanned.screenshot.name}")
+                continue
+
+            screenshots.store_screenshot(scanned, content)
+            blob = scanned.screenshot_blob
+            if blob.refcount == 1:
+                counts["written_bytes"] += self._size(blob.name)
+                counts["variant_bytes"] += sum(self._size(name) for name in screenshots.blob_files(blob)[1:])
+            else:
+                counts["deduplicated"] += 1
+
+            for name in old_files:
+                if name and not name.startswith(screenshots.BLOB_PREFIX):
+                    counts["deleted_bytes"] += self._size(name)
+                    default_storage.delete(name)
+            counts["migrated"] += 1
+
+    def _recount(self, counts: dict) -> None:
+        for blob in ScreenshotBlob.objects.annotate(actual=Count("scans")).iterator():
+            if blob.refcount != blob.actual:
+                ScreenshotBlob.objects.filter(id=blob.id).update(refcount=blob.actual, updated_at=timezone.now())
+                counts["recounted"] += 1
+
+    def _gc_retired(self, cutoff, counts: dict) -> None:
+        """재압축/축소본 재생성으로 교체된 이전 파일 중 유예 기간이 지난 것만 삭제"""
+        for blob_id in list(ScreenshotBlob.objects.exclude(retired_files={}).values_list("id", flat=True)):
+            with transaction.atomic():
+                blob = ScreenshotBlob.objects.select_for_update().filter(id=blob_id).first()
+                if not blob:
+                    continue
+                current = set(screenshots.blob_files(blob))
+                kept = {}
+                for name, retired_at in (blob.retired_files or {}).items():
+                    if name in current:
+                        continue
+                    if datetime.fromisoformat(retired_at) >= cutoff:
+                        kept[name] = retired_at
+                        continue
+                    counts["deleted_bytes"] += self._size(name)
+                    default_storage.delete(name)
+                    counts["retired_deleted"] += 1
+                if kept != blob.retired_files:
+                    # updated_at은 참조 수가 0이 된 시각으로 쓰이므로 바꾸지 않음
+                    ScreenshotBlob.objects.filter(id=blob.id).update(retired_files=kept)
+
+    def _gc(self, grace_hours: int, counts: dict) -> None:
+        cutoff = timezone.now() - timedelta(hours=max(0, grace_hours))
+        self._gc_retired(cutoff, counts)
+        candidates = ScreenshotBlob.objects.filter(refcount=0, updated_at__lt=cutoff).values_list("id", flat=True)
+        for blob_id in list(candidates):
+            with transaction.atomic():
+                # 잠근 뒤 다시 확인 (그 사이 같은 내용의 스크린샷이 저장되어 참조가 늘었을 수 있음)
+                blob = ScreenshotBlob.objects.select_for_update().filter(id=blob_id, refcount=0).first()
+                if not blob or blob.scans.exists():
+                    continue
+                for name in [*screenshots.blob_files(blob), *(blob.retired_files or {})]:
+                    counts["deleted_bytes"] += self._size(name)
+                    default_storage.delete(name)
+                blob.delete()
+                counts["collected"] += 1
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        counts = {
+            "migrated": 0,
+            "deduplicated": 0,
+            "missing": 0,
+            "recounted": 0,
+            "collected": 0,
+            "retired_deleted": 0,
+            "written_bytes": 0,
+            "variant_bytes": 0,
+            "deleted_bytes": 0,
+        }
+        self._migrate(options, counts)
+        if options["recount"]:
+            self._recount(counts)
+        if options["gc"]:
+            self._gc(options["grace_hours"], counts)
+
+        # 이전 전에 없던 축소본을 새로 만든 용량은 회수량에서 제외하고 따로 표시
+        reclaimed = counts["deleted_bytes"] - counts["written_bytes"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"blob 이전 {counts['migrated']}건(기존 blob 재사용 {counts['deduplicated']}건, 파일 없음 {counts['missing']}건), "
+                f"참조 수 보정 {counts['recounted']}건, 삭제한 blob {counts['collected']}건, "
+                f"교체된 이전 파일 삭제 {counts['retired_deleted']}건\n"
+                f"삭제 {counts['deleted_bytes'] / 1024:.1f}KB, 새로 저장 {counts['written_bytes'] / 1024:.1f}KB"
+                f"(+ 축소본 {counts['variant_bytes'] / 1024:.1f}KB), "
+                f"회수 {reclaimed / 1024:.1f}KB ({time.monotonic() - started:.1f}s)"
+            )
+        )
@@ -0,0 +1,26 @@
+import logging
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# 모든 worker/웹 프로세스가 공유하는 누적 카운터 (Redis hash 하나에 필드별로 저장)
+_COUNTERS_KEY = "metrics:counters"
+
+
+def incr(name: str, amount: int = 1) -> None:
+    try:
+        get_redis().hincrby(_COUNTERS_KEY, name, amount)
+    except Exception:
+        # 지표 기록 실패가 요청 처리에 영향을 주지 않도록 함
+        logger.exception("Failed to increment metric. name=%s", name)
+
+
+def snapshot() -> dict:
+    try:
+        raw = get_redis().hgetall(_COUNTERS_KEY)
+    except Exception:
+        logger.exception("Failed to read metrics.")
+        return {}
+    return {name.decode(): int(value) for name, value in sorted(raw.items())}
@@ -1,16 +1,36 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import HttpResponse
 
 
 class SimpleCorsMiddleware:
+    # async view가 sync 스레드 풀을 거치지 않도록 sync/async 모두 지원
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
         if request.method == "OPTIONS":
             response = HttpResponse(status=204)
         else:
             response = self.get_response(request)
+        return self._add_headers(response)
+
+    async def __acall__(self, request):
+        if request.method == "OPTIONS":
+            response = HttpResponse(status=204)
+        else:
+            response = await self.get_response(request)
+        return self._add_headers(response)
 
+    @staticmethod
+    def _add_headers(response):
         response["Access-Control-Allow-Origin"] = "*"
         response["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
         response["Access-Control-Allow-Headers"] = "Content-Type, Authorization, X-Requested-With"
@@ -0,0 +1,136 @@
+import hashlib
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+from django.db import migrations, models
+
+
+_URL_KEYED_MODELS = ("URLScanIOResponse", "ScannedURL", "GeneratedReport", "ReportJob")
+
+# 이 마이그레이션 작성 시점의 api.canonical 기본 규칙 사본. 이후 코드나 URL_CANONICAL_RULES 설정이 바뀌어도
+# 마이그레이션 결과가 달라지지 않도록 고정한다.
+_TRACKING_PARAMS = (
+    "utm_*", "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "napm",
+)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return any(
+        name.startswith(pattern[:-1]) if pattern.endswith("*") else name == pattern
+        for pattern in _TRACKING_PARAMS
+    )
+
+
+def _canonicalize_url(url: str) -> str:
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    hostinfo = parts.netloc.rpartition("@")[2]
+    if hostinfo.startswith("["):
+        host = hostinfo[: hostinfo.find("]") + 1]
+    else:
+        host = hostinfo.split(":", 1)[0]
+    host = host.lower().rstrip(".")
+    if not host.isascii():
+        try:
+            host = host.encode("idna").decode("ascii")
+        except UnicodeError:
+            pass
+
+    userinfo = parts.netloc.rpartition("@")[0]
+    netloc = f"{userinfo}@{host}" if userinfo else host
+    if port is not None and _DEFAULT_PORTS[scheme] != port:
+        netloc = f"{netloc}:{port}"
+
+    pieces = [
+        piece for piece in parts.query.split("&")
+        if piece and not _is_tracking_param(unquote_plus(piece.split("=", 1)[0]))
+    ]
+    return urlunsplit((scheme, netloc, parts.path or "/", "&".join(sorted(pieces)), ""))
+
+
+def _url_hash(url: str) -> str:
+    return hashlib.sha256(_canonicalize_url(url).encode("utf-8")).hexdigest()
+
+
+def _survivor_rank(obj):
+    # 관리자 수정 > 완료된 보고서/작업 > 스크린샷 보유 > 최근 갱신 순으로 남길 레코드를 고름
+    return (
+        bool(getattr(obj, "is_edit", False)),
+        bool(getattr(obj, "is_processed", False)),
+        getattr(obj, "status", None) == "SUCCESS",
+        bool(getattr(obj, "screenshot", None)),
+        obj.updated_at,
+        obj.id,
+    )
+
+
+def _merge_duplicates(apps, model_name: str, survivor, duplicates) -> None:
+    """정규화 후 같은 URL이 되는 중복 레코드를 하나로 합친다. 수정 이력/보고서 작업 연결은 남길 레코드로 옮긴 뒤 삭제"""
+    duplicate_ids = [obj.id for obj in duplicates]
+    if model_name == "ScannedURL":
+        apps.get_model("api", "ScannedURLEditLog").objects.filter(
+            scanned_url_id__in=duplicate_ids,
+        ).update(scanned_url_id=survivor.id)
+    elif model_name == "GeneratedReport":
+        apps.get_model("api", "GeneratedReportEditLog").objects.filter(
+            generated_report_id__in=duplicate_ids,
+        ).update(generated_report_id=survivor.id)
+        report_job = apps.get_model("api", "ReportJob")
+        if not report_job.objects.filter(generated_report_id=survivor.id).exists():
+            job = report_job.objects.filter(generated_report_id__in=duplicate_ids).order_by("-updated_at").first()
+            if job:
+                job.generated_report_id = survivor.id
+                job.save(update_fields=["generated_report"])
+    apps.get_model("api", model_name).objects.filter(id__in=duplicate_ids).delete()
+
+
+def backfill_url_hash(apps, schema_editor):
+    for model_name in _URL_KEYED_MODELS:
+        model = apps.get_model("api", model_name)
+        groups = {}
+        for obj in model.objects.order_by("id").iterator():
+            groups.setdefault(_url_hash(obj.url), []).append(obj)
+        for key, objs in groups.items():
+            objs.sort(key=_survivor_rank, reverse=True)
+            survivor, duplicates = objs[0], objs[1:]
+            if duplicates:
+                _merge_duplicates(apps, model_name, survivor, duplicates)
+            model.objects.filter(id=survivor.id).update(url_hash=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_generatedreport_is_edit_inquire_accept_at_and_more'),
+    ]
+
+    operations = [
+        *[
+            migrations.AddField(
+                model_name=model_name.lower(),
+                name='url_hash',
+                field=models.CharField(editable=False, max_length=64, null=True),
+            )
+            for model_name in _URL_KEYED_MODELS
+        ],
+        migrations.RunPython(backfill_url_hash, migrations.RunPython.noop),
+        *[
+            migrations.AlterField(
+                model_name=model_name.lower(),
+                name='url_hash',
+                field=models.CharField(editable=False, max_length=64, unique=True),
+            )
+            for model_name in _URL_KEYED_MODELS
+        ],
+    ]
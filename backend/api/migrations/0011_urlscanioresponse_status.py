@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_url_hash'),
+    ]
+
+    operations = [
+        # 기존 레코드는 결과 조회까지 완료된 상태이므로 SUCCESS로 채운 뒤 기본값을 변경
+        migrations.AddField(
+            model_name='urlscanioresponse',
+            name='status',
+            field=models.CharField(choices=[('SUBMITTED', 'SUBMITTED'), ('SUCCESS', 'SUCCESS'), ('FAILURE', 'FAILURE')], db_index=True, default='SUCCESS', max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='urlscanioresponse',
+            name='status',
+            field=models.CharField(choices=[('SUBMITTED', 'SUBMITTED'), ('SUCCESS', 'SUCCESS'), ('FAILURE', 'FAILURE')], db_index=True, default='SUBMITTED', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='urlscanioresponse',
+            name='poll_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='urlscanioresponse',
+            name='last_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_urlscanioresponse_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='response_id',
+            field=models.CharField(blank=True, default='', max_length=128),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+_RESPONSE_MODELS = ("openairesponse", "geminiresponse")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_reportjob_response_id'),
+    ]
+
+    operations = [
+        *[
+            operation
+            for model_name in _RESPONSE_MODELS
+            for operation in (
+                migrations.AddField(
+                    model_name=model_name,
+                    name='tier',
+                    field=models.CharField(blank=True, default='', max_length=16),
+                ),
+                migrations.AddField(
+                    model_name=model_name,
+                    name='latency_ms',
+                    field=models.IntegerField(blank=True, null=True),
+                ),
+                migrations.AddField(
+                    model_name=model_name,
+                    name='escalation_reason',
+                    field=models.CharField(blank=True, default='', max_length=32),
+                ),
+            )
+        ],
+        migrations.AddField(
+            model_name='reportjob',
+            name='response_tier',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+    ]
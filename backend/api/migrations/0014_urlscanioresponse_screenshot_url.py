@@ -0,0 +1,48 @@
+from django.db import migrations, models
+
+
+_SCREENSHOT_STATES = [("NONE", "NONE"), ("REMOTE", "REMOTE"), ("STORED", "STORED"), ("MISSING", "MISSING")]
+_BATCH_SIZE = 500
+
+
+def backfill_screenshot_fields(apps, schema_editor):
+    model = apps.get_model("api", "URLScanIOResponse")
+    batch = []
+    for obj in model.objects.order_by("id").only("id", "status", "response", "screenshot").iterator(chunk_size=_BATCH_SIZE):
+        task = (obj.response or {}).get("task")
+        obj.screenshot_url = ((task.get("screenshotURL") if isinstance(task, dict) else None) or "")[:2000]
+        if obj.screenshot:
+            obj.screenshot_state = "STORED"
+        elif obj.screenshot_url:
+            obj.screenshot_state = "REMOTE"
+        elif obj.status == "SUCCESS":
+            obj.screenshot_state = "MISSING"
+        else:
+            obj.screenshot_state = "NONE"
+        batch.append(obj)
+        if len(batch) >= _BATCH_SIZE:
+            model.objects.bulk_update(batch, ["screenshot_url", "screenshot_state"])
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, ["screenshot_url", "screenshot_state"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_model_tier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='urlscanioresponse',
+            name='screenshot_url',
+            field=models.URLField(blank=True, default='', max_length=2000),
+        ),
+        migrations.AddField(
+            model_name='urlscanioresponse',
+            name='screenshot_state',
+            field=models.CharField(choices=_SCREENSHOT_STATES, db_index=True, default='NONE', max_length=16),
+        ),
+        migrations.RunPython(backfill_screenshot_fields, migrations.RunPython.noop),
+    ]
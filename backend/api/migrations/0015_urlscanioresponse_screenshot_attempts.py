@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_urlscanioresponse_screenshot_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='urlscanioresponse',
+            name='screenshot_attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='urlscanioresponse',
+            name='screenshot_next_attempt_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='urlscanioresponse',
+            name='screenshot_state',
+            field=models.CharField(
+                choices=[
+                    ('NONE', 'NONE'),
+                    ('REMOTE', 'REMOTE'),
+                    ('STORED', 'STORED'),
+                    ('MISSING', 'MISSING'),
+                    ('GAVE_UP', 'GAVE_UP'),
+                ],
+                db_index=True,
+                default='NONE',
+                max_length=16,
+            ),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_urlscanioresponse_screenshot_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='urlscanioresponse',
+            name='screenshot_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,53 @@
+import logging
+
+import redis
+from django.conf import settings
+from django.core.cache import caches
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+_VERDICT_FIELDS = ("is_processing", "job_status", "site_name", "threat_type", "description", "threat_score")
+
+
+def _invalidate_cached(keys):
+    # 지운 판정이 공유 캐시(verdict_cache, L2)와 상태 문서(status_store)에 남아 계속 응답되지 않도록 무효화.
+    # 이후 코드 변경과 무관하도록 작성 시점의 키 형식을 그대로 사용
+    try:
+        caches[getattr(settings, "VERDICT_CACHE_ALIAS", "verdict")].delete_many([f"verdict:{key}" for key in keys])
+    except Exception:
+        logger.exception("Failed to invalidate verdict cache for dropped heuristic verdicts.")
+    try:
+        client = redis.Redis.from_url(settings.REDIS_URL)
+        ttl = max(60, int(getattr(settings, "STATUS_STORE_TTL", 24 * 3600)))
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            # 판정 필드도 지워야 다시 만들 때 이전 값이 남지 않음 (DB에 판정이 없으면 문서의 값을 유지하므로)
+            pipe.hdel(f"status:{key}", "_built", *_VERDICT_FIELDS)
+            pipe.hincrby(f"status:{key}", "version", 1)
+            pipe.expire(f"status:{key}", ttl)
+        pipe.execute()
+    except Exception:
+        logger.exception("Failed to invalidate status documents for dropped heuristic verdicts.")
+
+
+def drop_heuristic_verdicts(apps, schema_editor):
+    # 어휘적 점수로 저장한 위험 판정과 사용자 콘텐츠 호스트의 안전 판정이 섞여 있으므로 로컬 판정 결과를 모두 지워
+    # 다음 요청에서 다시 판정하게 함 (허용 도메인은 즉시 다시 저장되고, 나머지는 LLM 분석). 관리자가 수정한 판정은 유지
+    rows = apps.get_model("api", "ScannedURL").objects.filter(model="heuristic", is_edit=False)
+    keys = list(rows.values_list("url_hash", flat=True))
+    if not keys:
+        return
+    rows.delete()
+    _invalidate_cached(keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_screenshotblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_heuristic_verdicts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_drop_heuristic_verdicts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screenshotblob',
+            name='retired_files',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
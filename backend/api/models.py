@@ -1,17 +1,131 @@
 
 import uuid
+from django.core.files.storage import default_storage
 from django.db import models
 
+from .canonical import url_hash
+
+
+class URLKeyedModel(models.Model):
+    # 정규화된 URL의 SHA-256(hex). 동일 URL의 다양한 표기가 하나의 레코드를 공유하도록 조회 키로 사용
+    url_hash = models.CharField(max_length=64, unique=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.url:
+            self.url_hash = url_hash(self.url)
+        super().save(*args, **kwargs)
+
+
+class ScreenshotBlob(models.Model):
+    """
+    내용(SHA-256) 기준으로 한 번만 저장하는 스크린샷 원본/축소본. 파일 이름이 내용으로 정해지므로 바뀌지 않음(immutable).
+    refcount: 이 blob을 가리키는 URLScanIOResponse 수. 0이 된 blob은 migrate_screenshot_blobs --gc에서 삭제
+    retired_files: 재압축/인코딩 설정 변경으로 더 이상 쓰지 않는 이전 파일 {name: 교체 시각(ISO)}.
+    캐시된 페이지/프록시가 계속 요청할 수 있으므로 유예 기간 후 migrate_screenshot_blobs --gc에서 삭제
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    size = models.IntegerField(default=0)
+    variants = models.JSONField(default=dict, blank=True)
+    retired_files = models.JSONField(default=dict, blank=True)
+    refcount = models.IntegerField(default=0, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.sha256
+
+
+class URLScanIOResponse(URLKeyedModel):
+    class Status(models.TextChoices):
+        SUBMITTED = "SUBMITTED", "SUBMITTED"
+        SUCCESS = "SUCCESS", "SUCCESS"
+        FAILURE = "FAILURE", "FAILURE"
+
+    class ScreenshotState(models.TextChoices):
+        # 결과 조회 전
+        NONE = "NONE", "NONE"
+        # urlscan의 screenshotURL만 있고 아직 저장하지 않음
+        REMOTE = "REMOTE", "REMOTE"
+        # screenshot 파일로 저장됨
+        STORED = "STORED", "STORED"
+        # 결과는 있지만 스크린샷이 없음
+        MISSING = "MISSING", "MISSING"
+        # 보충 재시도 한도 초과 또는 영구 실패(404/410 등). 재제출 전까지 보충하지 않음
+        GAVE_UP = "GAVE_UP", "GAVE_UP"
 
-class URLScanIOResponse(models.Model):
     url = models.URLField(unique=True)
     ip = models.GenericIPAddressField(null=True, blank=True)
     scan_id = models.UUIDField(default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.SUBMITTED, db_index=True)
+    poll_count = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
     response = models.JSONField(null=True, blank=True)
     screenshot = models.ImageField(upload_to='screenshots/', null=True, blank=True)
+    # 상태 조회 시 response(수백 KB)를 읽지 않도록 response.task.screenshotURL을 저장 시점에 추출
+    screenshot_url = models.URLField(max_length=2000, blank=True, default="")
+    screenshot_state = models.CharField(
+        max_length=16, choices=ScreenshotState.choices, default=ScreenshotState.NONE, db_index=True,
+    )
+    screenshot_blob = models.ForeignKey(
+        ScreenshotBlob, null=True, blank=True, on_delete=models.SET_NULL, related_name="scans",
+    )
+    # 모바일용 축소본 storage 경로 {"webp": {"320": "screenshots/variants/..."}, "jpeg": {...}}
+    screenshot_variants = models.JSONField(default=dict, blank=True)
+    # 스크린샷 보충(api.screenshots.backfill) 시도 횟수와 다음 시도 시각
+    screenshot_attempts = models.IntegerField(default=0)
+    screenshot_next_attempt_at = models.DateTimeField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def set_response(self, response: dict | None) -> None:
+        """response와 함께 screenshot_url을 갱신 (save 시 update_fields에 response만 넣어도 함께 저장됨)"""
+        self.response = response
+        task = (response or {}).get("task")
+        self.screenshot_url = (task.get("screenshotURL") if isinstance(task, dict) else None) or ""
+
+    @property
+    def screenshot_src(self) -> str | None:
+        """저장된 스크린샷이 있으면 그 URL, 없으면 urlscan의 screenshotURL"""
+        if self.screenshot:
+            return self.screenshot.url
+        return self.screenshot_url or None
+
+    @property
+    def screenshot_srcset(self) -> dict:
+        """축소본 {"webp": "url 320w, url 640w", "jpeg": ...} (<picture>/<img srcset>에 그대로 사용)"""
+        if not self.screenshot:
+            return {}
+        result = {}
+        for fmt, names in (self.screenshot_variants or {}).items():
+            entries = sorted((int(width), name) for width, name in names.items())
+            if entries:
+                result[fmt] = ", ".join(f"{default_storage.url(name)} {width}w" for width, name in entries)
+        return result
+
+    def save(self, *args, **kwargs):
+        if self.screenshot:
+            self.screenshot_state = self.ScreenshotState.STORED
+        elif self.status != self.Status.SUCCESS:
+            self.screenshot_state = self.ScreenshotState.NONE
+        elif self.screenshot_state == self.ScreenshotState.GAVE_UP:
+            pass
+        elif self.screenshot_url:
+            self.screenshot_state = self.ScreenshotState.REMOTE
+        else:
+            self.screenshot_state = self.ScreenshotState.MISSING
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if "response" in update_fields:
+                update_fields.add("screenshot_url")
+            if update_fields & {"response", "screenshot", "screenshot_url", "status"}:
+                update_fields.add("screenshot_state")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return str(self.url)
@@ -20,6 +134,12 @@ class URLScanIOResponse(models.Model):
 class EnumCategory:
     SCAN_URL = "scan_url"
     GENERATE_REPORT = "generate_report"
+    REPAIR_JSON = "repair_json"
+
+
+class EnumTier:
+    LITE = "lite"
+    HEAVY = "heavy"
 
 
 class OpenAIResponse(models.Model):
@@ -35,6 +155,10 @@ class OpenAIResponse(models.Model):
     prompt = models.TextField(null=True, blank=True)
     response = models.TextField(null=True, blank=True)
     response_detail = models.JSONField(null=True, blank=True)
+    # 모델 tier 라우팅 기록: 사용한 tier, 요청~완료 지연(ms), 상위 tier로 넘긴 사유(수용 시 빈 값)
+    tier = models.CharField(max_length=16, blank=True, default="")
+    latency_ms = models.IntegerField(null=True, blank=True)
+    escalation_reason = models.CharField(max_length=32, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -56,6 +180,10 @@ class GeminiResponse(models.Model):
     prompt = models.TextField(null=True, blank=True)
     response = models.TextField(null=True, blank=True)
     response_detail = models.JSONField(null=True, blank=True)
+    # 모델 tier 라우팅 기록: 사용한 tier, 요청~완료 지연(ms), 상위 tier로 넘긴 사유(수용 시 빈 값)
+    tier = models.CharField(max_length=16, blank=True, default="")
+    latency_ms = models.IntegerField(null=True, blank=True)
+    escalation_reason = models.CharField(max_length=32, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -64,7 +192,7 @@ class GeminiResponse(models.Model):
         return str(self.url)
 
 
-class ScannedURL(models.Model):
+class ScannedURL(URLKeyedModel):
     url = models.URLField(unique=True)
     site_name = models.CharField(max_length=1000, null=True, blank=True)
     threat_type = models.CharField(max_length=300, null=True, blank=True)
@@ -82,7 +210,7 @@ class ScannedURL(models.Model):
         return str(self.url)
 
 
-class GeneratedReport(models.Model):
+class GeneratedReport(URLKeyedModel):
     url = models.URLField(unique=True)
     site_name = models.CharField(max_length=1000, null=True, blank=True)
     threat_type = models.CharField(max_length=300, null=True, blank=True)
@@ -103,7 +231,7 @@ class GeneratedReport(models.Model):
         return str(self.url)
 
 
-class ReportJob(models.Model):
+class ReportJob(URLKeyedModel):
     class Status(models.TextChoices):
         PENDING = "PENDING", "PENDING"
         STARTED = "STARTED", "STARTED"
@@ -115,6 +243,10 @@ class ReportJob(models.Model):
     status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING, db_index=True)
 
     last_error = models.TextField(blank=True, default="")
+    # 진행 중인 OpenAI 배경 응답 ID (재시도/재전달 시 새 응답을 만들지 않고 이어서 조회)
+    response_id = models.CharField(max_length=128, blank=True, default="")
+    # response_id 응답을 요청한 모델 tier(EnumTier)
+    response_tier = models.CharField(max_length=16, blank=True, default="")
 
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,200 @@
+import json
+import re
+
+from .models import EnumCategory
+
+
+class ParseError(ValueError):
+    """응답에서 JSON 객체를 찾을 수 없음"""
+
+
+class SchemaError(ParseError):
+    """JSON 객체가 용도별 스키마를 만족하지 않음"""
+
+
+# OpenAI strict 구조화 출력은 모든 필드가 required이고 additionalProperties가 false여야 함
+SCAN_URL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "url": {"type": "string"},
+        "site_name": {"type": "string"},
+        "threat_type": {"type": "string"},
+        "description": {"type": "string"},
+        "threat_score": {"type": "integer", "enum": [1, 2, 3]},
+        "confidence": {"type": "integer", "description": "0~100"},
+    },
+    "required": ["url", "site_name", "threat_type", "description", "threat_score", "confidence"],
+    "additionalProperties": False,
+}
+
+# depth는 단계("0", "1", ...)별 링크 목록이라 키가 고정되지 않으므로 strict 스키마로 표현하지 않음
+GENERATE_REPORT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "url": {"type": "string"},
+        "site_name": {"type": "string"},
+        "threat_type": {"type": "string"},
+        "description": {"type": "string"},
+        "probability": {"type": "integer", "description": "0~100"},
+        "reason": {"type": "string"},
+        "depth": {"type": "object"},
+    },
+    "required": ["site_name", "threat_type", "description", "probability", "reason", "depth"],
+}
+
+JSON_SCHEMAS = {
+    EnumCategory.SCAN_URL: SCAN_URL_SCHEMA,
+    EnumCategory.GENERATE_REPORT: GENERATE_REPORT_SCHEMA,
+}
+
+_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*\n?(.*?)\n?\s*```\s*$", re.S)
+
+_THREAT_SCORE_LABELS = {
+    "안전": 1, "safe": 1,
+    "주의": 2, "warn": 2, "warning": 2, "caution": 2,
+    "위험": 3, "danger": 3, "dangerous": 3, "risk": 3,
+}
+
+
+def openai_text_format(category: str) -> dict:
+    """Responses API text.format. 고정 스키마가 있으면 json_schema(strict), 없으면 json_object"""
+    if category == EnumCategory.SCAN_URL:
+        return {"type": "json_schema", "name": category, "schema": SCAN_URL_SCHEMA, "strict": True}
+    return {"type": "json_object"}
+
+
+def _first_json_object(text: str) -> dict:
+    """문자열 리터럴 내부의 중괄호를 무시하고 처음으로 균형이 맞는(파싱 가능한) JSON 객체를 반환"""
+    start = text.find("{")
+    while start != -1:
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, len(text)):
+            ch = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        value = json.loads(text[start:i + 1])
+                    except ValueError:
+                        break
+                    if isinstance(value, dict):
+                        return value
+                    break
+        start = text.find("{", start + 1)
+    raise ParseError("응답에서 JSON 객체를 찾을 수 없습니다.")
+
+
+def extract_json(text: str | None) -> dict:
+    """코드 펜스(```json)나 앞뒤 설명 문장이 섞인 응답에서 JSON 객체를 추출한다."""
+    if not text:
+        raise ParseError("응답이 비어 있습니다.")
+    match = _FENCE_RE.match(text)
+    body = match.group(1) if match else text
+    try:
+        value = json.loads(body)
+        if isinstance(value, dict):
+            return value
+    except ValueError:
+        pass
+    return _first_json_object(body)
+
+
+def _coerce_number(value, field: str) -> float:
+    if isinstance(value, bool):
+        raise SchemaError(f"{field} 값이 숫자가 아닙니다. value={value!r}")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip().rstrip("%").strip())
+        except ValueError:
+            pass
+    raise SchemaError(f"{field} 값이 숫자가 아닙니다. value={value!r}")
+
+
+def coerce_threat_score(value) -> int:
+    if isinstance(value, str) and value.strip().lower() in _THREAT_SCORE_LABELS:
+        return _THREAT_SCORE_LABELS[value.strip().lower()]
+    score = round(_coerce_number(value, "threat_score"))
+    if score not in (1, 2, 3):
+        raise SchemaError(f"threat_score 값이 범위(1~3)를 벗어났습니다. value={value!r}")
+    return score
+
+
+def coerce_probability(value) -> int:
+    number = _coerce_number(value, "probability")
+    # 0~1 비율로 응답한 경우 백분율로 변환
+    if isinstance(value, float) and 0 < number <= 1:
+        number *= 100
+    return int(round(min(100.0, max(0.0, number))))
+
+
+def _require_text(result: dict, field: str) -> str:
+    value = result.get(field)
+    if value is None or (isinstance(value, (dict, list))):
+        raise SchemaError(f"{field} 항목이 없거나 문자열이 아닙니다.")
+    text = str(value).strip()
+    # 교정 응답이 빈 값으로 채운 결과를 저장하지 않도록 실패로 처리해 다시 스캔하게 함
+    if not text:
+        raise SchemaError(f"{field} 항목이 비어 있습니다.")
+    return text
+
+
+def _validate_scan_url(result: dict) -> dict:
+    validated = {
+        "url": str(result.get("url") or ""),
+        "site_name": _require_text(result, "site_name"),
+        "threat_type": _require_text(result, "threat_type"),
+        "description": _require_text(result, "description"),
+        "threat_score": coerce_threat_score(result.get("threat_score")),
+        "confidence": None,
+    }
+    if result.get("confidence") is not None:
+        try:
+            validated["confidence"] = int(round(min(100.0, max(0.0, _coerce_number(result["confidence"], "confidence")))))
+        except SchemaError:
+            validated["confidence"] = None
+    return validated
+
+
+def _validate_generate_report(result: dict) -> dict:
+    depth = result.get("depth")
+    if depth is None:
+        depth = {}
+    elif isinstance(depth, list):
+        depth = {"0": depth}
+    elif not isinstance(depth, dict):
+        raise SchemaError("depth 항목이 객체가 아닙니다.")
+    return {
+        "url": str(result.get("url") or ""),
+        "site_name": _require_text(result, "site_name"),
+        "threat_type": _require_text(result, "threat_type"),
+        "description": _require_text(result, "description"),
+        "probability": coerce_probability(result.get("probability")),
+        "reason": _require_text(result, "reason"),
+        "depth": depth,
+    }
+
+
+_VALIDATORS = {
+    EnumCategory.SCAN_URL: _validate_scan_url,
+    EnumCategory.GENERATE_REPORT: _validate_generate_report,
+}
+
+
+def parse(category: str, text: str | None) -> dict:
+    """응답 텍스트에서 JSON을 추출하고 용도별 스키마로 검증/보정한 dict를 반환한다."""
+    return _VALIDATORS[category](extract_json(text))
@@ -0,0 +1,164 @@
+import logging
+import time
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+
+from . import metrics
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class EnumPriority:
+    # 사용자가 응답을 기다리는 스캔
+    INTERACTIVE = "interactive"
+    # 보고서 생성/urlscan 등 지연되어도 되는 작업
+    BACKGROUND = "background"
+
+
+class RateLimited(RuntimeError):
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} 요청 한도를 초과했습니다. ({retry_after}초 후 재시도)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+# rate: 초당 충전 토큰 수, burst: 최대 토큰 수,
+# reserve: BACKGROUND 요청이 남겨 두어야 하는 토큰 비율(INTERACTIVE 전용 여유분)
+# 조회 순서: "provider:model" 또는 "provider:endpoint" -> "provider"
+DEFAULT_RATE_LIMITS = {
+    "openai": {"rate": 5, "burst": 20, "reserve": 0.25},
+    "gemini": {"rate": 5, "burst": 20, "reserve": 0.25},
+    "urlscan:submit": {"rate": 0.5, "burst": 5, "reserve": 0},
+    "urlscan:result": {"rate": 2, "burst": 10, "reserve": 0},
+    "urlscan:screenshot": {"rate": 2, "burst": 10, "reserve": 0},
+}
+
+# KEYS[1]=버킷(hash: tokens, ts), KEYS[2]=Retry-After 차단 키
+# ARGV: rate, burst, 요청 토큰 수, 남겨 둘 토큰 수 -> {허용 여부, 대기 ms}
+_TOKEN_BUCKET_SCRIPT = """
+local blocked = redis.call('PTTL', KEYS[2])
+if blocked > 0 then
+    return {0, blocked}
+end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local wait = 0
+if tokens >= requested + reserve then
+    tokens = tokens - requested
+    allowed = 1
+else
+    wait = math.ceil((requested + reserve - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return {allowed, wait}
+"""
+
+
+def _enabled() -> bool:
+    return bool(getattr(settings, "RATE_LIMIT_ENABLED", True))
+
+
+def _resolve(name: str) -> tuple[str, dict] | None:
+    limits = dict(DEFAULT_RATE_LIMITS)
+    limits.update(getattr(settings, "RATE_LIMITS", None) or {})
+    candidate = name
+    while candidate:
+        if candidate in limits:
+            return candidate, limits[candidate]
+        candidate = candidate.rpartition(":")[0]
+    return None
+
+
+def _bucket_key(bucket: str) -> str:
+    return f"rl:{bucket}"
+
+
+def _penalty_key(bucket: str) -> str:
+    return f"rl:{bucket}:retry_after"
+
+
+def _take(bucket: str, config: dict, priority: str) -> int:
+    """토큰을 얻으면 0, 아니면 다시 시도할 때까지의 대기(ms)"""
+    rate = max(0.001, float(config["rate"]))
+    burst = max(1.0, float(config["burst"]))
+    reserve = burst * float(config.get("reserve", 0)) if priority == EnumPriority.BACKGROUND else 0
+    allowed, wait_ms = get_redis().eval(
+        _TOKEN_BUCKET_SCRIPT, 2, _bucket_key(bucket), _penalty_key(bucket), rate, burst, 1, reserve,
+    )
+    return 0 if int(allowed) else max(1, int(wait_ms))
+
+
+def acquire(name: str, priority: str = EnumPriority.INTERACTIVE, max_wait: float | None = None) -> None:
+    """
+    name("provider:model" 또는 "provider:endpoint")의 토큰을 1개 얻는다.
+    max_wait(초)까지 기다려도 얻지 못하면 RateLimited를 발생시킨다. 기본값은 INTERACTIVE만 대기하고
+    BACKGROUND는 즉시 포기(shed)하여 호출 측(task)이 retry_after 이후로 재시도하도록 한다.
+    Redis 장애 시에는 제한하지 않는다.
+    """
+    if not _enabled():
+        return
+    resolved = _resolve(name)
+    if resolved is None:
+        return
+    bucket, config = resolved
+    if max_wait is None:
+        max_wait = (
+            float(getattr(settings, "RATE_LIMIT_MAX_WAIT", 10))
+            if priority == EnumPriority.INTERACTIVE else 0.0
+        )
+    deadline = time.monotonic() + max_wait
+    while True:
+        try:
+            wait_ms = _take(bucket, config, priority)
+        except Exception:
+            logger.exception("Failed to acquire rate limit token. name=%s", name)
+            return
+        if wait_ms == 0:
+            return
+        remaining = deadline - time.monotonic()
+        if wait_ms / 1000 > remaining:
+            metrics.incr(f"rate_limit.{bucket}.{'shed' if priority == EnumPriority.BACKGROUND else 'rejected'}")
+            raise RateLimited(name, max(1, int(wait_ms / 1000 + 0.999)))
+        metrics.incr(f"rate_limit.{bucket}.waited")
+        time.sleep(wait_ms / 1000)
+
+
+def retry_after_seconds(headers) -> int | None:
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 변환"""
+    value = (headers or {}).get("retry-after") or (headers or {}).get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(1, int(float(value)))
+    except ValueError:
+        pass
+    try:
+        return max(1, int(parsedate_to_datetime(value).timestamp() - time.time()))
+    except (TypeError, ValueError):
+        return None
+
+
+def penalize(name: str, retry_after: int | None = None) -> int:
+    """provider의 429 응답 이후 Retry-After 동안 모든 worker가 해당 버킷을 사용하지 않도록 차단한다."""
+    seconds = retry_after or int(getattr(settings, "RATE_LIMIT_DEFAULT_PENALTY", 5))
+    resolved = _resolve(name)
+    if resolved is None or not _enabled():
+        return seconds
+    try:
+        get_redis().set(_penalty_key(resolved[0]), 1, ex=max(1, seconds))
+        metrics.incr(f"rate_limit.{resolved[0]}.throttled")
+    except Exception:
+        logger.exception("Failed to store rate limit penalty. name=%s", name)
+    return seconds
@@ -0,0 +1,18 @@
+import threading
+
+import redis
+from django.conf import settings
+
+
+_client: redis.Redis | None = None
+_client_lock = threading.Lock()
+
+
+def get_redis() -> redis.Redis:
+    """REDIS_URL 기반의 프로세스 공용 Redis 클라이언트 (커넥션 풀은 fork 이후 자동으로 재생성됨)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
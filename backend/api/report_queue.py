@@ -1,46 +1,176 @@
+import logging
 import uuid
-import hashlib
 from datetime import timedelta
 
 from django.conf import settings
-from django.core.cache import cache
 from django.db import transaction
 from django.utils import timezone
 
+from . import locks, metrics, verdict_cache, ws
+from .canonical import url_hash
 from .models import ReportJob, GeneratedReport, ScannedURL, URLScanIOResponse
+from .redis_client import get_redis
 from .tasks import generate_report_task, urlscanio_task
 
+logger = logging.getLogger(__name__)
+
+
+class EnumReportPolicy:
+    # 스캔 직후 보고서 생성, QR 스캔 시점에 urlscan 제출 (기존 동작)
+    EAGER = "eager"
+    # 보고서 페이지 요청(GenerateReportView) 또는 /ws/reports/ 구독 시에만 보고서/urlscan 요청
+    LAZY = "lazy"
+    # threat_score가 REPORT_EAGER_MIN_SCORE 이상이면 eager, 아니면 lazy
+    SCORE_GATED = "score_gated"
+
+
+class EnumFollowup:
+    REPORT = "report"
+    URLSCAN = "urlscan"
+
+
+def report_policy() -> str:
+    policy = getattr(settings, "REPORT_PIPELINE_POLICY", EnumReportPolicy.EAGER)
+    if policy in (EnumReportPolicy.LAZY, EnumReportPolicy.SCORE_GATED):
+        return policy
+    return EnumReportPolicy.EAGER
+
+
+def urlscan_on_qr_scan() -> bool:
+    """eager 정책에서만 판정 결과를 기다리지 않고 QR 스캔 시점에 urlscan을 제출"""
+    return report_policy() == EnumReportPolicy.EAGER
+
+
+def _requested_key(key: str) -> str:
+    return f"pipeline:requested:{key}"
+
+
+def _deferred_key(kind: str, key: str) -> str:
+    return f"pipeline:deferred:{kind}:{key}"
+
+
+def mark_requested(url: str) -> None:
+    """
+    사용자가 보고서를 요청했음을 기록한다. 스캔이 아직 끝나지 않은 URL도 스캔 완료 시
+    정책과 관계없이 보고서/urlscan을 바로 큐잉하도록 한다.
+    """
+    if report_policy() == EnumReportPolicy.EAGER:
+        return
+    try:
+        get_redis().set(
+            _requested_key(url_hash(url)), 1, ex=max(60, int(getattr(settings, "REPORT_REQUEST_TTL", 3600))),
+        )
+    except Exception:
+        logger.exception("Failed to mark report requested. url=%s", url)
+
+
+def _is_requested(key: str) -> bool:
+    try:
+        return bool(get_redis().exists(_requested_key(key)))
+    except Exception:
+        logger.exception("Failed to read report request marker. key=%s", key)
+        return False
+
+
+def _followup_check_key(key: str) -> str:
+    return f"pipeline:followup_checked:{key}"
+
+
+def claim_followup_check(key: str) -> bool:
+    """
+    캐시된 판정 응답마다 후속 작업 상태를 DB에서 확인하지 않도록 URL별로 VERDICT_FOLLOWUP_CHECK_INTERVAL초에 1번만 True.
+    Redis 장애 시에는 확인하도록 True
+    """
+    try:
+        return bool(get_redis().set(
+            _followup_check_key(key), 1, nx=True,
+            ex=max(1, int(getattr(settings, "VERDICT_FOLLOWUP_CHECK_INTERVAL", 60))),
+        ))
+    except Exception:
+        logger.exception("Failed to claim followup check. key=%s", key)
+        return True
+
+
+def _defer(kind: str, key: str) -> None:
+    """URL당 1회만 보류로 집계 (같은 URL의 반복 QR 스캔은 중복 집계하지 않음)"""
+    policy = report_policy()
+    try:
+        if get_redis().set(
+            _deferred_key(kind, key),
+            policy,
+            nx=True,
+            ex=max(60, int(getattr(settings, "REPORT_PIPELINE_DEFERRAL_TTL", 7 * 24 * 3600))),
+        ):
+            metrics.incr(f"pipeline.{kind}.{policy}.deferred")
+    except Exception:
+        logger.exception("Failed to record deferred %s. key=%s", kind, key)
+
+
+def _consume_deferral(kind: str, key: str) -> None:
+    """보류했던 작업이 결국 요청되면 on_demand로 집계 (절약량 = deferred - on_demand)"""
+    try:
+        policy = get_redis().getdel(_deferred_key(kind, key))
+    except Exception:
+        logger.exception("Failed to consume deferred %s. key=%s", kind, key)
+        return
+    if policy:
+        metrics.incr(f"pipeline.{kind}.{policy.decode()}.on_demand")
+
+
+def pipeline_stats() -> dict:
+    """정책별로 보류한 작업 수, 이후 요청되어 실행된 수, 절약한 작업 수"""
+    counters = metrics.snapshot()
+    result = {"policy": report_policy()}
+    for kind in (EnumFollowup.REPORT, EnumFollowup.URLSCAN):
+        result[kind] = {}
+        for policy in (EnumReportPolicy.LAZY, EnumReportPolicy.SCORE_GATED):
+            deferred = counters.get(f"pipeline.{kind}.{policy}.deferred", 0)
+            on_demand = counters.get(f"pipeline.{kind}.{policy}.on_demand", 0)
+            result[kind][policy] = {
+                "deferred": deferred,
+                "on_demand": on_demand,
+                "saved": max(0, deferred - on_demand),
+            }
+    return result
+
 
 def ensure_urlscanio_queued(url: str, ip: str) -> None:
-    existing = URLScanIOResponse.objects.filter(url=url).only("screenshot").first()
+    key = url_hash(url)
+    existing = URLScanIOResponse.objects.filter(url_hash=key).only("screenshot").first()
     if existing and existing.screenshot:
         return
-    lock_key = f"urlscan:queue:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
-    if cache.add(lock_key, "1", timeout=300):
-        urlscanio_task.apply_async(kwargs={"url": url, "ip": ip})
+    lock_token = locks.acquire(locks.urlscan_lock_name(key), timeout=300)
+    if lock_token:
+        _consume_deferral(EnumFollowup.URLSCAN, key)
+        urlscanio_task.apply_async(kwargs={"url": url, "ip": ip, "lock_token": lock_token})
 
 
 def ensure_generate_report_queued(scanned: ScannedURL, ip: str) -> ReportJob | None:
     """
     - GeneratedReport가 이미 있으면 큐잉하지 않음
-    - ReportJob(url unique)로 중복 실행 방지
+    - ReportJob(url_hash unique)로 중복 실행 방지
     - 이미 PENDING/STARTED면 그대로 유지
     - 커밋 이후(on_commit)에만 celery task 발행
     """
     generated_report, _ = GeneratedReport.objects.get_or_create(
-        url=scanned.url,
-        defaults={"is_processed": False},
+        url_hash=scanned.url_hash,
+        defaults={"url": scanned.url, "is_processed": False},
     )
     existing_report = generated_report
     if existing_report and existing_report.is_processed:
         ReportJob.objects.update_or_create(
-            url=scanned.url,
-            defaults={"status": ReportJob.Status.SUCCESS, "last_error": ""},
+            url_hash=scanned.url_hash,
+            defaults={"url": scanned.url, "status": ReportJob.Status.SUCCESS, "last_error": ""},
         )
+        verdict_cache.invalidate(scanned.url_hash)
+        ws.notify_report_status(scanned.url, is_processed=True, job_status=ReportJob.Status.SUCCESS)
         return None
 
     with transaction.atomic():
-        job, _ = ReportJob.objects.select_for_update().get_or_create(url=scanned.url)
+        job, _ = ReportJob.objects.select_for_update().get_or_create(
+            url_hash=scanned.url_hash,
+            defaults={"url": scanned.url},
+        )
 
         # 진행 중 작업이 매우 오래 갱신되지 않으면 stale로 간주하고 자동 복구
         if job.status in (ReportJob.Status.PENDING, ReportJob.Status.STARTED) and job.task_id:
@@ -65,6 +195,10 @@ def ensure_generate_report_queued(scanned: ScannedURL, ip: str) -> ReportJob | N
         job.save(update_fields=["task_id", "status", "last_error", "started_at", "finished_at", "updated_at"])
 
         job_id = job.id
+    verdict_cache.invalidate(scanned.url_hash)
+    ws.notify_report_status(scanned.url, is_processed=False, job_status=ReportJob.Status.PENDING)
+    _consume_deferral(EnumFollowup.REPORT, scanned.url_hash)
+
     def _dispatch():
         generate_report_task.apply_async(
             kwargs={
@@ -81,3 +215,47 @@ def ensure_generate_report_queued(scanned: ScannedURL, ip: str) -> ReportJob | N
 
     transaction.on_commit(_dispatch)
     return job
+
+
+def _is_eager(scanned: ScannedURL) -> bool:
+    policy = report_policy()
+    if policy == EnumReportPolicy.EAGER:
+        return True
+    if policy == EnumReportPolicy.SCORE_GATED and scanned.threat_score is not None:
+        if int(scanned.threat_score) >= int(getattr(settings, "REPORT_EAGER_MIN_SCORE", 2)):
+            return True
+    return _is_requested(scanned.url_hash)
+
+
+def queue_followups(scanned: ScannedURL, ip: str) -> str | None:
+    """
+    판정 결과가 있는 URL의 보고서(eager가 아닌 정책에서는 urlscan 포함)를 정책에 따라 큐잉하거나 보류한다.
+    반환: 판정 응답/알림에 사용할 report_job_status (보류 시 기존 상태 또는 None)
+    """
+    if _is_eager(scanned):
+        job = ensure_generate_report_queued(scanned, ip)
+        if not urlscan_on_qr_scan():
+            ensure_urlscanio_queued(scanned.url, ip)
+        return job.status if job else ReportJob.Status.SUCCESS
+
+    if not GeneratedReport.objects.filter(url_hash=scanned.url_hash, is_processed=True).exists():
+        _defer(EnumFollowup.REPORT, scanned.url_hash)
+    if not URLScanIOResponse.objects.filter(url_hash=scanned.url_hash).exists():
+        _defer(EnumFollowup.URLSCAN, scanned.url_hash)
+    return ReportJob.objects.filter(url_hash=scanned.url_hash).values_list("status", flat=True).first()
+
+
+def request_followups(url: str, ip: str | None) -> bool:
+    """
+    보고서 구독(/ws/reports/) 시 보류된 보고서/urlscan을 요청한다.
+    판정 결과가 아직 없으면 요청만 기록하고 스캔 완료 시 큐잉되도록 한다. 반환: 큐잉 시도 여부
+    """
+    if report_policy() == EnumReportPolicy.EAGER:
+        return False
+    mark_requested(url)
+    scanned = ScannedURL.objects.filter(url_hash=url_hash(url)).first()
+    if not scanned:
+        return False
+    ensure_generate_report_queued(scanned, ip)
+    ensure_urlscanio_queued(scanned.url, ip)
+    return True
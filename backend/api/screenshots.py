@@ -0,0 +1,442 @@
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from PIL import Image
+
+from . import locks, metrics, rate_limit
+from .clients import get_http_session, get_urlscan_client
+from .models import ScreenshotBlob, URLScanIOResponse
+from .rate_limit import EnumPriority, RateLimited
+from .redis_client import get_redis
+from .ws import notify_urlscan_status
+
+logger = logging.getLogger(__name__)
+
+
+# 이전 배치의 마지막 id. 다음 실행은 그 이후부터 조회하여 앞쪽 행만 반복 처리하지 않도록 함(keyset)
+_CURSOR_KEY = "screenshot_backfill:cursor"
+_LOCK_NAME = "screenshot_backfill:run"
+
+# 내용(SHA-256) 기준 스크린샷 저장 경로. 이름이 바뀌지 않으므로 장기 캐시(immutable) 대상
+BLOB_PREFIX = "screenshots/blobs/"
+
+# 다시 시도해도 스크린샷을 얻을 수 없는 응답(비공개/삭제된 스캔)
+_PERMANENT_STATUS_CODES = (403, 404, 410)
+
+
+# 축소본 포맷별 Pillow 저장 옵션 (JPEG는 WebP 미지원 브라우저용)
+_VARIANT_FORMATS = {
+    "webp": {"format": "WEBP", "method": 4},
+    "jpeg": {"format": "JPEG", "optimize": True, "progressive": True},
+}
+
+
+def variant_widths() -> list[int]:
+    raw = getattr(settings, "SCREENSHOT_VARIANT_WIDTHS", "320,640,1080")
+    widths = raw.split(",") if isinstance(raw, str) else raw
+    return sorted({int(width) for width in widths if str(width).strip()})
+
+
+def _encode_options(fmt: str) -> dict:
+    quality = max(1, min(100, int(getattr(settings, "SCREENSHOT_VARIANT_QUALITY", 75))))
+    return {**_VARIANT_FORMATS[fmt], "quality": quality}
+
+
+def _variant_tag(fmt: str) -> str:
+    """
+    인코딩 옵션(품질 포함) 요약. 축소본 이름에 넣어 설정을 바꾸면 다른 이름으로 새로 만들어지게 함
+    (같은 이름이면 _write_immutable이 기존 파일을 그대로 사용)
+    """
+    encoded = json.dumps(_encode_options(fmt), sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()[:8]
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    buf = BytesIO()
+    image.save(buf, **_encode_options(fmt))
+    return buf.getvalue()
+
+
+def _write_immutable(name: str, content: bytes) -> str:
+    """내용 기준 이름이므로 같은 이름의 파일이 이미 있으면 쓰지 않음"""
+    if default_storage.exists(name):
+        return name
+    saved = default_storage.save(name, ContentFile(content))
+    if saved != name:
+        # 동시에 같은 파일을 쓴 경우 storage가 붙인 다른 이름의 사본은 버림
+        default_storage.delete(saved)
+    return name
+
+
+def blob_name(digest: str, suffix: str = ".png") -> str:
+    return f"{BLOB_PREFIX}{digest[:2]}/{digest}{suffix}"
+
+
+def build_variants(prefix: str, content: bytes) -> dict:
+    """
+    원본 스크린샷(bytes)에서 SCREENSHOT_VARIANT_WIDTHS 너비별 WebP/JPEG 축소본을 "{prefix}_{width}_{tag}.{fmt}"로 저장하고
+    {"webp": {"320": name, ...}, "jpeg": {...}}를 반환한다. 원본보다 넓은 너비는 만들지 않는다.
+    이미지가 아니면 빈 dict를 반환한다.
+    """
+    try:
+        with Image.open(BytesIO(content)) as opened:
+            opened.load()
+            image = opened.convert("RGB")
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.warning("Failed to decode screenshot for variants. prefix=%s", prefix)
+        return {}
+
+    widths = [width for width in variant_widths() if width < image.width] or [image.width]
+    variants = {fmt: {} for fmt in _VARIANT_FORMATS}
+    tags = {fmt: _variant_tag(fmt) for fmt in _VARIANT_FORMATS}
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in _VARIANT_FORMATS:
+            name = f"{prefix}_{width}_{tags[fmt]}.{fmt}"
+            variants[fmt][str(width)] = _write_immutable(name, _encode(resized, fmt))
+    return variants
+
+
+def compress_original(content: bytes) -> bytes | None:
+    """원본 PNG를 무손실로 다시 압축. 더 작아질 때만 반환"""
+    try:
+        with Image.open(BytesIO(content)) as image:
+            if image.format != "PNG":
+                return None
+            buf = BytesIO()
+            image.save(buf, format="PNG", optimize=True)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    compressed = buf.getvalue()
+    return compressed if len(compressed) < len(content) else None
+
+
+def replace_original(blob: ScreenshotBlob, compressed: bytes) -> str:
+    """
+    재압축한 원본을 새 이름(재압축 결과 내용 기준)으로 저장한 뒤, blob과 이를 가리키는 행의 이름을 한 트랜잭션에서 바꾼다.
+    같은 이름을 지우고 다시 쓰지 않으므로 immutable로 제공된 URL이 잠시 없어지거나 내용이 바뀌지 않음.
+    이전 파일은 지우지 않으며(retire_files로 기록) 그 이름을 반환
+    """
+    suffix = f"_{hashlib.sha256(compressed).hexdigest()[:12]}.png"
+    name = _write_immutable(blob_name(blob.sha256, suffix), compressed)
+    previous = blob.name
+    with transaction.atomic():
+        ScreenshotBlob.objects.filter(id=blob.id).update(name=name, size=len(compressed), updated_at=timezone.now())
+        blob.scans.update(screenshot=name, updated_at=timezone.now())
+    blob.name = name
+    blob.size = len(compressed)
+    return previous
+
+
+def _write_blob_files(digest: str, content: bytes) -> dict:
+    """원본/축소본 파일을 저장하고 blob 생성에 쓸 값을 반환. 이름이 내용 기준이라 다시 호출해도 같은 파일"""
+    stored = content
+    if getattr(settings, "SCREENSHOT_COMPRESS_ORIGINAL", False):
+        stored = compress_original(content) or content
+    return {
+        "name": _write_immutable(blob_name(digest), stored),
+        "size": len(stored),
+        "variants": build_variants(blob_name(digest, ""), stored),
+    }
+
+
+def acquire_blob(content: bytes, files: dict | None = None) -> ScreenshotBlob:
+    """
+    내용이 같은 blob이 있으면 참조 수만 늘리고, 없으면 원본/축소본을 저장한 새 blob을 만든다.
+    해시는 재압축 전 원본 기준이므로 같은 다운로드 결과는 설정과 관계없이 같은 blob을 사용.
+    files: 미리 저장해 둔 _write_blob_files 결과 (없으면 필요할 때 저장)
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    for _ in range(2):
+        if ScreenshotBlob.objects.filter(sha256=digest).update(refcount=F("refcount") + 1, updated_at=timezone.now()):
+            metrics.incr("screenshot_blob.deduplicated")
+            return ScreenshotBlob.objects.get(sha256=digest)
+
+        files = files or _write_blob_files(digest, content)
+        try:
+            with transaction.atomic():
+                blob = ScreenshotBlob.objects.create(sha256=digest, refcount=1, **files)
+        except IntegrityError:
+            # 다른 worker가 같은 blob을 먼저 만든 경우 참조 수 증가로 재시도 (파일은 같은 이름/내용)
+            continue
+        metrics.incr("screenshot_blob.created")
+        return blob
+    raise RuntimeError(f"스크린샷 blob을 저장할 수 없습니다. sha256={digest}")
+
+
+def release_blob(blob_id: int | None) -> None:
+    """참조 수만 줄인다. 파일 삭제는 유예 기간 후 migrate_screenshot_blobs --gc에서 처리(동시 재사용과 경합 방지)"""
+    if blob_id:
+        ScreenshotBlob.objects.filter(id=blob_id, refcount__gt=0).update(
+            refcount=F("refcount") - 1, updated_at=timezone.now(),
+        )
+
+
+def blob_files(blob: ScreenshotBlob) -> list[str]:
+    return [blob.name, *(name for names in (blob.variants or {}).values() for name in names.values())]
+
+
+def retire_files(blob: ScreenshotBlob, previous: set[str]) -> set[str]:
+    """
+    previous 중 더 이상 쓰지 않는 파일을 retired_files에 기록하고(다시 쓰게 된 파일은 기록에서 제외) 그 이름을 반환.
+    immutable URL을 캐시한 페이지/프록시가 있으므로 바로 지우지 않고 migrate_screenshot_blobs --gc에서 유예 기간 후 삭제
+    """
+    current = set(blob_files(blob))
+    replaced = previous - current
+    retired = {name: at for name, at in (blob.retired_files or {}).items() if name not in current}
+    retired.update((name, timezone.now().isoformat()) for name in replaced if name not in retired)
+    blob.retired_files = retired
+    return replaced
+
+
+def store_screenshot(scanned: URLScanIOResponse, content: bytes) -> None:
+    """
+    스크린샷을 내용 기준 blob으로 저장(중복이면 재사용)하고 행의 스크린샷 필드까지 저장한다.
+    참조 수 증가, blob 연결, 이전 blob 참조 해제를 한 트랜잭션에서 처리하여 중간에 실패하거나 같은 행을 동시에
+    갱신해도 참조 수가 실제 참조와 어긋나지 않게 함. 이미 같은 내용의 blob을 가리키고 있으면 참조 수를 늘리지 않는다.
+    스크린샷 필드는 여기서 저장하므로 호출 측 save의 update_fields에 넣지 않는다.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    # 축소본 인코딩/파일 쓰기는 행을 잠그기 전에 처리 (새 blob이 필요한 경우만)
+    files = None if ScreenshotBlob.objects.filter(sha256=digest).exists() else _write_blob_files(digest, content)
+    with transaction.atomic():
+        previous_blob_id = (
+            URLScanIOResponse.objects.select_for_update()
+            .filter(id=scanned.id)
+            .values_list("screenshot_blob_id", flat=True)
+            .first()
+        )
+        blob = None
+        if previous_blob_id:
+            blob = ScreenshotBlob.objects.filter(id=previous_blob_id, sha256=digest).first()
+        if blob is None:
+            blob = acquire_blob(content, files)
+            if previous_blob_id:
+                release_blob(previous_blob_id)
+        scanned.screenshot_blob = blob
+        scanned.screenshot = blob.name
+        scanned.screenshot_variants = blob.variants
+        scanned.screenshot_state = URLScanIOResponse.ScreenshotState.STORED
+        URLScanIOResponse.objects.filter(id=scanned.id).update(
+            screenshot_blob=blob,
+            screenshot=blob.name,
+            screenshot_variants=blob.variants,
+            screenshot_state=scanned.screenshot_state,
+            updated_at=timezone.now(),
+        )
+
+
+class EnumOutcome:
+    STORED = "stored"
+    RETRY = "retry"
+    GAVE_UP = "gave_up"
+    RATE_LIMITED = "rate_limited"
+
+
+def _setting(name: str, default: int) -> int:
+    return max(1, int(getattr(settings, name, default)))
+
+
+def _backoff_seconds(attempts: int) -> int:
+    base = _setting("SCREENSHOT_BACKFILL_BACKOFF_BASE", 60)
+    cap = _setting("SCREENSHOT_BACKFILL_BACKOFF_MAX", 6 * 3600)
+    return min(cap, base * 2 ** max(0, attempts - 1))
+
+
+def _read_cursor() -> int:
+    try:
+        return int(get_redis().get(_CURSOR_KEY) or 0)
+    except Exception:
+        logger.exception("Failed to read screenshot backfill cursor.")
+        return 0
+
+
+def _write_cursor(value: int) -> None:
+    try:
+        get_redis().set(_CURSOR_KEY, value)
+    except Exception:
+        logger.exception("Failed to write screenshot backfill cursor.")
+
+
+def _due_batch(cursor: int, batch_size: int) -> list[URLScanIOResponse]:
+    return list(
+        URLScanIOResponse.objects.filter(
+            Q(screenshot_next_attempt_at__isnull=True) | Q(screenshot_next_attempt_at__lte=timezone.now()),
+            status=URLScanIOResponse.Status.SUCCESS,
+            screenshot_state__in=(URLScanIOResponse.ScreenshotState.REMOTE, URLScanIOResponse.ScreenshotState.MISSING),
+            id__gt=cursor,
+        )
+        .order_by("id")
+        .only(
+            "id",
+            "url",
+            "scan_id",
+            "status",
+            "screenshot",
+            "screenshot_blob",
+            "screenshot_url",
+            "screenshot_state",
+            "screenshot_attempts",
+        )
+        [:batch_size]
+    )
+
+
+def _fetch(scan_id: str, screenshot_url: str) -> dict:
+    """
+    worker 스레드에서 HTTP 요청만 수행한다(DB 접근 없음).
+    반환: {"outcome", "result"(새로 조회한 urlscan 결과), "content", "error", "retry_after"}
+    """
+    fetched = {"outcome": EnumOutcome.RETRY, "result": None, "content": None, "error": "", "retry_after": None}
+    try:
+        if not screenshot_url:
+            result = get_urlscan_client().get_result(scan_id)
+            if not result:
+                fetched["error"] = "urlscan 결과가 아직 없습니다."
+                return fetched
+            fetched["result"] = result
+            task = result.get("task")
+            screenshot_url = task.get("screenshotURL") if isinstance(task, dict) else None
+            if not screenshot_url:
+                fetched["outcome"] = EnumOutcome.GAVE_UP
+                fetched["error"] = "urlscan 결과에 스크린샷이 없습니다."
+                return fetched
+
+        rate_limit.acquire("urlscan:screenshot", EnumPriority.BACKGROUND)
+        resp = get_http_session().get(screenshot_url, timeout=10)
+        if resp.status_code == 200 and resp.content:
+            fetched["outcome"] = EnumOutcome.STORED
+            fetched["content"] = resp.content
+        else:
+            if resp.status_code in _PERMANENT_STATUS_CODES:
+                fetched["outcome"] = EnumOutcome.GAVE_UP
+            fetched["error"] = f"스크린샷 다운로드 실패 (status={resp.status_code})"
+    except RateLimited as e:
+        fetched["outcome"] = EnumOutcome.RATE_LIMITED
+        fetched["retry_after"] = e.retry_after
+    except Exception as e:
+        # get_result의 410(삭제된 결과)은 재시도해도 복구되지 않음
+        if "(410)" in str(e):
+            fetched["outcome"] = EnumOutcome.GAVE_UP
+        fetched["error"] = str(e)
+    return fetched
+
+
+def _apply(scanned: URLScanIOResponse, fetched: dict) -> str:
+    """worker 결과를 호출 스레드에서 저장하고 최종 outcome을 반환"""
+    outcome = fetched["outcome"]
+    update_fields = ["screenshot_attempts", "screenshot_next_attempt_at", "updated_at"]
+    if fetched["result"]:
+        scanned.set_response(fetched["result"])
+        update_fields.append("response")
+
+    if outcome == EnumOutcome.STORED:
+        store_screenshot(scanned, fetched["content"])
+        scanned.screenshot_next_attempt_at = None
+    elif outcome == EnumOutcome.RATE_LIMITED:
+        # 요청 한도 초과는 시도 횟수에 포함하지 않음
+        scanned.screenshot_next_attempt_at = timezone.now() + timedelta(seconds=fetched["retry_after"] or 1)
+    else:
+        scanned.screenshot_attempts += 1
+        if outcome == EnumOutcome.RETRY and scanned.screenshot_attempts >= _setting("SCREENSHOT_BACKFILL_MAX_ATTEMPTS", 8):
+            outcome = EnumOutcome.GAVE_UP
+        if outcome == EnumOutcome.GAVE_UP:
+            scanned.screenshot_state = URLScanIOResponse.ScreenshotState.GAVE_UP
+            scanned.screenshot_next_attempt_at = None
+            logger.info(
+                "Gave up screenshot backfill. url=%s attempts=%s error=%s",
+                scanned.url, scanned.screenshot_attempts, fetched["error"],
+            )
+        else:
+            scanned.screenshot_next_attempt_at = timezone.now() + timedelta(
+                seconds=_backoff_seconds(scanned.screenshot_attempts)
+            )
+        update_fields.append("screenshot_state")
+    scanned.save(update_fields=update_fields)
+
+    if outcome == EnumOutcome.STORED:
+        notify_urlscan_status(
+            scanned.url,
+            screenshot_ready=True,
+            screenshot_url=scanned.screenshot.url,
+            screenshot_srcset=scanned.screenshot_srcset,
+        )
+    return outcome
+
+
+def backfill() -> dict:
+    """
+    완료된 urlscan 중 스크린샷이 없는 행을 보충한다.
+    - next_attempt_at이 지난 행만 id 순서로 최대 SCREENSHOT_BACKFILL_BATCH_SIZE개 조회(keyset cursor)
+    - 다운로드는 SCREENSHOT_BACKFILL_CONCURRENCY개까지 동시에 수행
+    - 실패 시 지수 backoff, SCREENSHOT_BACKFILL_MAX_ATTEMPTS회 또는 영구 실패 시 GAVE_UP
+    """
+    token = locks.acquire(_LOCK_NAME, timeout=_setting("SCREENSHOT_BACKFILL_LOCK_TIMEOUT", 300))
+    if not token:
+        # 이전 실행이 아직 진행 중
+        metrics.incr("screenshot_backfill.skipped")
+        return {"status": "skipped"}
+
+    started = time.monotonic()
+    counts = {
+        EnumOutcome.STORED: 0,
+        EnumOutcome.RETRY: 0,
+        EnumOutcome.GAVE_UP: 0,
+        EnumOutcome.RATE_LIMITED: 0,
+    }
+    try:
+        batch_size = _setting("SCREENSHOT_BACKFILL_BATCH_SIZE", 50)
+        cursor = _read_cursor()
+        batch = _due_batch(cursor, batch_size)
+        if not batch and cursor:
+            # 마지막 행까지 처리했으면 처음부터 다시
+            cursor = 0
+            batch = _due_batch(cursor, batch_size)
+        _write_cursor(batch[-1].id if len(batch) == batch_size else 0)
+
+        concurrency = min(len(batch), _setting("SCREENSHOT_BACKFILL_CONCURRENCY", 4)) or 1
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="screenshot-backfill") as executor:
+            futures = [
+                (scanned, executor.submit(_fetch, str(scanned.scan_id), scanned.screenshot_url))
+                for scanned in batch
+            ]
+            for scanned, future in futures:
+                try:
+                    counts[_apply(scanned, future.result())] += 1
+                except Exception:
+                    logger.exception("Failed to store screenshot backfill result. url=%s", scanned.url)
+    finally:
+        locks.release(_LOCK_NAME, token)
+
+    elapsed_ms = int((time.monotonic() - started) * 1000)
+    checked = sum(counts.values())
+    metrics.incr("screenshot_backfill.runs")
+    metrics.incr("screenshot_backfill.checked", checked)
+    metrics.incr("screenshot_backfill.duration_ms", elapsed_ms)
+    for outcome, count in counts.items():
+        if count:
+            metrics.incr(f"screenshot_backfill.{outcome}", count)
+    return {"status": "done", "checked": checked, "elapsed_ms": elapsed_ms, **counts}
+
+
+def backlog_stats() -> dict:
+    """스크린샷 상태별 행 수 (REMOTE/MISSING이 보충 대상, GAVE_UP은 포기한 행)"""
+    counts = dict(
+        URLScanIOResponse.objects.order_by()
+        .values_list("screenshot_state")
+        .annotate(count=Count("id"))
+        .values_list("screenshot_state", "count")
+    )
+    return {state: counts.get(state, 0) for state in URLScanIOResponse.ScreenshotState.values}
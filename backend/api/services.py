@@ -1,29 +1,39 @@
 
-import json
+import logging
+import os
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
 
-import requests
-
-from django.core.files.base import ContentFile
-from django.db import IntegrityError
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connections
 
+from . import blocklist, circuit_breaker, metrics, parsing, screenshots, triage, verdict_cache, ws
+from .canonical import url_hash
 from .clients import (
     URLScanIOClient,
-    OpenAIClient,
-    GeminiClient,
     EnumModel,
+    get_gemini_client,
+    get_http_session,
+    get_openai_client,
+    get_urlscan_client,
     # EnumOpenAIModel,
     # EnumGeminiModel,
 )
 from .models import (
     URLScanIOResponse,
     EnumCategory,
+    EnumTier,
     OpenAIResponse,
     GeminiResponse,
     GeneratedReport,
     ScannedURL,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def _serialize_openai_response(response):
     try:
@@ -62,172 +72,522 @@ def _extract_gemini_text(response):
     return None
 
 
-def urlscanio_request(
-    ip: str,
-    url: str,
-    retries: int = 2,
-    poll_delay: int = 10,
-    poll_interval: int = 2,
-    poll_timeout: int = 120,
-):
+def _attach_urlscan_screenshot(scanned: URLScanIOResponse, client: URLScanIOClient) -> None:
+    """스크린샷을 받아 blob으로 저장 (스크린샷 필드는 store_screenshot에서 저장)"""
+    screenshot_bytes = client.screenshot(str(scanned.scan_id))
+    if not screenshot_bytes:
+        if not scanned.screenshot_url:
+            return
+        resp = get_http_session().get(scanned.screenshot_url, timeout=10)
+        if resp.status_code != 200:
+            return
+        screenshot_bytes = resp.content
+    screenshots.store_screenshot(scanned, screenshot_bytes)
+
+
+def urlscanio_submit(ip: str, url: str) -> URLScanIOResponse:
+    """
+    - 진행 중(SUBMITTED)이거나 완료된 스캔이 있으면 재제출하지 않고 그대로 반환(재개)
+    - 실패(FAILURE)한 스캔만 새로 제출
+    """
     if not url:
         raise ValueError("URL은 필수 입력값입니다.")
-    last_error = None
-    for _ in range(max(0, retries) + 1):
-        try:
-            urlscan_client = URLScanIOClient()
-            scanned = URLScanIOResponse.objects.filter(url=url).first()
-            if scanned:
-                if not scanned.screenshot and scanned.scan_id:
-                    screenshot_bytes = urlscan_client.screenshot(str(scanned.scan_id))
-                    if screenshot_bytes:
-                        screenshot_name = f"{scanned.scan_id}.png"
-                        scanned.screenshot = ContentFile(screenshot_bytes, name=screenshot_name)
-                        scanned.save(update_fields=["screenshot", "updated_at"])
-                    else:
-                        task = (scanned.response or {}).get("task")
-                        screenshot_url = task.get("screenshotURL") if task else None
-                        if screenshot_url:
-                            resp = requests.get(screenshot_url, timeout=10)
-                            if resp.status_code == 200:
-                                screenshot_name = f"{scanned.scan_id}.png"
-                                scanned.screenshot = ContentFile(resp.content, name=screenshot_name)
-                                scanned.save(update_fields=["screenshot", "updated_at"])
-                return scanned
-
-            submit_response = urlscan_client.scan_url(url=url)
-            scan_id = submit_response.get("uuid") or submit_response.get("task", {}).get("uuid")
-            if not scan_id:
-                raise RuntimeError("urlscan 응답에 scan_id가 없습니다.")
-
-            time.sleep(max(0, poll_delay))
-            deadline = time.monotonic() + max(1, poll_timeout)
-            result = None
-            while time.monotonic() < deadline:
-                result = urlscan_client.get_result(scan_id)
-                if result:
-                    break
-                time.sleep(max(1, poll_interval))
-
-            if not result:
-                raise TimeoutError("urlscan 결과 대기 시간이 초과되었습니다.")
-
-            screenshot_content = None
-            screenshot_bytes = urlscan_client.screenshot(scan_id)
-            if screenshot_bytes:
-                screenshot_name = f"{scan_id}.png"
-                screenshot_content = ContentFile(screenshot_bytes, name=screenshot_name)
-
-            urlscan_io_response = URLScanIOResponse(
-                url=url,
-                ip=ip,
-                scan_id=scan_id,
-                response=result,
-            )
-            if screenshot_content:
-                urlscan_io_response.screenshot = screenshot_content
-            else:
-                task = result.get("task")
-                if task and task.get("screenshotURL"):
-                    screenshot_url = task["screenshotURL"]
-                    if not screenshot_bytes:
-                        resp = requests.get(screenshot_url, timeout=10)
-                        if resp.status_code == 200:
-                            screenshot_name = f"{scan_id}.png"
-                            screenshot_content = ContentFile(resp.content, name=screenshot_name)
-                            urlscan_io_response.screenshot = screenshot_content
-            try:
-                urlscan_io_response.save()
-            except IntegrityError:
-                return URLScanIOResponse.objects.get(url=url)
-            return urlscan_io_response
-        except Exception as e:
-            last_error = e
-            continue
-    if last_error:
-        raise last_error
+    key = url_hash(url)
+    scanned = URLScanIOResponse.objects.filter(url_hash=key).first()
+    if scanned and scanned.status != URLScanIOResponse.Status.FAILURE:
+        return scanned
+
+    submit_response = get_urlscan_client().scan_url(url=url)
+    scan_id = submit_response.get("uuid") or submit_response.get("task", {}).get("uuid")
+    if not scan_id:
+        raise RuntimeError("urlscan 응답에 scan_id가 없습니다.")
+
+    if scanned:
+        scanned.ip = ip
+        scanned.scan_id = scan_id
+        scanned.status = URLScanIOResponse.Status.SUBMITTED
+        scanned.poll_count = 0
+        scanned.last_error = ""
+        scanned.set_response(None)
+        scanned.screenshot_attempts = 0
+        scanned.screenshot_next_attempt_at = None
+        scanned.save(update_fields=[
+            "ip",
+            "scan_id",
+            "status",
+            "poll_count",
+            "last_error",
+            "response",
+            "screenshot_attempts",
+            "screenshot_next_attempt_at",
+            "updated_at",
+        ])
+        return scanned
+
+    scanned = URLScanIOResponse(url=url, ip=ip, scan_id=scan_id)
+    try:
+        scanned.save()
+    except IntegrityError:
+        return URLScanIOResponse.objects.get(url_hash=key)
+    return scanned
+
+
+def urlscanio_poll(url: str) -> tuple[URLScanIOResponse, bool]:
+    """
+    결과 조회를 한 번만 수행하고 (레코드, 완료 여부)를 반환한다. 대기(sleep)는 호출 측에서 countdown으로 처리.
+    """
+    scanned = URLScanIOResponse.objects.get(url_hash=url_hash(url))
+    client = get_urlscan_client()
+    if scanned.status == URLScanIOResponse.Status.SUCCESS:
+        if not scanned.screenshot:
+            _attach_urlscan_screenshot(scanned, client)
+        return scanned, True
+
+    result = client.get_result(str(scanned.scan_id))
+    if not result:
+        scanned.poll_count += 1
+        scanned.save(update_fields=["poll_count", "updated_at"])
+        return scanned, False
+
+    scanned.set_response(result)
+    scanned.status = URLScanIOResponse.Status.SUCCESS
+    scanned.last_error = ""
+    _attach_urlscan_screenshot(scanned, client)
+    scanned.save(update_fields=["response", "status", "last_error", "updated_at"])
+    return scanned, True
+
+
+def urlscanio_fail(url: str, error: str) -> None:
+    URLScanIOResponse.objects.filter(url_hash=url_hash(url)).exclude(
+        status=URLScanIOResponse.Status.SUCCESS,
+    ).update(status=URLScanIOResponse.Status.FAILURE, last_error=error)
+
+
+class EnumEscalation:
+    INVALID = "invalid"
+    UNCERTAIN = "uncertain"
+    LOW_CONFIDENCE = "low_confidence"
+
+
+def first_tier() -> str:
+    return EnumTier.LITE if getattr(settings, "MODEL_TIERING_ENABLED", True) else EnumTier.HEAVY
+
+
+def _scan_escalation_reason(result: dict | None) -> str | None:
+    """lite 응답을 그대로 사용할 수 없으면 heavy로 넘길 사유를, 사용 가능하면 None을 반환한다."""
+    if result is None:
+        return EnumEscalation.INVALID
+    if result["threat_score"] == 2:
+        return EnumEscalation.UNCERTAIN
+    confidence = result.get("confidence")
+    if confidence is None or confidence < float(getattr(settings, "MODEL_TIER_CONFIDENCE_THRESHOLD", 70)):
+        return EnumEscalation.LOW_CONFIDENCE
+    return None
 
 
-def _scan_url_with_openai(
+def _report_escalation_reason(result: dict | None) -> str | None:
+    if result is None:
+        return EnumEscalation.INVALID
+    return None
+
+
+def _accept_tier(ai_response, tier: str, reason: str | None) -> bool:
+    """heavy 응답이거나 사유가 없으면 수용. lite 응답을 넘기는 경우 사유를 응답 레코드에 남긴다."""
+    if tier == EnumTier.HEAVY or reason is None:
+        return True
+    ai_response.escalation_reason = reason
+    ai_response.save(update_fields=["escalation_reason", "updated_at"])
+    return False
+
+
+def _response_latency_ms(response) -> int | None:
+    """배경 모드 응답의 생성 시각부터 완료 확인 시점까지의 지연(ms)"""
+    created_at = getattr(response, "created_at", None)
+    if not created_at:
+        return None
+    return max(0, int((time.time() - float(created_at)) * 1000))
+
+
+def _save_openai_response(
     ip: str,
+    category: str,
     url: str,
-):
-    client = OpenAIClient()
-    response = client.scan_url(url=url)
-    output_text = response.output_text
+    prompt: str,
+    response,
+    tier: str = "",
+    latency_ms: int | None = None,
+) -> OpenAIResponse:
     openai_response = OpenAIResponse(
         ip=ip,
-        category=EnumCategory.SCAN_URL,
+        category=category,
         url=url,
-        prompt=url,
-        response=output_text,
+        prompt=prompt,
+        response=response.output_text,
         response_detail=_serialize_openai_response(response),
+        tier=tier,
+        latency_ms=latency_ms,
     )
     openai_response.save()
     return openai_response
 
 
-def _scan_url_with_gemini(
+def _save_gemini_response(
     ip: str,
+    category: str,
     url: str,
-):
-    client = GeminiClient()
-    response = client.scan_url(url=url)
-    output_text = _extract_gemini_text(response)
+    prompt: str,
+    response,
+    tier: str = "",
+    latency_ms: int | None = None,
+) -> GeminiResponse:
     gemini_response = GeminiResponse(
         ip=ip,
-        category=EnumCategory.SCAN_URL,
+        category=category,
         url=url,
-        prompt=url,
-        response=output_text,
+        prompt=prompt,
+        response=_extract_gemini_text(response),
         response_detail=_serialize_gemini_response(response),
+        tier=tier,
+        latency_ms=latency_ms,
     )
     gemini_response.save()
     return gemini_response
 
 
+def _repair_response(category: str, ai_response) -> dict | None:
+    """
+    JSON 추출/검증에 실패한 응답을 같은 provider의 lite 모델에 교정만 요청한다(웹 검색 없음).
+    교정 요청도 응답 레코드(category=repair_json)로 남긴다.
+    """
+    if not getattr(settings, "JSON_REPAIR_ENABLED", True) or not ai_response.response:
+        return None
+    is_gemini = isinstance(ai_response, GeminiResponse)
+    client = get_gemini_client() if is_gemini else get_openai_client()
+    save = _save_gemini_response if is_gemini else _save_openai_response
+    started = time.monotonic()
+    response = client.repair_json(category, ai_response.response)
+    latency_ms = int((time.monotonic() - started) * 1000)
+    repaired = save(
+        ai_response.ip, EnumCategory.REPAIR_JSON, ai_response.url, ai_response.response, response,
+        EnumTier.LITE, latency_ms,
+    )
+    try:
+        result = parsing.parse(category, repaired.response)
+    except parsing.ParseError:
+        metrics.incr(f"parsing.{category}.repair_failed")
+        return None
+    metrics.incr(f"parsing.{category}.repaired")
+    return result
+
+
+def _parse_response(category: str, ai_response) -> dict | None:
+    """응답을 용도별 스키마로 파싱한다. 실패하면 교정을 1회 요청하고, 그래도 실패하면 None을 반환한다."""
+    try:
+        return parsing.parse(category, ai_response.response)
+    except parsing.ParseError as e:
+        logger.warning("Failed to parse %s response. id=%s error=%s", category, ai_response.pk, e)
+        metrics.incr(f"parsing.{category}.invalid")
+    return _repair_response(category, ai_response)
+
+
+def _parse_accepted(category: str, ai_response, tier: str, escalation_reason) -> tuple[dict | None, bool]:
+    """(파싱 결과, 해당 tier 응답 수용 여부). heavy 응답도 파싱할 수 없으면 ParseError를 발생시킨다."""
+    result = _parse_response(category, ai_response)
+    if result is None and tier == EnumTier.HEAVY:
+        raise parsing.ParseError(f"{category} 응답을 파싱할 수 없습니다. id={ai_response.pk}")
+    return result, _accept_tier(ai_response, tier, escalation_reason(result))
+
+
+def _report_prompt(
+    url: str,
+    site_name: str,
+    threat_type: str,
+    description: str,
+    threat_score: int,
+) -> str:
+    return str({
+        "url": url,
+        "site_name": site_name,
+        "threat_type": threat_type,
+        "description": description,
+        "threat_score": threat_score,
+    })
+
+
+def _scan_url_with_openai(
+    ip: str,
+    url: str,
+    tier: str = EnumTier.HEAVY,
+):
+    client = get_openai_client()
+    started = time.monotonic()
+    response = client.scan_url(url=url, tier=tier)
+    latency_ms = int((time.monotonic() - started) * 1000)
+    return _save_openai_response(ip, EnumCategory.SCAN_URL, url, url, response, tier, latency_ms)
+
+
+def _scan_url_with_gemini(
+    ip: str,
+    url: str,
+    tier: str = EnumTier.HEAVY,
+):
+    client = get_gemini_client()
+    started = time.monotonic()
+    response = client.scan_url(url=url, tier=tier)
+    latency_ms = int((time.monotonic() - started) * 1000)
+    return _save_gemini_response(ip, EnumCategory.SCAN_URL, url, url, response, tier, latency_ms)
+
+
+def _scan_url_tiered(ip: str, url: str, model: str):
+    scan = _scan_url_with_gemini if model == EnumModel.GEMINI else _scan_url_with_openai
+    tier = first_tier()
+    ai_response = scan(ip=ip, url=url, tier=tier)
+    result, accepted = _parse_accepted(EnumCategory.SCAN_URL, ai_response, tier, _scan_escalation_reason)
+    if accepted:
+        return ai_response, result
+    ai_response = scan(ip=ip, url=url, tier=EnumTier.HEAVY)
+    result, _ = _parse_accepted(EnumCategory.SCAN_URL, ai_response, EnumTier.HEAVY, _scan_escalation_reason)
+    return ai_response, result
+
+
+def _store_verdict(
+    url: str,
+    model: str,
+    site_name: str | None,
+    threat_type: str | None,
+    description: str | None,
+    threat_score: int | None,
+    ai_response=None,
+) -> ScannedURL:
+    defaults = {
+        "url": url,
+        "site_name": site_name,
+        "threat_type": threat_type,
+        "description": description,
+        "threat_score": threat_score,
+        "model": model,
+        "is_edit": False,
+        "openai_response": ai_response if isinstance(ai_response, OpenAIResponse) else None,
+        "gemini_response": ai_response if isinstance(ai_response, GeminiResponse) else None,
+    }
+    key = url_hash(url)
+    try:
+        scanned_url, _ = ScannedURL.objects.update_or_create(url_hash=key, defaults=defaults)
+    except IntegrityError:
+        scanned_url = ScannedURL.objects.filter(url_hash=key).first()
+        if scanned_url is None:
+            raise
+    verdict_cache.invalidate(key)
+    # 상태 문서 갱신과 알림을 함께 처리 (문서만 먼저 바꾸면 이후 같은 값의 알림이 중복으로 간주되어 전송되지 않음)
+    ws.notify_qr_scan_status(
+        url,
+        is_processing=False,
+        job_status="SCANNED",
+        site_name=scanned_url.site_name,
+        threat_type=scanned_url.threat_type,
+        description=scanned_url.description,
+        threat_score=scanned_url.threat_score,
+        error=None,
+    )
+    return scanned_url
+
+
+def _save_scanned_url(url: str, model: str, ai_response, result: dict) -> ScannedURL:
+    return _store_verdict(
+        url,
+        model,
+        site_name=result["site_name"],
+        threat_type=result["threat_type"],
+        description=result["description"],
+        threat_score=result["threat_score"],
+        ai_response=ai_response,
+    )
+
+
+def triage_scan(url: str) -> ScannedURL | None:
+    """
+    LLM 호출 전 로컬 판정(차단 목록, 허용 도메인). 해당하는 URL만 즉시 저장하고
+    나머지는 None을 반환하여 LLM 분석으로 넘긴다.
+    """
+    host = urlsplit(url).hostname or url
+    matched = blocklist.lookup(url)
+    if matched is not None:
+        return _store_verdict(
+            url,
+            EnumModel.BLOCKLIST,
+            site_name=host,
+            threat_type="피싱",
+            description=(
+                "신고된 피싱/악성 URL 목록에 등록된 주소"
+                if matched == blocklist.EnumBlocklistMatch.URL
+                else "신고된 피싱/악성 도메인 목록에 등록된 도메인"
+            ),
+            threat_score=3,
+        )
+
+    if not getattr(settings, "TRIAGE_ENABLED", True) or not triage.is_allowlisted(url):
+        return None
+    return _store_verdict(
+        url,
+        EnumModel.HEURISTIC,
+        site_name=host,
+        threat_type="안전",
+        description="검증된 공식 도메인",
+        threat_score=1,
+    )
+
+
+def record_openai_scan(ip: str, url: str, response, tier: str = EnumTier.HEAVY) -> ScannedURL | None:
+    """
+    배경 모드로 완료된 OpenAI 스캔 응답을 저장하고 판정 결과를 반영한다.
+    lite 응답이 불확실하면 판정을 반영하지 않고 None을 반환한다(호출 측에서 heavy로 재요청).
+    heavy 응답을 교정 후에도 파싱할 수 없으면 parsing.ParseError를 발생시킨다.
+    """
+    openai_response = _save_openai_response(
+        ip, EnumCategory.SCAN_URL, url, url, response, tier, _response_latency_ms(response),
+    )
+    result, accepted = _parse_accepted(EnumCategory.SCAN_URL, openai_response, tier, _scan_escalation_reason)
+    if not accepted:
+        return None
+    return _save_scanned_url(url, EnumModel.OPENAI, openai_response, result)
+
+
+def _provider_configured(model: str) -> bool:
+    key_name = "GEMINI_API_KEY" if model == EnumModel.GEMINI else "OPENAI_API_KEY"
+    return bool(getattr(settings, key_name, None))
+
+
+def _route_provider(model: str) -> str:
+    """
+    provider의 circuit breaker가 열려 있으면 다른 provider로 우회한다. 둘 다 열려 있으면 원래 provider를
+    그대로 반환하여 호출 시 CircuitOpenError가 발생하도록 한다(task는 차단 해제 이후로 재시도).
+    """
+    if not circuit_breaker.is_open(model):
+        return model
+    alternate = EnumModel.GEMINI if model == EnumModel.OPENAI else EnumModel.OPENAI
+    if _provider_configured(alternate) and not circuit_breaker.is_open(alternate):
+        metrics.incr(f"circuit.{model}.rerouted")
+        return alternate
+    return model
+
+
+def hedging_enabled() -> bool:
+    """두 provider 키가 모두 있어야 hedging 가능"""
+    return bool(
+        getattr(settings, "SCAN_HEDGE_ENABLED", False)
+        and getattr(settings, "OPENAI_API_KEY", None)
+        and getattr(settings, "GEMINI_API_KEY", None)
+    )
+
+
+_hedge_executor = None
+_hedge_executor_pid = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    # fork 이전에 만든 스레드 풀은 자식 프로세스에서 동작하지 않으므로 프로세스별로 생성
+    global _hedge_executor, _hedge_executor_pid
+    if _hedge_executor is None or _hedge_executor_pid != os.getpid():
+        with _hedge_executor_lock:
+            if _hedge_executor is None or _hedge_executor_pid != os.getpid():
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=int(getattr(settings, "SCAN_HEDGE_MAX_WORKERS", 8)),
+                    thread_name_prefix="scan-hedge",
+                )
+                _hedge_executor_pid = os.getpid()
+    return _hedge_executor
+
+
+def _latency_p95_ms(model: str) -> int | None:
+    response_model = GeminiResponse if model == EnumModel.GEMINI else OpenAIResponse
+    latencies = sorted(
+        response_model.objects.filter(category=EnumCategory.SCAN_URL, latency_ms__isnull=False)
+        .order_by("-created_at")
+        .values_list("latency_ms", flat=True)[:int(getattr(settings, "SCAN_HEDGE_SAMPLE_SIZE", 200))]
+    )
+    if len(latencies) < 20:
+        return None
+    return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+
+def _hedge_delay(model: str) -> float:
+    """
+    보조 provider 호출까지 대기할 시간(초). SCAN_HEDGE_DELAY가 "auto"면 주 provider의
+    최근 스캔 응답 지연 p95를 사용하고(1분 캐시), 표본이 부족하면 SCAN_HEDGE_FALLBACK_DELAY를 사용한다.
+    """
+    delay = getattr(settings, "SCAN_HEDGE_DELAY", "auto")
+    if delay != "auto":
+        return float(delay)
+    fallback = float(getattr(settings, "SCAN_HEDGE_FALLBACK_DELAY", 8))
+    cache_key = f"scan_hedge:p95:{model}"
+    p95_ms = cache.get(cache_key)
+    if p95_ms is None:
+        p95_ms = _latency_p95_ms(model) or 0
+        cache.set(cache_key, p95_ms, timeout=60)
+    return max(1.0, p95_ms / 1000) if p95_ms else fallback
+
+
+def _scan_url_attempt(ip: str, url: str, model: str):
+    """hedging 스레드에서 실행. 유효한 (응답 레코드, 파싱 결과)만 반환하고 그 외에는 예외를 발생시킨다."""
+    try:
+        return _scan_url_tiered(ip=ip, url=url, model=model)
+    finally:
+        # 스레드별 DB 연결이 남지 않도록 정리
+        connections.close_all()
+
+
+def _scan_url_hedged(ip: str, url: str, model: str):
+    """
+    주 provider 호출 후 지연 p95가 지나도(또는 먼저 실패하면) 응답이 없으면 보조 provider에도 같은 스캔을 요청하고,
+    먼저 도착한 유효한 응답을 사용한다. 늦게 끝난 쪽도 응답 레코드는 감사용으로 저장된다.
+    반환: (응답한 provider, 응답 레코드, 파싱 결과)
+    """
+    secondary = EnumModel.GEMINI if model == EnumModel.OPENAI else EnumModel.OPENAI
+    executor = _get_hedge_executor()
+    pending = {executor.submit(_scan_url_attempt, ip, url, model): model}
+    done, _ = wait(pending, timeout=_hedge_delay(model))
+    if not done or next(iter(done)).exception() is not None:
+        pending[executor.submit(_scan_url_attempt, ip, url, secondary)] = secondary
+
+    error = None
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            provider = pending.pop(future)
+            if future.exception() is None:
+                # 남은 요청은 취소할 수 없으므로(진행 중인 HTTP 호출) 결과만 무시
+                for other in pending:
+                    other.cancel()
+                return (provider, *future.result())
+            error = future.exception()
+    raise error
+
+
+# 교정 요청으로도 복구하지 못한 응답을 다시 스캔하는 횟수. 다시 스캔은 웹 검색을 포함한 전체 호출이므로 1회로 제한
+_PARSE_RESCANS = 1
+
+
 def scan_url(
     ip: str,
     url: str,
     model: str = EnumModel.OPENAI,
-    retries: int = 3,
 ):
-    try:
-        if model == EnumModel.OPENAI:
-            ai_response = _scan_url_with_openai(ip=ip, url=url)
-        elif model == EnumModel.GEMINI:
-            ai_response = _scan_url_with_gemini(ip=ip, url=url)
-        else:
-            ai_response = _scan_url_with_openai(ip=ip, url=url)
-
-        result = json.loads(ai_response.response)
-        site_name = result["site_name"]
-        threat_type = result["threat_type"]
-        description = result["description"]
-        threat_score = result["threat_score"]
-
-        defaults = {
-            "site_name": site_name,
-            "threat_type": threat_type,
-            "description": description,
-            "threat_score": threat_score,
-            "model": model,
-            "is_edit": False,
-            "openai_response": ai_response if isinstance(ai_response, OpenAIResponse) else None,
-            "gemini_response": ai_response if isinstance(ai_response, GeminiResponse) else None,
-        }
+    if model != EnumModel.GEMINI:
+        model = EnumModel.OPENAI
+    model = _route_provider(model)
+    for attempt in range(_PARSE_RESCANS + 1):
         try:
-            scanned_url, _ = ScannedURL.objects.update_or_create(url=url, defaults=defaults)
-        except IntegrityError:
-            scanned_url = ScannedURL.objects.filter(url=url).first()
-            if scanned_url is None:
+            if hedging_enabled():
+                winner, ai_response, result = _scan_url_hedged(ip=ip, url=url, model=model)
+                return _save_scanned_url(url, winner, ai_response, result)
+            ai_response, result = _scan_url_tiered(ip=ip, url=url, model=model)
+            return _save_scanned_url(url, model, ai_response, result)
+        except parsing.ParseError:
+            # provider 오류/한도 초과는 호출 측(task)의 backoff로 재시도
+            if attempt >= _PARSE_RESCANS:
                 raise
-        return scanned_url
-    except Exception as e:
-        if retries > 0:
-            return scan_url(ip, url, model=model, retries=retries - 1)
-        else:
-            raise e
+            metrics.incr(f"parsing.{EnumCategory.SCAN_URL}.rescanned")
 
 
 def _generate_report_with_openai(
@@ -237,32 +597,21 @@ def _generate_report_with_openai(
     threat_type: str,
     description: str,
     threat_score: int,
+    tier: str = EnumTier.HEAVY,
 ):
-    client = OpenAIClient()
+    client = get_openai_client()
+    started = time.monotonic()
     response = client.generate_report(
         url=url,
         site_name=site_name,
         threat_type=threat_type,
         description=description,
-        threat_score=threat_score
-    )
-    output_text = response.output_text
-    openai_response = OpenAIResponse(
-        ip=ip,
-        category=EnumCategory.GENERATE_REPORT,
-        url=url,
-        prompt=str({
-            "url": url,
-            "site_name": site_name,
-            "threat_type": threat_type,
-            "description": description,
-            "threat_score": threat_score,
-        }),
-        response=output_text,
-        response_detail=_serialize_openai_response(response),
+        threat_score=threat_score,
+        tier=tier,
     )
-    openai_response.save()
-    return openai_response
+    latency_ms = int((time.monotonic() - started) * 1000)
+    prompt = _report_prompt(url, site_name, threat_type, description, threat_score)
+    return _save_openai_response(ip, EnumCategory.GENERATE_REPORT, url, prompt, response, tier, latency_ms)
 
 
 def _generate_report_with_gemini(
@@ -272,32 +621,103 @@ def _generate_report_with_gemini(
     threat_type: str,
     description: str,
     threat_score: int,
+    tier: str = EnumTier.HEAVY,
 ):
-    client = GeminiClient()
+    client = get_gemini_client()
+    started = time.monotonic()
     response = client.generate_report(
         url=url,
         site_name=site_name,
         threat_type=threat_type,
         description=description,
-        threat_score=threat_score
+        threat_score=threat_score,
+        tier=tier,
     )
-    output_text = _extract_gemini_text(response)
-    gemini_response = GeminiResponse(
+    latency_ms = int((time.monotonic() - started) * 1000)
+    prompt = _report_prompt(url, site_name, threat_type, description, threat_score)
+    return _save_gemini_response(ip, EnumCategory.GENERATE_REPORT, url, prompt, response, tier, latency_ms)
+
+
+def _generate_report_tiered(
+    ip: str,
+    url: str,
+    site_name: str,
+    threat_type: str,
+    description: str,
+    threat_score: int,
+    model: str,
+):
+    generate = _generate_report_with_gemini if model == EnumModel.GEMINI else _generate_report_with_openai
+    tier = first_tier()
+    kwargs = dict(
         ip=ip,
-        category=EnumCategory.GENERATE_REPORT,
         url=url,
-        prompt=str({
+        site_name=site_name,
+        threat_type=threat_type,
+        description=description,
+        threat_score=threat_score,
+    )
+    ai_response = generate(**kwargs, tier=tier)
+    result, accepted = _parse_accepted(EnumCategory.GENERATE_REPORT, ai_response, tier, _report_escalation_reason)
+    if accepted:
+        return ai_response, result
+    ai_response = generate(**kwargs, tier=EnumTier.HEAVY)
+    result, _ = _parse_accepted(EnumCategory.GENERATE_REPORT, ai_response, EnumTier.HEAVY, _report_escalation_reason)
+    return ai_response, result
+
+
+def _strip_empty_links(text: str) -> str:
+    return (text
+            .replace("[]()", "")
+            .replace("()[]", "")
+            .replace("[]", "")
+            .replace("()", ""))
+
+
+def _save_generated_report(url: str, ai_response, result: dict) -> GeneratedReport:
+    # 모델이 응답한 url 표기와 무관하게 요청 URL의 키로 저장
+    generated_report, _ = GeneratedReport.objects.update_or_create(
+        url_hash=url_hash(url),
+        defaults={
             "url": url,
-            "site_name": site_name,
-            "threat_type": threat_type,
-            "description": description,
-            "threat_score": threat_score,
-        }),
-        response=output_text,
-        response_detail=_serialize_gemini_response(response),
+            "site_name": result["site_name"],
+            "threat_type": result["threat_type"],
+            "description": _strip_empty_links(result["description"]),
+            "probability": result["probability"],
+            "reason": _strip_empty_links(result["reason"]),
+            "depth": result["depth"],
+            "openai_response": ai_response if isinstance(ai_response, OpenAIResponse) else None,
+            "gemini_response": ai_response if isinstance(ai_response, GeminiResponse) else None,
+            "is_processed": True,
+        },
     )
-    gemini_response.save()
-    return gemini_response
+    return generated_report
+
+
+def record_openai_report(
+    ip: str,
+    url: str,
+    site_name: str,
+    threat_type: str,
+    description: str,
+    threat_score: int,
+    response,
+    tier: str = EnumTier.HEAVY,
+) -> GeneratedReport | None:
+    """
+    배경 모드로 완료된 OpenAI 보고서 응답을 저장하고 GeneratedReport에 반영한다.
+    lite 응답이 형식 검증에 실패하면 None을 반환한다(호출 측에서 heavy로 재요청).
+    """
+    prompt = _report_prompt(url, site_name, threat_type, description, int(threat_score))
+    openai_response = _save_openai_response(
+        ip, EnumCategory.GENERATE_REPORT, url, prompt, response, tier, _response_latency_ms(response),
+    )
+    result, accepted = _parse_accepted(
+        EnumCategory.GENERATE_REPORT, openai_response, tier, _report_escalation_reason,
+    )
+    if not accepted:
+        return None
+    return _save_generated_report(url, openai_response, result)
 
 
 def generate_report(
@@ -308,68 +728,14 @@ def generate_report(
     description: str,
     threat_score: int,
     model: str = EnumModel.OPENAI,
-    retries: int = 3
 ):
-    try:
-        threat_score = int(threat_score)
-        ai_response = None
-        if model == EnumModel.OPENAI:
-            ai_response = _generate_report_with_openai(
-                ip=ip,
-                url=url,
-                site_name=site_name,
-                threat_type=threat_type,
-                description=description,
-                threat_score=threat_score
-            )
-        elif model == EnumModel.GEMINI:
-            ai_response = _generate_report_with_gemini(
-                ip=ip,
-                url=url,
-                site_name=site_name,
-                threat_type=threat_type,
-                description=description,
-                threat_score=threat_score
-            )
-        else:
-            ai_response = _generate_report_with_openai(
-                ip=ip,
-                url=url,
-                site_name=site_name,
-                threat_type=threat_type,
-                description=description,
-                threat_score=threat_score
-            )
-
-        result = json.loads(ai_response.response)
-        result_description = (result["description"]
-                                    .replace("[]()", "")
-                                    .replace("()[]", "")
-                                    .replace("[]", "")
-                                    .replace("()", ""))
-        result_reason = (result["reason"]
-                                .replace("[]()", "")
-                                .replace("()[]", "")
-                                .replace("[]", "")
-                                .replace("()", ""))
-
-        generated_report, _ = GeneratedReport.objects.update_or_create(
-            url=result["url"],
-            defaults={
-                "site_name": result["site_name"],
-                "threat_type": result["threat_type"],
-                "description": result_description,
-                "probability": result["probability"],
-                "reason": result_reason,
-                "depth": result["depth"],
-                "openai_response": ai_response if isinstance(ai_response, OpenAIResponse) else None,
-                "gemini_response": ai_response if isinstance(ai_response, GeminiResponse) else None,
-                "is_processed": True,
-            },
-        )
-    except Exception as e:
-        if retries > 0:
-            return generate_report(
+    threat_score = int(threat_score)
+    if model != EnumModel.GEMINI:
+        model = EnumModel.OPENAI
+    model = _route_provider(model)
+    for attempt in range(_PARSE_RESCANS + 1):
+        try:
+            ai_response, result = _generate_report_tiered(
                 ip=ip,
                 url=url,
                 site_name=site_name,
@@ -377,9 +743,9 @@ def generate_report(
                 description=description,
                 threat_score=threat_score,
                 model=model,
-                retries=retries - 1,
             )
-        else:
-            raise e
-    return generated_report
-
+            return _save_generated_report(url, ai_response, result)
+        except parsing.ParseError:
+            if attempt >= _PARSE_RESCANS:
+                raise
+            metrics.incr(f"parsing.{EnumCategory.GENERATE_REPORT}.rescanned")
@@ -0,0 +1,246 @@
+import json
+import logging
+
+from django.conf import settings
+
+from . import locks
+from .canonical import url_hash
+from .models import GeneratedReport, ReportJob, ScannedURL, URLScanIOResponse
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# URL별 상태 문서(Redis hash). 필드 값은 JSON으로 저장하고, DB 기준으로 모든 필드를 채운 문서에만
+# _BUILT_FIELD가 있다. 쓰기 경로(services/tasks/report_queue/ws 알림)는 변경된 필드만 갱신하고,
+# 읽기 경로(consumers/GenerateReportView)는 문서가 없거나 미완성일 때만 DB에서 다시 만든다.
+_BUILT_FIELD = "_built"
+
+# 실제로 값이 바뀐 갱신마다 1씩 증가 (HINCRBY). 재구성(load_many)은 버전을 바꾸지 않음
+VERSION_FIELD = "version"
+
+# QrScanStatusConsumer 응답과 같은 이름을 사용
+FIELDS = (
+    "url",
+    "is_processing",
+    "job_status",
+    "site_name",
+    "threat_type",
+    "description",
+    "threat_score",
+    "report_job_status",
+    "report_ready",
+    "report_last_error",
+    "screenshot_ready",
+    "screenshot_url",
+    "screenshot_srcset",
+    "screenshot_last_error",
+    "error",
+    "retrying",
+    "retry_count",
+)
+
+
+def status_key(key: str) -> str:
+    return f"status:{key}"
+
+
+def _ttl() -> int:
+    return max(60, int(getattr(settings, "STATUS_STORE_TTL", 24 * 3600)))
+
+
+def _decode(raw: dict) -> dict:
+    doc = {}
+    for name, value in raw.items():
+        name = name.decode() if isinstance(name, bytes) else name
+        if name == _BUILT_FIELD:
+            continue
+        try:
+            doc[name] = json.loads(value)
+        except (TypeError, ValueError):
+            continue
+    return doc
+
+
+def _encode(fields: dict) -> dict:
+    return {name: json.dumps(value, ensure_ascii=False) for name, value in fields.items() if name in FIELDS}
+
+
+# 값이 다른 필드만 쓰고, 하나라도 바뀌면 버전을 올린다. 비교와 쓰기, TTL 갱신을 한 번의 호출로 원자적으로 처리하여
+# 같은 URL을 동시에 갱신하는 작업(스캔/보고서/urlscan)이 서로의 필드를 덮어쓰거나 같은 변경을 중복 발행하지 않도록 함.
+# ARGV: ttl, 버전 필드 이름, name1, value1, name2, value2, ... / 반환: {바뀐 필드 이름 목록, 갱신 후 HGETALL}
+_UPDATE_SCRIPT = """
+local changed = {}
+for i = 3, #ARGV, 2 do
+    if redis.call('hget', KEYS[1], ARGV[i]) ~= ARGV[i + 1] then
+        redis.call('hset', KEYS[1], ARGV[i], ARGV[i + 1])
+        changed[#changed + 1] = ARGV[i]
+    end
+end
+if #changed > 0 then
+    redis.call('hincrby', KEYS[1], ARGV[2], 1)
+end
+redis.call('expire', KEYS[1], ARGV[1])
+return {changed, redis.call('hgetall', KEYS[1])}
+"""
+
+# DB 기준으로 다시 만든 문서를 쓸 때, 읽은 뒤 다른 작업이 바꾼 필드(현재 값이 읽은 값과 다른 필드)는 그대로 둔다.
+# ARGV: ttl, built 필드 이름, name1, 읽은 값1(없으면 빈 문자열), 새 값1, ... / 반환: 갱신 후 HGETALL
+_REBUILD_SCRIPT = """
+for i = 3, #ARGV, 3 do
+    if (redis.call('hget', KEYS[1], ARGV[i]) or '') == ARGV[i + 1] then
+        redis.call('hset', KEYS[1], ARGV[i], ARGV[i + 2])
+    end
+end
+redis.call('hset', KEYS[1], ARGV[2], '1')
+redis.call('expire', KEYS[1], ARGV[1])
+return redis.call('hgetall', KEYS[1])
+"""
+
+
+def _pairs(flat: list) -> dict:
+    return dict(zip(flat[::2], flat[1::2]))
+
+
+def update(url: str, **fields) -> tuple[dict, dict] | None:
+    """
+    상태 문서의 일부 필드를 갱신하고 (갱신 후 전체 문서, 실제로 바뀐 필드)를 반환한다(Redis 장애 시 None).
+    바뀐 필드가 있을 때만 쓰고 버전을 올린다. 문서가 없으면 갱신한 필드만 가진 미완성 문서가 되어,
+    다음 읽기에서 DB 기준으로 나머지 필드를 채운다.
+    """
+    mapping = _encode({**fields, "url": url})
+    args = [_ttl(), VERSION_FIELD]
+    for name, value in mapping.items():
+        args.extend((name, value))
+    try:
+        changed, raw = get_redis().eval(_UPDATE_SCRIPT, 1, status_key(url_hash(url)), *args)
+    except Exception:
+        logger.exception("Failed to update status document. url=%s", url)
+        return None
+    doc = _decode(_pairs(raw))
+    changed = [name.decode() if isinstance(name, bytes) else name for name in changed]
+    return doc, {name: doc.get(name) for name in changed}
+
+
+def invalidate(key: str) -> None:
+    """
+    관리자 수정 등 여러 필드가 바뀌는 경우 문서를 미완성으로 표시해 다음 읽기에서 DB 기준으로 다시 만든다.
+    문서를 지우면 버전이 처음부터 다시 시작하므로 버전은 남기고 1 올린다.
+    """
+    try:
+        pipe = get_redis().pipeline()
+        pipe.hdel(status_key(key), _BUILT_FIELD)
+        pipe.hincrby(status_key(key), VERSION_FIELD, 1)
+        pipe.expire(status_key(key), _ttl())
+        pipe.execute()
+    except Exception:
+        logger.exception("Failed to invalidate status document. key=%s", key)
+
+
+def _screenshot_status(urlscan: URLScanIOResponse | None) -> tuple[bool, str | None, dict]:
+    screenshot_url = urlscan.screenshot_src if urlscan else None
+    screenshot_srcset = urlscan.screenshot_srcset if urlscan else {}
+    return bool(screenshot_url), screenshot_url, screenshot_srcset
+
+
+def _build_from_db(urls: dict[str, str], transient: dict[str, dict]) -> dict[str, dict]:
+    """
+    URL 수와 무관하게 쿼리 4번으로 상태 문서를 만든다. urls: {url_hash: url}
+    transient: DB에 없는 값(스캔 진행 상태/오류 등)이 남아 있는 미완성 문서
+    """
+    keys = list(urls)
+    scanned_urls = {scanned.url_hash: scanned for scanned in ScannedURL.objects.filter(url_hash__in=keys)}
+    report_ready = set(
+        GeneratedReport.objects.filter(url_hash__in=keys, is_processed=True).values_list("url_hash", flat=True)
+    )
+    urlscans = {
+        urlscan.url_hash: urlscan
+        for urlscan in URLScanIOResponse.objects.filter(url_hash__in=keys).only(
+            "url_hash", "screenshot", "screenshot_url", "screenshot_variants",
+        )
+    }
+    jobs = {
+        job.url_hash: job
+        for job in ReportJob.objects.filter(url_hash__in=keys).only("url_hash", "status", "last_error")
+    }
+    unscanned = [key for key in keys if key not in scanned_urls]
+    scan_tasks_running = dict(zip(unscanned, locks.are_locked([locks.scan_lock_name(key) for key in unscanned])))
+
+    docs = {}
+    for key, url in urls.items():
+        previous = transient.get(key, {})
+        scanned = scanned_urls.get(key)
+        job = jobs.get(key)
+        screenshot_ready, screenshot_url, screenshot_srcset = _screenshot_status(urlscans.get(key))
+        doc = {
+            **previous,
+            "url": url,
+            "report_job_status": job.status if job else None,
+            "report_ready": key in report_ready,
+            "report_last_error": job.last_error if job else "",
+            "screenshot_ready": screenshot_ready,
+            "screenshot_url": screenshot_url,
+            "screenshot_srcset": screenshot_srcset,
+        }
+        if scanned:
+            doc.update(
+                is_processing=False,
+                job_status="SCANNED",
+                site_name=scanned.site_name,
+                threat_type=scanned.threat_type,
+                description=scanned.description,
+                threat_score=scanned.threat_score,
+            )
+        elif scan_tasks_running.get(key):
+            doc.update(is_processing=True, job_status="SCANNING")
+        else:
+            doc["job_status"] = previous.get("job_status") or "PENDING"
+            doc["is_processing"] = doc["job_status"] not in ("SCANNED", "FAILURE")
+        docs[key] = doc
+    return docs
+
+
+def load_many(urls: list[str]) -> list[dict]:
+    """URL 목록의 상태 문서를 한 번의 왕복(HGETALL 파이프라인)으로 읽고, 없거나 미완성인 문서만 DB에서 다시 만든다."""
+    keys = {url_hash(url): url for url in urls}
+    redis = get_redis()
+    try:
+        pipe = redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(status_key(key))
+        raws = dict(zip(keys, pipe.execute()))
+    except Exception:
+        logger.exception("Failed to read status documents.")
+        raws = {}
+
+    docs = {}
+    missing = {}
+    transient = {}
+    for key, url in keys.items():
+        raw = raws.get(key) or {}
+        if raw.get(_BUILT_FIELD.encode()):
+            docs[key] = _decode(raw)
+        else:
+            missing[key] = url
+            transient[key] = _decode(raw)
+
+    if missing:
+        rebuilt = _build_from_db(missing, transient)
+        docs.update(rebuilt)
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for key, doc in rebuilt.items():
+                read = raws.get(key) or {}
+                args = [_ttl(), _BUILT_FIELD]
+                for name, value in _encode(doc).items():
+                    args.extend((name, (read.get(name.encode()) or b"").decode(), value))
+                pipe.eval(_REBUILD_SCRIPT, 1, status_key(key), *args)
+            # 다시 만드는 사이 다른 작업이 바꾼 필드가 반영된 문서를 응답
+            docs.update((key, _decode(_pairs(raw))) for key, raw in zip(rebuilt, pipe.execute()))
+        except Exception:
+            logger.exception("Failed to store status documents.")
+    return [docs[key] for key in keys]
+
+
+def load(url: str) -> dict:
+    return load_many([url])[0]
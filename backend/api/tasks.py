@@ -1,21 +1,34 @@
-import hashlib
+import json
 import socket
+import time
 import urllib.error
 
 import openai
 import requests
 from celery import shared_task
 from django.conf import settings
-from django.core.cache import cache
-from django.core.files.base import ContentFile
-from django.db.models import Q
 from django.utils import timezone
 
-from .clients import URLScanIOClient
-from .models import ReportJob, GeneratedReport, ScannedURL, URLScanIOResponse
+from . import circuit_breaker, locks, parsing, screenshots, verdict_cache
+from .circuit_breaker import CircuitOpenError
+from .rate_limit import RateLimited
+from .canonical import url_hash
+from .clients import (
+    EnumModel,
+    OpenAIResponseFailed,
+    get_openai_client,
+)
+from .models import EnumTier, ReportJob, GeneratedReport, ScannedURL, URLScanIOResponse
+from .redis_client import get_redis
+from .services import first_tier, hedging_enabled
 from .services import generate_report as sync_generate_report
+from .services import record_openai_report as sync_record_openai_report
+from .services import record_openai_scan as sync_record_openai_scan
 from .services import scan_url as sync_scan_url
-from .services import urlscanio_request as sync_urlscanio_request
+from .services import triage_scan as sync_triage_scan
+from .services import urlscanio_fail as sync_urlscanio_fail
+from .services import urlscanio_poll as sync_urlscanio_poll
+from .services import urlscanio_submit as sync_urlscanio_submit
 from .ws import notify_qr_scan_status, notify_report_status, notify_urlscan_status
 
 
@@ -32,25 +45,79 @@ _OPENAI_TRANSIENT_EXCEPTIONS = tuple(
 )
 
 TRANSIENT_TASK_EXCEPTIONS = _OPENAI_TRANSIENT_EXCEPTIONS + (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
     urllib.error.URLError,
     TimeoutError,
     ConnectionError,
     socket.timeout,
+    CircuitOpenError,
+    RateLimited,
 )
 
 
-def _retry_countdown(retries: int, base: int = 4, cap: int = 180) -> int:
-    return min(cap, base * (2 ** max(0, retries)))
+def _retry_countdown(retries: int, base: int = 4, cap: int = 180, exc: Exception | None = None) -> int:
+    countdown = min(cap, base * (2 ** max(0, retries)))
+    # circuit breaker 차단/요청 한도 초과 시에는 해제 시점(retry_after) 이전에 재시도하지 않음
+    return max(countdown, getattr(exc, "retry_after", 0))
+
+
+# 교정 후에도 파싱할 수 없는 응답이나 실패 상태 응답만 새 응답을 시작하여 재시도
+# (결과 처리 중 발생한 다른 예외는 코드 오류이므로 유료 응답을 다시 만들지 않고 일반 예외 경로로 처리)
+_OPENAI_RESTARTABLE_EXCEPTIONS = (OpenAIResponseFailed, parsing.ParseError)
+
+
+def _use_openai_background() -> bool:
+    # OpenAI 차단 중에는 동기 경로(services)로 보내 다른 provider로 우회
+    return (
+        getattr(settings, "AGENT_MODEL", "openai") == EnumModel.OPENAI
+        and getattr(settings, "OPENAI_RESUMABLE_RESPONSES", True)
+        and not circuit_breaker.is_open(EnumModel.OPENAI)
+    )
+
+
+def _openai_poll_countdown(poll_count: int) -> int:
+    interval = max(1, int(getattr(settings, "OPENAI_POLL_INTERVAL", 2)))
+    return min(10, int(interval * (1.5 ** max(0, poll_count))))
+
+
+def _openai_poll_deadline() -> float:
+    return time.time() + max(10, int(getattr(settings, "OPENAI_POLL_TIMEOUT", 240)))
+
+
+def _advance_openai_response(response_id: str | None, start) -> tuple[str, object | None]:
+    """
+    response_id가 없으면 배경 응답을 시작하고, 있으면 상태를 1회만 조회한다.
+    반환: (response_id, 완료된 응답 또는 진행 중이면 None)
+    """
+    client = get_openai_client()
+    if response_id:
+        return response_id, client.retrieve_response(response_id)
+    response = start(client)
+    if getattr(response, "status", None) in ("queued", "in_progress"):
+        return response.id, None
+    return response.id, response
+
+
+def _openai_scan_state_key(key: str) -> str:
+    return f"qrscan:openai_response:{key}"
+
+
+def _load_openai_scan_state(redis, state_key: str) -> dict:
+    """진행 중인 배경 스캔 상태 {"id": response_id, "tier": tier}. 이전 형식(response_id 문자열)도 허용"""
+    raw = redis.get(state_key)
+    if not raw:
+        return {}
+    raw = raw.decode()
+    try:
+        state = json.loads(raw)
+    except ValueError:
+        return {"id": raw, "tier": EnumTier.HEAVY}
+    return state if isinstance(state, dict) else {}
 
 
 def _extract_urlscan_screenshot_url(response: URLScanIOResponse | None) -> str | None:
-    if not response:
-        return None
-    if response.screenshot:
-        return response.screenshot.url
-    payload = response.response or {}
-    task = payload.get("task") if payload else None
-    return task.get("screenshotURL") if task else None
+    return response.screenshot_src if response else None
 
 
 @shared_task(
@@ -69,11 +136,24 @@ def generate_report_task(
     threat_type: str,
     description: str,
     threat_score: int,
+    poll_count: int = 0,
+    restarts: int = 0,
+    deadline: float = 0,
 ):
     job = ReportJob.objects.filter(id=job_id).first()
+    key = url_hash(url)
+    task_kwargs = {
+        "job_id": job_id,
+        "ip": ip,
+        "url": url,
+        "site_name": site_name,
+        "threat_type": threat_type,
+        "description": description,
+        "threat_score": threat_score,
+    }
 
     try:
-        existing = GeneratedReport.objects.filter(url=url).first()
+        existing = GeneratedReport.objects.filter(url_hash=key).first()
         if existing and (existing.openai_response is not None or existing.gemini_response is not None):
             if job:
                 job.status = ReportJob.Status.SUCCESS
@@ -81,11 +161,12 @@ def generate_report_task(
                 job.finished_at = timezone.now()
                 job.last_error = ""
                 job.save(update_fields=["status", "generated_report", "finished_at", "last_error", "updated_at"])
-            GeneratedReport.objects.filter(url=url, is_processed=False).update(is_processed=True)
+            GeneratedReport.objects.filter(url_hash=key, is_processed=False).update(is_processed=True)
+            verdict_cache.invalidate(key)
             notify_report_status(url, is_processed=True, job_status=ReportJob.Status.SUCCESS)
             return {"status": "already_exists", "url": url}
 
-        if job:
+        if job and poll_count == 0:
             update_fields = ["status", "last_error", "updated_at"]
             job.status = ReportJob.Status.STARTED
             job.last_error = ""
@@ -93,26 +174,88 @@ def generate_report_task(
                 job.started_at = timezone.now()
                 update_fields.append("started_at")
             job.save(update_fields=update_fields)
-        notify_report_status(url, is_processed=False, job_status=ReportJob.Status.STARTED)
-
-        generated = sync_generate_report(
-            ip=ip,
-            url=url,
-            site_name=site_name,
-            threat_type=threat_type,
-            description=description,
-            threat_score=threat_score,
-            model=getattr(settings, "AGENT_MODEL", "openai"),
-        )
-        GeneratedReport.objects.filter(url=url, is_processed=False).update(is_processed=True)
+            notify_report_status(url, is_processed=False, job_status=ReportJob.Status.STARTED)
+
+        if job and _use_openai_background():
+            if not deadline:
+                deadline = _openai_poll_deadline()
+            try:
+                if job.response_id and time.time() >= deadline:
+                    raise OpenAIResponseFailed("OpenAI 응답 대기 시간이 초과되었습니다.")
+                generated = None
+                while generated is None:
+                    tier = job.response_tier or first_tier()
+                    response_id, response = _advance_openai_response(
+                        job.response_id or None,
+                        lambda client: client.start_generate_report(
+                            url=url,
+                            site_name=site_name,
+                            threat_type=threat_type,
+                            description=description,
+                            threat_score=int(threat_score),
+                            tier=tier,
+                        ),
+                    )
+                    if response is None:
+                        if job.response_id != response_id or job.response_tier != tier:
+                            job.response_id = response_id
+                            job.response_tier = tier
+                            job.save(update_fields=["response_id", "response_tier", "updated_at"])
+                        generate_report_task.apply_async(
+                            kwargs={**task_kwargs, "poll_count": poll_count + 1, "restarts": restarts, "deadline": deadline},
+                            countdown=_openai_poll_countdown(poll_count),
+                        )
+                        return {"status": "polling", "url": url, "response_id": response_id}
+                    generated = sync_record_openai_report(
+                        ip=ip,
+                        url=url,
+                        site_name=site_name,
+                        threat_type=threat_type,
+                        description=description,
+                        threat_score=threat_score,
+                        response=response,
+                        tier=tier,
+                    )
+                    if generated is None:
+                        # lite 응답이 검증에 실패하여 heavy로 새 응답을 시작
+                        job.response_id = ""
+                        job.response_tier = EnumTier.HEAVY
+                        deadline = _openai_poll_deadline()
+            except _OPENAI_RESTARTABLE_EXCEPTIONS:
+                # 재시작 시 tier는 유지(heavy 응답이 실패했다면 다시 heavy로 시작)
+                job.response_id = ""
+                job.save(update_fields=["response_id", "response_tier", "updated_at"])
+                if restarts >= 3:
+                    raise
+                generate_report_task.apply_async(
+                    kwargs={**task_kwargs, "poll_count": 1, "restarts": restarts + 1, "deadline": 0},
+                    countdown=1,
+                )
+                return {"status": "restarted", "url": url, "restarts": restarts + 1}
+            job.response_id = ""
+            job.response_tier = ""
+        else:
+            generated = sync_generate_report(
+                ip=ip,
+                url=url,
+                site_name=site_name,
+                threat_type=threat_type,
+                description=description,
+                threat_score=threat_score,
+                model=getattr(settings, "AGENT_MODEL", "openai"),
+            )
+        GeneratedReport.objects.filter(url_hash=key, is_processed=False).update(is_processed=True)
 
         if job:
             job.status = ReportJob.Status.SUCCESS
             job.generated_report = generated
             job.finished_at = timezone.now()
             job.last_error = ""
-            job.save(update_fields=["status", "generated_report", "finished_at", "last_error", "updated_at"])
+            job.save(update_fields=[
+                "status", "generated_report", "finished_at", "last_error", "response_id", "response_tier", "updated_at",
+            ])
 
+        verdict_cache.invalidate(key)
         notify_report_status(url, is_processed=True, job_status=ReportJob.Status.SUCCESS)
         return {"status": "success", "url": url}
 
@@ -125,6 +268,7 @@ def generate_report_task(
                 job.last_error = str(e)
                 job.finished_at = timezone.now()
                 job.save(update_fields=["status", "last_error", "finished_at", "updated_at"])
+            verdict_cache.invalidate(key)
             notify_report_status(
                 url,
                 is_processed=False,
@@ -145,7 +289,7 @@ def generate_report_task(
             retrying=True,
             retry_count=retry_count,
         )
-        raise self.retry(exc=e, countdown=_retry_countdown(self.request.retries))
+        raise self.retry(exc=e, countdown=_retry_countdown(self.request.retries, exc=e))
 
     except Exception as e:
         if job:
@@ -153,6 +297,7 @@ def generate_report_task(
             job.last_error = str(e)
             job.finished_at = timezone.now()
             job.save(update_fields=["status", "last_error", "finished_at", "updated_at"])
+        verdict_cache.invalidate(key)
         notify_report_status(
             url,
             is_processed=False,
@@ -162,6 +307,46 @@ def generate_report_task(
         raise
 
 
+def _urlscan_poll_countdown(attempt: int) -> int:
+    interval = max(1, int(getattr(settings, "URLSCAN_POLL_INTERVAL", 2)))
+    max_interval = max(interval, int(getattr(settings, "URLSCAN_POLL_MAX_INTERVAL", 15)))
+    return min(max_interval, int(interval * (1.5 ** max(0, attempt))))
+
+
+def _schedule_urlscanio_poll(url: str, lock_token: str | None, attempt: int, deadline: float, countdown: int) -> bool:
+    locks.refresh(locks.urlscan_lock_name(url_hash(url)), lock_token, timeout=300)
+    urlscanio_poll_task.apply_async(
+        kwargs={"url": url, "lock_token": lock_token, "attempt": attempt, "deadline": deadline},
+        countdown=countdown,
+    )
+    return True
+
+
+def _handle_urlscanio_transient(task, url: str, lock_token: str | None, e: Exception, defer=None):
+    if isinstance(e, CircuitOpenError) and defer is not None and defer(e.retry_after):
+        # urlscan 차단 중에는 재시도 횟수를 소모하지 않고 차단 해제 이후로 연기
+        notify_urlscan_status(url, screenshot_ready=False, retrying=True, last_error=str(e))
+        return {"status": "deferred", "url": url, "retry_after": e.retry_after}
+
+    retry_count = task.request.retries + 1
+    max_retries = task.max_retries or 0
+    if task.request.retries >= max_retries:
+        sync_urlscanio_fail(url, str(e))
+        locks.release(locks.urlscan_lock_name(url_hash(url)), lock_token)
+        notify_urlscan_status(url, screenshot_ready=False, last_error=str(e))
+        raise e
+
+    locks.refresh(locks.urlscan_lock_name(url_hash(url)), lock_token, timeout=300)
+    notify_urlscan_status(
+        url,
+        screenshot_ready=False,
+        retrying=True,
+        retry_count=retry_count,
+        last_error=str(e),
+    )
+    raise task.retry(exc=e, countdown=_retry_countdown(task.request.retries, base=5, cap=180, exc=e))
+
+
 @shared_task(
     bind=True,
     name="api.urlscanio_task",
@@ -169,80 +354,102 @@ def generate_report_task(
     acks_late=True,
     reject_on_worker_lost=True,
 )
-def urlscanio_task(self, ip: str, url: str):
-    queue_lock_key = f"urlscan:queue:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
+def urlscanio_task(self, ip: str, url: str, lock_token: str | None = None, deferrals: int = 0):
+    """urlscan 스캔을 제출(또는 기존 스캔을 재개)하고 결과 조회는 urlscanio_poll_task에 위임한다."""
+    def defer(countdown: int) -> bool:
+        # 연기 횟수를 넘기면 일반 재시도 경로로 처리
+        if deferrals >= int(getattr(settings, "CIRCUIT_BREAKER_MAX_DEFERRALS", 10)):
+            return False
+        locks.refresh(locks.urlscan_lock_name(url_hash(url)), lock_token, timeout=300 + countdown)
+        urlscanio_task.apply_async(
+            kwargs={"ip": ip, "url": url, "lock_token": lock_token, "deferrals": deferrals + 1},
+            countdown=countdown,
+        )
+        return True
+
     try:
-        resp = sync_urlscanio_request(ip=ip, url=url)
-        screenshot_url = _extract_urlscan_screenshot_url(resp)
-        screenshot_ready = bool(screenshot_url)
-        notify_urlscan_status(url, screenshot_ready=screenshot_ready, screenshot_url=screenshot_url)
-        cache.delete(queue_lock_key)
-        return {
-            "status": "success",
-            "url": url,
-            "scan_id": str(resp.scan_id) if resp else None,
-        }
+        resp = sync_urlscanio_submit(ip=ip, url=url)
+        if resp.status == URLScanIOResponse.Status.SUCCESS:
+            countdown = 0
+        else:
+            countdown = max(0, int(getattr(settings, "URLSCAN_POLL_DELAY", 10)))
+        deadline = time.time() + countdown + max(1, int(getattr(settings, "URLSCAN_POLL_TIMEOUT", 120)))
+        _schedule_urlscanio_poll(url, lock_token, attempt=0, deadline=deadline, countdown=countdown)
+        return {"status": "submitted", "url": url, "scan_id": str(resp.scan_id)}
 
     except TRANSIENT_TASK_EXCEPTIONS as e:
-        retry_count = self.request.retries + 1
-        max_retries = self.max_retries or 0
-        if self.request.retries >= max_retries:
-            cache.delete(queue_lock_key)
-            notify_urlscan_status(url, screenshot_ready=False, last_error=str(e))
-            raise
+        return _handle_urlscanio_transient(self, url, lock_token, e, defer=defer)
+
+    except Exception as e:
+        sync_urlscanio_fail(url, str(e))
+        locks.release(locks.urlscan_lock_name(url_hash(url)), lock_token)
+        notify_urlscan_status(url, screenshot_ready=False, last_error=str(e))
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="api.urlscanio_poll_task",
+    max_retries=6,
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
+def urlscanio_poll_task(self, url: str, lock_token: str | None = None, attempt: int = 0, deadline: float = 0):
+    """결과 조회 1회만 수행하고, 미완료면 backoff countdown으로 자신을 다시 예약한다."""
+    try:
+        resp, done = sync_urlscanio_poll(url=url)
+        if done:
+            screenshot_url = _extract_urlscan_screenshot_url(resp)
+            notify_urlscan_status(
+                url,
+                screenshot_ready=bool(screenshot_url),
+                screenshot_url=screenshot_url,
+                screenshot_srcset=resp.screenshot_srcset,
+            )
+            locks.release(locks.urlscan_lock_name(url_hash(url)), lock_token)
+            return {"status": "success", "url": url, "scan_id": str(resp.scan_id), "attempts": attempt + 1}
+
+        if time.time() >= deadline:
+            # 결과 대기 시간 초과는 재시도하지 않고 실패 처리(다음 요청 시 재제출)
+            error = "urlscan 결과 대기 시간이 초과되었습니다."
+            sync_urlscanio_fail(url, error)
+            locks.release(locks.urlscan_lock_name(url_hash(url)), lock_token)
+            notify_urlscan_status(url, screenshot_ready=False, last_error=error)
+            return {"status": "timeout", "url": url, "attempts": attempt + 1}
+
+        _schedule_urlscanio_poll(
+            url,
+            lock_token,
+            attempt=attempt + 1,
+            deadline=deadline,
+            countdown=_urlscan_poll_countdown(attempt),
+        )
+        return {"status": "polling", "url": url, "attempts": attempt + 1}
 
-        cache.set(queue_lock_key, "1", timeout=300)
-        notify_urlscan_status(
+    except TRANSIENT_TASK_EXCEPTIONS as e:
+        # 결과 조회 연기는 기존 deadline까지만 허용하고 이후에는 일반 재시도 경로로 처리
+        return _handle_urlscanio_transient(
+            self,
             url,
-            screenshot_ready=False,
-            retrying=True,
-            retry_count=retry_count,
-            last_error=str(e),
+            lock_token,
+            e,
+            defer=lambda countdown: (
+                time.time() + countdown < deadline
+                and _schedule_urlscanio_poll(url, lock_token, attempt, deadline, countdown)
+            ),
         )
-        raise self.retry(exc=e, countdown=_retry_countdown(self.request.retries, base=5, cap=180))
 
     except Exception as e:
-        cache.delete(queue_lock_key)
+        sync_urlscanio_fail(url, str(e))
+        locks.release(locks.urlscan_lock_name(url_hash(url)), lock_token)
         notify_urlscan_status(url, screenshot_ready=False, last_error=str(e))
         raise
 
 
 @shared_task(name="api.urlscanio_screenshot_poll_task")
 def urlscanio_screenshot_poll_task():
-    client = URLScanIOClient()
-    pending = URLScanIOResponse.objects.filter(Q(screenshot__isnull=True) | Q(screenshot=""))
-    updated_count = 0
-
-    for scanned in pending:
-        if scanned.screenshot:
-            continue
-
-        response = scanned.response or {}
-        task = response.get("task") if response else None
-        screenshot_url = task.get("screenshotURL") if task else None
-
-        if not screenshot_url and scanned.scan_id:
-            result = client.get_result(str(scanned.scan_id))
-            if result:
-                scanned.response = result
-                scanned.save(update_fields=["response", "updated_at"])
-                task = result.get("task") if result else None
-                screenshot_url = task.get("screenshotURL") if task else None
-
-        if screenshot_url:
-            resp = requests.get(screenshot_url, timeout=10)
-            if resp.status_code == 200:
-                screenshot_name = f"{scanned.scan_id}.png"
-                scanned.screenshot = ContentFile(resp.content, name=screenshot_name)
-                scanned.save(update_fields=["screenshot", "updated_at"])
-                updated_count += 1
-                notify_urlscan_status(
-                    scanned.url,
-                    screenshot_ready=True,
-                    screenshot_url=scanned.screenshot.url,
-                )
-
-    return {"checked": pending.count(), "updated": updated_count}
+    # 결과 조회 중인 스캔은 urlscanio_poll_task가 처리하므로 완료된 스캔의 스크린샷만 보충
+    return screenshots.backfill()
 
 
 @shared_task(
@@ -252,16 +459,72 @@ def urlscanio_screenshot_poll_task():
     acks_late=True,
     reject_on_worker_lost=True,
 )
-def scan_url_task(self, ip: str, url: str):
-    from .report_queue import ensure_generate_report_queued
+def scan_url_task(
+    self,
+    ip: str,
+    url: str,
+    lock_token: str | None = None,
+    poll_count: int = 0,
+    restarts: int = 0,
+    deadline: float = 0,
+):
+    from .report_queue import queue_followups
 
-    scan_lock_key = f"qrscan:scan:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
-    notify_qr_scan_status(url, is_processing=True, job_status="SCANNING")
+    key = url_hash(url)
+    scan_lock_key = locks.scan_lock_name(key)
+    if poll_count == 0:
+        notify_qr_scan_status(url, is_processing=True, job_status="SCANNING")
     try:
-        scanned = ScannedURL.objects.filter(url=url).first()
-        if not scanned:
+        scanned = ScannedURL.objects.filter(url_hash=key).first()
+        if not scanned and poll_count == 0:
+            scanned = sync_triage_scan(url)
+        # hedging은 두 provider를 동시에 기다려야 하므로 배경 응답 재개 대신 동기 경로 사용
+        if not scanned and _use_openai_background() and not hedging_enabled():
+            task_kwargs = {"ip": ip, "url": url, "lock_token": lock_token}
+            state_key = _openai_scan_state_key(key)
+            redis = get_redis()
+            if not deadline:
+                deadline = _openai_poll_deadline()
+            state = _load_openai_scan_state(redis, state_key)
+            tier = state.get("tier") or first_tier()
+            try:
+                stored_id = state.get("id")
+                if stored_id and time.time() >= deadline:
+                    raise OpenAIResponseFailed("OpenAI 응답 대기 시간이 초과되었습니다.")
+                while not scanned:
+                    response_id, response = _advance_openai_response(
+                        stored_id,
+                        lambda client: client.start_scan_url(url=url, tier=tier),
+                    )
+                    if response is None:
+                        redis.set(state_key, json.dumps({"id": response_id, "tier": tier}), ex=3600)
+                        locks.refresh(scan_lock_key, lock_token, timeout=300)
+                        scan_url_task.apply_async(
+                            kwargs={**task_kwargs, "poll_count": poll_count + 1, "restarts": restarts, "deadline": deadline},
+                            countdown=_openai_poll_countdown(poll_count),
+                        )
+                        return {"status": "polling", "url": url, "response_id": response_id}
+                    redis.delete(state_key)
+                    scanned = sync_record_openai_scan(ip=ip, url=url, response=response, tier=tier)
+                    if not scanned:
+                        # lite 판정이 불확실하여 heavy로 새 응답을 시작
+                        stored_id, tier = None, EnumTier.HEAVY
+                        deadline = _openai_poll_deadline()
+            except _OPENAI_RESTARTABLE_EXCEPTIONS:
+                if restarts >= 3:
+                    redis.delete(state_key)
+                    raise
+                # 재시작 시 tier는 유지(heavy 응답이 실패했다면 다시 heavy로 시작)
+                redis.set(state_key, json.dumps({"tier": tier}), ex=3600)
+                locks.refresh(scan_lock_key, lock_token, timeout=300)
+                scan_url_task.apply_async(
+                    kwargs={**task_kwargs, "poll_count": 1, "restarts": restarts + 1, "deadline": 0},
+                    countdown=1,
+                )
+                return {"status": "restarted", "url": url, "restarts": restarts + 1}
+        elif not scanned:
             scanned = sync_scan_url(ip=ip, url=url, model=getattr(settings, "AGENT_MODEL", "openai"))
-        job = ensure_generate_report_queued(scanned, ip)
+        report_job_status = queue_followups(scanned, ip)
         notify_qr_scan_status(
             url,
             is_processing=False,
@@ -270,20 +533,20 @@ def scan_url_task(self, ip: str, url: str):
             threat_type=scanned.threat_type,
             description=scanned.description,
             threat_score=scanned.threat_score,
-            report_job_status=job.status if job else ReportJob.Status.SUCCESS,
+            report_job_status=report_job_status,
         )
-        cache.delete(scan_lock_key)
-        return {"status": "success", "url": url, "job_id": job.id if job else None}
+        locks.release(scan_lock_key, lock_token)
+        return {"status": "success", "url": url, "report_job_status": report_job_status}
 
     except TRANSIENT_TASK_EXCEPTIONS as e:
         retry_count = self.request.retries + 1
         max_retries = self.max_retries or 0
         if self.request.retries >= max_retries:
-            cache.delete(scan_lock_key)
+            locks.release(scan_lock_key, lock_token)
             notify_qr_scan_status(url, is_processing=False, job_status="FAILURE", error=str(e))
             raise
 
-        cache.set(scan_lock_key, "1", timeout=300)
+        locks.refresh(scan_lock_key, lock_token, timeout=300)
         notify_qr_scan_status(
             url,
             is_processing=True,
@@ -292,9 +555,9 @@ def scan_url_task(self, ip: str, url: str):
             retrying=True,
             retry_count=retry_count,
         )
-        raise self.retry(exc=e, countdown=_retry_countdown(self.request.retries, base=4, cap=120))
+        raise self.retry(exc=e, countdown=_retry_countdown(self.request.retries, base=4, cap=120, exc=e))
 
     except Exception as e:
-        cache.delete(scan_lock_key)
+        locks.release(scan_lock_key, lock_token)
         notify_qr_scan_status(url, is_processing=False, job_status="FAILURE", error=str(e))
         raise
@@ -0,0 +1,29 @@
+from unittest import mock
+
+import fakeredis
+from django.test import override_settings
+
+from api import redis_client
+
+# 테스트에서는 Redis 대신 프로세스 내부 구현을 사용 (락/상태 문서/지표는 fakeredis, 캐시/channel layer는 메모리)
+TEST_SETTINGS = {
+    "CACHES": {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default"},
+        "verdict": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "verdict"},
+    },
+    "CHANNEL_LAYERS": {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+}
+
+
+class FakeRedisMixin:
+    """get_redis()가 테스트마다 새 fakeredis 인스턴스를 반환하도록 교체"""
+
+    def setUp(self):
+        super().setUp()
+        settings_override = override_settings(**TEST_SETTINGS)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch.object(redis_client, "_client", self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
@@ -0,0 +1,47 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from api import blocklist
+
+
+class BlocklistImportTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.dir = tmpdir.name
+        self.index = os.path.join(self.dir, "blocklist.idx")
+        settings_override = override_settings(BLOCKLIST_INDEX_PATH=self.index, BLOCKLIST_RELOAD_INTERVAL=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def import_feed(self, *lines):
+        path = os.path.join(self.dir, "feed.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        call_command("import_blocklist", path, stdout=io.StringIO())
+
+    def test_schemeless_entry_with_path_is_url(self):
+        self.import_feed("docs.google.com/forms/d/e/PHISH/viewform")
+
+        self.assertEqual(
+            blocklist.lookup("https://docs.google.com/forms/d/e/PHISH/viewform"), blocklist.EnumBlocklistMatch.URL,
+        )
+        self.assertIsNone(blocklist.lookup("https://docs.google.com/document/d/legit"))
+
+    def test_url_entry_matches_regardless_of_scheme(self):
+        self.import_feed("http://evil.example/login")
+
+        self.assertEqual(blocklist.lookup("https://evil.example/login"), blocklist.EnumBlocklistMatch.URL)
+        self.assertEqual(blocklist.lookup("http://EVIL.example/login#top"), blocklist.EnumBlocklistMatch.URL)
+        self.assertIsNone(blocklist.lookup("https://evil.example/other"))
+
+    def test_domain_entry_matches_subdomains(self):
+        self.import_feed("bad.example")
+
+        self.assertEqual(blocklist.lookup("https://www.bad.example/x"), blocklist.EnumBlocklistMatch.DOMAIN)
+        self.assertIsNone(blocklist.lookup("https://notbad.example/"))
@@ -0,0 +1,56 @@
+from django.test import SimpleTestCase, override_settings
+
+from api import circuit_breaker
+from api.circuit_breaker import CircuitOpenError, EnumBreakerState, EnumProvider
+
+from .base import FakeRedisMixin
+
+PROVIDER = EnumProvider.OPENAI
+
+
+@override_settings(CIRCUIT_BREAKER_ENABLED=True, CIRCUIT_BREAKER_MIN_CALLS=2, CIRCUIT_BREAKER_ERROR_RATE=0.5)
+class CircuitBreakerTests(FakeRedisMixin, SimpleTestCase):
+    def trip(self):
+        circuit_breaker.record_failure(PROVIDER)
+        circuit_breaker.record_failure(PROVIDER)
+        self.assertEqual(circuit_breaker.state(PROVIDER), EnumBreakerState.OPEN)
+
+    def end_cooldown(self):
+        self.redis.delete(circuit_breaker._open_key(PROVIDER))
+        self.assertEqual(circuit_breaker.state(PROVIDER), EnumBreakerState.HALF_OPEN)
+
+    def test_success_without_probe_does_not_close(self):
+        self.trip()
+        # 차단 전에 시작된 호출의 성공
+        circuit_breaker.record_success(PROVIDER)
+        self.assertEqual(circuit_breaker.state(PROVIDER), EnumBreakerState.OPEN)
+
+        self.end_cooldown()
+        probe = circuit_breaker.check(PROVIDER)
+        self.assertIsNotNone(probe)
+        with self.assertRaises(CircuitOpenError):
+            circuit_breaker.check(PROVIDER)
+        circuit_breaker.record_success(PROVIDER)
+        self.assertEqual(circuit_breaker.state(PROVIDER), EnumBreakerState.HALF_OPEN)
+
+        circuit_breaker.record_success(PROVIDER, probe)
+        self.assertEqual(circuit_breaker.state(PROVIDER), EnumBreakerState.CLOSED)
+        self.assertIsNone(circuit_breaker.check(PROVIDER))
+
+    def test_client_error_probe_releases_without_closing(self):
+        self.trip()
+        self.end_cooldown()
+        probe = circuit_breaker.check(PROVIDER)
+
+        circuit_breaker.record_success(PROVIDER, probe, client_error=True)
+        self.assertEqual(circuit_breaker.state(PROVIDER), EnumBreakerState.HALF_OPEN)
+        # 권한을 반납했으므로 다음 호출이 다시 시험 호출이 됨
+        self.assertIsNotNone(circuit_breaker.check(PROVIDER))
+
+    def test_probe_failure_reopens(self):
+        self.trip()
+        self.end_cooldown()
+        circuit_breaker.check(PROVIDER)
+
+        circuit_breaker.record_failure(PROVIDER)
+        self.assertEqual(circuit_breaker.state(PROVIDER), EnumBreakerState.OPEN)
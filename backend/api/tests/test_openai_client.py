@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase
+
+from api.clients import OpenAIClient, OpenAIResponseFailed
+
+from .base import FakeRedisMixin
+
+REQUEST = {"model": "gpt-5-mini", "input": [{"role": "user", "content": "https://example.com/"}]}
+
+
+def _response(response_id: str, status: str) -> SimpleNamespace:
+    return SimpleNamespace(id=response_id, status=status)
+
+
+class ResumableResponseTests(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = OpenAIClient(api_key="test")
+        self.client.client = mock.Mock()
+        self.responses = self.client.client.responses
+
+    def test_retried_call_resumes_pending_response(self):
+        self.responses.create.return_value = _response("resp_1", "queued")
+        # 첫 번째 대기 중 연결이 끊겨 task가 재시도됨
+        self.responses.retrieve.side_effect = [
+            httpx.ConnectError("connection reset"),
+            _response("resp_1", "completed"),
+        ]
+        with self.assertRaises(httpx.ConnectError):
+            self.client._create_response(**REQUEST)
+
+        response = self.client._create_response(**REQUEST)
+
+        self.assertEqual(response.id, "resp_1")
+        self.assertEqual(self.responses.create.call_count, 1)
+        self.assertEqual(self.redis.keys("openai:pending_response:*"), [])
+
+    def test_failed_response_is_not_resumed(self):
+        self.responses.create.side_effect = [_response("resp_1", "queued"), _response("resp_2", "queued")]
+        self.responses.retrieve.side_effect = [_response("resp_1", "failed"), _response("resp_2", "completed")]
+        with self.assertRaises(OpenAIResponseFailed):
+            self.client._create_response(**REQUEST)
+
+        self.assertEqual(self.client._create_response(**REQUEST).id, "resp_2")
+        self.assertEqual(self.responses.create.call_count, 2)
+
+    def test_different_requests_do_not_share_responses(self):
+        self.responses.create.side_effect = [_response("resp_1", "queued"), _response("resp_2", "completed")]
+        self.responses.retrieve.side_effect = httpx.ConnectError("connection reset")
+        with self.assertRaises(httpx.ConnectError):
+            self.client._create_response(**REQUEST)
+
+        other = {**REQUEST, "input": [{"role": "user", "content": "https://example.org/"}]}
+        self.assertEqual(self.client._create_response(**other).id, "resp_2")
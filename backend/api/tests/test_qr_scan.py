@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api import report_queue
+from api.canonical import canonicalize_url, url_hash
+from api.models import ScannedURL
+
+from .base import FakeRedisMixin
+
+
+class CachedVerdictFollowupTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = canonicalize_url("https://cached.example/landing")
+        ScannedURL.objects.create(
+            url=self.url, site_name="example", threat_type="안전", description="정상 사이트", threat_score=1,
+        )
+        for task in ("generate_report_task", "urlscanio_task"):
+            patcher = mock.patch(f"api.report_queue.{task}.apply_async")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get(self):
+        response = Client().get("/api/qr-scan/", {"url": self.url})
+        response.close()
+        self.assertEqual(response.json()["job_status"], "SCANNED")
+
+    def test_cache_hits_do_not_query_database(self):
+        # 첫 요청들: 판정 캐시 채우기, 후속 작업 큐잉(보고서 작업 상태가 바뀌어 캐시가 한 번 무효화됨)
+        self.get()
+        self.get()
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(5):
+                self.get()
+        self.assertEqual(len(queries), 0, [query["sql"] for query in queries])
+
+    def test_followups_are_checked_again_after_interval(self):
+        self.get()
+        self.get()
+        self.redis.delete(report_queue._followup_check_key(url_hash(self.url)))
+        with CaptureQueriesContext(connection) as queries:
+            self.get()
+        self.assertGreater(len(queries), 0)
@@ -0,0 +1,44 @@
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.test import Client, TransactionTestCase, override_settings
+
+from api.canonical import url_hash
+from api.models import GeneratedReport
+
+from .base import FakeRedisMixin
+
+
+@override_settings(TRIAGE_ENABLED=False, REPORT_PIPELINE_POLICY="lazy", QR_SCAN_DEFAULT_WAIT_MS=0)
+class ConcurrentQrScanTests(FakeRedisMixin, TransactionTestCase):
+    def test_concurrent_requests_enqueue_single_scan_task(self):
+        url = "https://dedupe.example/landing"
+        # 보고서 placeholder 생성 경합(sqlite 테이블 잠금)이 아니라 스캔 락을 검증하도록 미리 생성
+        GeneratedReport.objects.create(url=url, url_hash=url_hash(url), is_processed=False)
+        barrier = threading.Barrier(50)
+        statuses = []
+        errors = []
+
+        def request():
+            try:
+                barrier.wait()
+                response = Client().get("/api/qr-scan/", {"url": url})
+                statuses.append(response.status_code)
+                response.close()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        with mock.patch("api.views.scan_url_task.apply_async") as apply_async:
+            threads = [threading.Thread(target=request) for _ in range(50)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(statuses, [200] * 50)
+        self.assertEqual(apply_async.call_count, 1)
+        self.assertEqual(apply_async.call_args.kwargs["kwargs"]["url"], url)
@@ -0,0 +1,39 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from api import parsing, services
+from api.models import EnumCategory
+
+from .base import FakeRedisMixin
+
+
+@override_settings(SCAN_HEDGE_ENABLED=False)
+class ParseFailureRescanTests(FakeRedisMixin, TestCase):
+    def test_scan_url_rescans_once_after_failed_repair(self):
+        with mock.patch.object(
+            services, "_scan_url_tiered", side_effect=parsing.ParseError("invalid"),
+        ) as scan, self.assertRaises(parsing.ParseError):
+            services.scan_url("127.0.0.1", "https://parse.example/")
+        self.assertEqual(scan.call_count, 2)
+
+    def test_generate_report_rescans_once_after_failed_repair(self):
+        with mock.patch.object(
+            services, "_generate_report_tiered", side_effect=parsing.ParseError("invalid"),
+        ) as generate, self.assertRaises(parsing.ParseError):
+            services.generate_report("127.0.0.1", "https://parse.example/", "site", "피싱", "설명", 3)
+        self.assertEqual(generate.call_count, 2)
+
+
+class RequiredTextTests(TestCase):
+    def test_blank_required_text_is_rejected(self):
+        # 교정 응답이 없는 값을 빈 문자열로 채워도 저장하지 않고 다시 스캔하도록 실패 처리
+        text = '{"url": "https://parse.example/", "site_name": " ", "threat_type": "피싱", "description": "", "threat_score": 3}'
+        with self.assertRaises(parsing.SchemaError):
+            parsing.parse(EnumCategory.SCAN_URL, text)
+
+    def test_filled_required_text_is_accepted(self):
+        text = '{"url": "https://parse.example/", "site_name": "예시", "threat_type": "피싱", "description": "설명", "threat_score": "3"}'
+        result = parsing.parse(EnumCategory.SCAN_URL, text)
+        self.assertEqual(result["site_name"], "예시")
+        self.assertEqual(result["threat_score"], 3)
@@ -0,0 +1,273 @@
+import io
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from api import screenshots, status_store
+from api.rate_limit import RateLimited
+from api.models import ScreenshotBlob, URLScanIOResponse
+
+from .base import FakeRedisMixin
+
+
+def _png(width: int = 800, height: int = 600) -> bytes:
+    buf = BytesIO()
+    Image.effect_noise((width, height), 64).convert("RGB").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _uncompressed_png(width: int = 800, height: int = 600) -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", (width, height), "white").save(buf, format="PNG", compress_level=0)
+    return buf.getvalue()
+
+
+class ScreenshotTestCase(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        settings_override = override_settings(
+            MEDIA_ROOT=tmpdir.name, SCREENSHOT_VARIANT_WIDTHS="320,640", SCREENSHOT_VARIANT_QUALITY=75,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def scan(self, url: str = "https://example.com/") -> URLScanIOResponse:
+        return URLScanIOResponse.objects.create(url=url, status=URLScanIOResponse.Status.SUCCESS)
+
+
+class StoreScreenshotTests(ScreenshotTestCase):
+    def test_same_content_does_not_increment_refcount(self):
+        scanned = self.scan()
+        content = _png()
+        screenshots.store_screenshot(scanned, content)
+        screenshots.store_screenshot(scanned, content)
+
+        blob = ScreenshotBlob.objects.get()
+        self.assertEqual(blob.refcount, 1)
+        scanned.refresh_from_db()
+        self.assertEqual(scanned.screenshot_blob_id, blob.id)
+        self.assertEqual(scanned.screenshot_state, URLScanIOResponse.ScreenshotState.STORED)
+
+    def test_shared_content_counts_each_scan_once(self):
+        content = _png()
+        for url in ("https://a.example.com/", "https://b.example.com/"):
+            screenshots.store_screenshot(self.scan(url), content)
+
+        self.assertEqual(ScreenshotBlob.objects.get().refcount, 2)
+
+    def test_replacing_content_moves_reference(self):
+        scanned = self.scan()
+        screenshots.store_screenshot(scanned, _png())
+        old_blob_id = scanned.screenshot_blob_id
+        screenshots.store_screenshot(scanned, _png(640, 480))
+
+        self.assertEqual(ScreenshotBlob.objects.get(id=old_blob_id).refcount, 0)
+        self.assertEqual(ScreenshotBlob.objects.get(id=scanned.screenshot_blob_id).refcount, 1)
+
+    def test_failure_rolls_back_refcount_and_link(self):
+        scanned = self.scan()
+        screenshots.store_screenshot(scanned, _png())
+        old_blob_id = scanned.screenshot_blob_id
+
+        with mock.patch.object(screenshots, "release_blob", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                screenshots.store_screenshot(scanned, _png(640, 480))
+
+        self.assertEqual(URLScanIOResponse.objects.get(id=scanned.id).screenshot_blob_id, old_blob_id)
+        self.assertEqual(ScreenshotBlob.objects.get(id=old_blob_id).refcount, 1)
+        self.assertFalse(ScreenshotBlob.objects.exclude(id=old_blob_id).filter(refcount__gt=0).exists())
+
+
+class BuildVariantsCommandTests(ScreenshotTestCase):
+    def test_all_regenerates_after_quality_change(self):
+        scanned = self.scan()
+        screenshots.store_screenshot(scanned, _png())
+        before = scanned.screenshot_blob.variants
+        version = status_store.load(scanned.url).get("version", 0)
+
+        with override_settings(SCREENSHOT_VARIANT_QUALITY=40):
+            call_command("build_screenshot_variants", "--all", stdout=io.StringIO())
+
+        scanned.refresh_from_db()
+        after = scanned.screenshot_blob.variants
+        self.assertEqual(scanned.screenshot_variants, after)
+        for fmt in ("webp", "jpeg"):
+            for width, name in after[fmt].items():
+                self.assertNotEqual(name, before[fmt][width])
+                self.assertTrue(default_storage.exists(name))
+        # 상태 문서의 srcset은 새 파일로 다시 만들어짐
+        doc = status_store.load(scanned.url)
+        self.assertGreater(doc["version"], version)
+        self.assertEqual(doc["screenshot_srcset"], scanned.screenshot_srcset)
+        # 이전 축소본은 캐시된 페이지를 위해 남겨 두고, 유예 기간이 지난 뒤 --gc에서 삭제
+        old_names = [name for names in before.values() for name in names.values()]
+        self.assertEqual(set(scanned.screenshot_blob.retired_files), set(old_names))
+        self.assert_collected_after_grace(old_names)
+
+    def test_all_keeps_files_when_settings_unchanged(self):
+        scanned = self.scan()
+        screenshots.store_screenshot(scanned, _png())
+        before = scanned.screenshot_blob.variants
+
+        call_command("build_screenshot_variants", "--all", stdout=io.StringIO())
+
+        scanned.screenshot_blob.refresh_from_db()
+        self.assertEqual(scanned.screenshot_blob.variants, before)
+        for names in before.values():
+            for name in names.values():
+                self.assertTrue(default_storage.exists(name))
+
+    def test_compress_originals_switches_to_new_name(self):
+        scanned = self.scan()
+        screenshots.store_screenshot(scanned, _uncompressed_png())
+        blob = scanned.screenshot_blob
+        old_name = blob.name
+
+        call_command("build_screenshot_variants", "--all", "--compress-originals", stdout=io.StringIO())
+
+        blob.refresh_from_db()
+        scanned.refresh_from_db()
+        self.assertNotEqual(blob.name, old_name)
+        self.assertEqual(scanned.screenshot.name, blob.name)
+        self.assertEqual(default_storage.size(blob.name), blob.size)
+        self.assertEqual(status_store.load(scanned.url)["screenshot_url"], scanned.screenshot.url)
+        self.assertIn(old_name, blob.retired_files)
+        self.assert_collected_after_grace([old_name])
+        self.assertTrue(default_storage.exists(blob.name))
+
+    def assert_collected_after_grace(self, names):
+        for name in names:
+            self.assertTrue(default_storage.exists(name))
+        call_command("migrate_screenshot_blobs", "--gc", stdout=io.StringIO())
+        for name in names:
+            self.assertTrue(default_storage.exists(name))
+
+        call_command("migrate_screenshot_blobs", "--gc", "--grace-hours", "0", stdout=io.StringIO())
+        for name in names:
+            self.assertFalse(default_storage.exists(name))
+        self.assertEqual(ScreenshotBlob.objects.get().retired_files, {})
+
+
+def _fetched(outcome: str, error: str = "", retry_after: int | None = None) -> dict:
+    return {"outcome": outcome, "result": None, "content": None, "error": error, "retry_after": retry_after}
+
+
+@override_settings(
+    SCREENSHOT_BACKFILL_BATCH_SIZE=50,
+    SCREENSHOT_BACKFILL_MAX_ATTEMPTS=3,
+    SCREENSHOT_BACKFILL_BACKOFF_BASE=60,
+    SCREENSHOT_BACKFILL_BACKOFF_MAX=3600,
+)
+class BackfillTests(ScreenshotTestCase):
+    def backfill(self, *fetched: dict) -> mock.Mock:
+        with mock.patch.object(screenshots, "_fetch", side_effect=list(fetched)) as fetch:
+            self.assertEqual(screenshots.backfill()["status"], "done")
+        return fetch
+
+    def make_due(self) -> None:
+        URLScanIOResponse.objects.update(screenshot_next_attempt_at=None)
+
+    def assert_retry_after(self, scanned: URLScanIOResponse, seconds: int) -> None:
+        expected = timezone.now() + timedelta(seconds=seconds)
+        self.assertAlmostEqual(scanned.screenshot_next_attempt_at, expected, delta=timedelta(seconds=5))
+
+    def test_retry_backs_off_exponentially(self):
+        scanned = self.scan()
+        for attempts, delay in ((1, 60), (2, 120)):
+            self.backfill(_fetched(screenshots.EnumOutcome.RETRY, "status=500"))
+            scanned.refresh_from_db()
+            self.assertEqual(scanned.screenshot_attempts, attempts)
+            self.assertEqual(scanned.screenshot_state, URLScanIOResponse.ScreenshotState.MISSING)
+            self.assert_retry_after(scanned, delay)
+
+            # 다음 시도 시각 전에는 다시 조회하지 않음
+            self.assertEqual(self.backfill().call_count, 0)
+            self.make_due()
+
+    def test_gives_up_after_max_attempts(self):
+        scanned = self.scan()
+        for _ in range(3):
+            self.backfill(_fetched(screenshots.EnumOutcome.RETRY, "status=500"))
+            self.make_due()
+
+        scanned.refresh_from_db()
+        self.assertEqual(scanned.screenshot_attempts, 3)
+        self.assertEqual(scanned.screenshot_state, URLScanIOResponse.ScreenshotState.GAVE_UP)
+        self.assertIsNone(scanned.screenshot_next_attempt_at)
+        self.assertEqual(self.backfill().call_count, 0)
+
+    def test_permanent_failure_gives_up_immediately(self):
+        scanned = self.scan()
+        self.backfill(_fetched(screenshots.EnumOutcome.GAVE_UP, "status=404"))
+
+        scanned.refresh_from_db()
+        self.assertEqual(scanned.screenshot_attempts, 1)
+        self.assertEqual(scanned.screenshot_state, URLScanIOResponse.ScreenshotState.GAVE_UP)
+
+    def test_rate_limited_does_not_count_as_attempt(self):
+        scanned = self.scan()
+        self.backfill(_fetched(screenshots.EnumOutcome.RATE_LIMITED, retry_after=30))
+
+        scanned.refresh_from_db()
+        self.assertEqual(scanned.screenshot_attempts, 0)
+        self.assertEqual(scanned.screenshot_state, URLScanIOResponse.ScreenshotState.MISSING)
+        self.assert_retry_after(scanned, 30)
+
+    def test_cursor_wraps_around(self):
+        rows = [self.scan(f"https://{i}.example.com/") for i in range(3)]
+        retry = _fetched(screenshots.EnumOutcome.RATE_LIMITED, retry_after=1)
+        with override_settings(SCREENSHOT_BACKFILL_BATCH_SIZE=2):
+            fetch = self.backfill(retry, retry)
+            self.assertEqual([call.args[0] for call in fetch.call_args_list], [str(r.scan_id) for r in rows[:2]])
+            self.assertEqual(int(self.redis.get(screenshots._CURSOR_KEY)), rows[1].id)
+
+            # 마지막 배치가 가득 차지 않으면 커서를 처음으로 되돌림
+            self.make_due()
+            fetch = self.backfill(retry)
+            self.assertEqual([call.args[0] for call in fetch.call_args_list], [str(rows[2].scan_id)])
+            self.assertEqual(int(self.redis.get(screenshots._CURSOR_KEY)), 0)
+
+            self.make_due()
+            fetch = self.backfill(retry, retry)
+            self.assertEqual([call.args[0] for call in fetch.call_args_list], [str(r.scan_id) for r in rows[:2]])
+
+    def test_cursor_restarts_when_no_rows_after_it(self):
+        scanned = self.scan()
+        self.redis.set(screenshots._CURSOR_KEY, scanned.id)
+
+        fetch = self.backfill(_fetched(screenshots.EnumOutcome.RATE_LIMITED, retry_after=1))
+        self.assertEqual([call.args[0] for call in fetch.call_args_list], [str(scanned.scan_id)])
+
+
+class FetchOutcomeTests(FakeRedisMixin, TestCase):
+    def fetch(self, status_code: int) -> dict:
+        session = mock.Mock()
+        session.get.return_value = mock.Mock(status_code=status_code, content=b"")
+        with mock.patch.object(screenshots.rate_limit, "acquire"), \
+                mock.patch.object(screenshots, "get_http_session", return_value=session):
+            return screenshots._fetch("scan-id", "https://urlscan.io/screenshots/scan-id.png")
+
+    def test_permanent_status_codes_give_up(self):
+        for status_code in (403, 404, 410):
+            with self.subTest(status_code=status_code):
+                self.assertEqual(self.fetch(status_code)["outcome"], screenshots.EnumOutcome.GAVE_UP)
+
+    def test_transient_status_codes_retry(self):
+        for status_code in (429, 500, 503):
+            with self.subTest(status_code=status_code):
+                self.assertEqual(self.fetch(status_code)["outcome"], screenshots.EnumOutcome.RETRY)
+
+    def test_rate_limit_is_reported_with_retry_after(self):
+        with mock.patch.object(screenshots.rate_limit, "acquire", side_effect=RateLimited("urlscan:screenshot", 7)):
+            fetched = screenshots._fetch("scan-id", "https://urlscan.io/screenshots/scan-id.png")
+        self.assertEqual(fetched["outcome"], screenshots.EnumOutcome.RATE_LIMITED)
+        self.assertEqual(fetched["retry_after"], 7)
@@ -0,0 +1,100 @@
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from api import status_store, ws
+from api.canonical import url_hash
+
+from .base import FakeRedisMixin
+
+
+def _stored(url: str) -> dict:
+    return status_store._decode(status_store.get_redis().hgetall(status_store.status_key(url_hash(url))))
+
+
+class ConcurrentStatusUpdateTests(FakeRedisMixin, TransactionTestCase):
+    def test_concurrent_updates_keep_fields_and_bump_version_once(self):
+        url = "https://race.example/landing"
+        rounds = 100
+        barrier = threading.Barrier(4)
+        sent = []
+        errors = []
+
+        # 매 호출마다 자기 필드 하나를 바꾸는 스캔/보고서/urlscan 작업과, 그 사이 문서를 다시 만드는 읽기
+        def scan():
+            for i in range(rounds):
+                ws.notify_qr_scan_status(url, is_processing=True, job_status="SCANNING", retry_count=i)
+
+        def report():
+            for i in range(rounds):
+                ws.notify_report_status(url, is_processed=False, job_status="STARTED", last_error=f"report-{i}")
+
+        def urlscan():
+            for i in range(rounds):
+                ws.notify_urlscan_status(url, screenshot_ready=False, last_error=f"urlscan-{i}")
+
+        def reader():
+            for _ in range(rounds // 4):
+                status_store.invalidate(url_hash(url))
+                status_store.load(url)
+
+        def run(target):
+            try:
+                barrier.wait()
+                target()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        with mock.patch.object(ws, "_safe_group_send", lambda group, event: sent.append(event)):
+            threads = [threading.Thread(target=run, args=(target,)) for target in (scan, report, urlscan, reader)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        doc = _stored(url)
+        self.assertEqual(doc["retry_count"], rounds - 1)
+        self.assertEqual(doc["report_last_error"], f"report-{rounds - 1}")
+        self.assertEqual(doc["screenshot_last_error"], f"urlscan-{rounds - 1}")
+
+        # 갱신마다 버전이 정확히 한 번 오르고 알림마다 다른 버전을 가짐 (읽기 쪽 invalidate도 한 번씩 올림)
+        versions = [event["payload"]["version"] for event in sent if event["type"] == "qr_scan_status"]
+        self.assertEqual(len(versions), 3 * rounds)
+        self.assertEqual(len(set(versions)), 3 * rounds)
+        self.assertEqual(doc["version"], 3 * rounds + rounds // 4)
+
+        # 같은 값으로 다시 갱신하면 버전도 알림도 바뀌지 않음
+        sent.clear()
+        with mock.patch.object(ws, "_safe_group_send", lambda group, event: sent.append(event)):
+            ws.notify_urlscan_status(url, screenshot_ready=False, last_error=f"urlscan-{rounds - 1}")
+        self.assertEqual(sent, [])
+        self.assertEqual(_stored(url)["version"], doc["version"])
+
+
+class RebuildDuringUpdateTests(FakeRedisMixin, TestCase):
+    def test_rebuild_keeps_fields_written_while_rebuilding(self):
+        url = "https://race.example/rebuild"
+        # DB에 없는 값으로 남아 있는 문서를 미완성으로 표시해 다음 읽기에서 다시 만들게 함
+        status_store.update(url, report_ready=True)
+        status_store.invalidate(url_hash(url))
+        build_from_db = status_store._build_from_db
+
+        def build_then_write(urls, transient):
+            docs = build_from_db(urls, transient)
+            # DB를 읽은 뒤 Redis에 쓰기 전에 보고서 작업이 상태를 갱신
+            status_store.update(url, report_last_error="during rebuild")
+            return docs
+
+        with mock.patch.object(status_store, "_build_from_db", build_then_write):
+            doc = status_store.load(url)
+
+        self.assertEqual(doc["report_last_error"], "during rebuild")
+        self.assertEqual(_stored(url)["report_last_error"], "during rebuild")
+        # 그 사이 바뀌지 않은 필드는 DB 기준 값으로 다시 만들어짐
+        self.assertFalse(doc["report_ready"])
+        self.assertEqual(status_store.load(url), doc)
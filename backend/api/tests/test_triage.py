@@ -0,0 +1,65 @@
+import importlib
+from unittest import mock
+
+from django.apps import apps
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api import services, status_store, triage, verdict_cache
+from api.canonical import canonicalize_url, url_hash
+from api.models import ScannedURL
+
+from .base import FakeRedisMixin
+
+
+class AllowlistTests(SimpleTestCase):
+    def is_allowlisted(self, url):
+        return triage.is_allowlisted(canonicalize_url(url))
+
+    def test_allowlisted_domain(self):
+        self.assertTrue(self.is_allowlisted("https://www.naver.com/"))
+        self.assertTrue(self.is_allowlisted("https://accounts.google.com/"))
+
+    def test_plain_http_is_not_allowlisted(self):
+        self.assertFalse(self.is_allowlisted("http://www.naver.com/"))
+
+    def test_user_content_hosts_are_not_allowlisted(self):
+        for url in (
+            "https://docs.google.com/forms/d/e/PHISH/viewform",
+            "https://sites.google.com/view/login",
+            "https://m.blog.naver.com/someone/1",
+            "https://cafe.naver.com/club",
+            "https://open.kakao.com/o/abc",
+        ):
+            with self.subTest(url=url):
+                self.assertFalse(self.is_allowlisted(url))
+
+
+@override_settings(TRIAGE_ENABLED=True)
+class TriageScanTests(FakeRedisMixin, TestCase):
+    def test_unlisted_url_goes_to_llm(self):
+        self.assertIsNone(services.triage_scan(canonicalize_url("http://192.168.0.1:8080/")))
+        self.assertFalse(ScannedURL.objects.exists())
+
+    def test_allowlisted_domain_is_stored_as_safe(self):
+        scanned = services.triage_scan(canonicalize_url("https://www.naver.com/"))
+        self.assertEqual((scanned.model, scanned.threat_score), ("heuristic", 1))
+
+
+class DropHeuristicVerdictsMigrationTests(FakeRedisMixin, TestCase):
+    def test_deleted_verdicts_are_removed_from_caches(self):
+        migration = importlib.import_module("api.migrations.0018_drop_heuristic_verdicts")
+        url = canonicalize_url("http://login-verify.example.top/")
+        key = url_hash(url)
+        ScannedURL.objects.create(url=url, model="heuristic", threat_type="피싱", threat_score=3)
+        verdict_cache.load(key)
+        status_store.load(url)
+
+        with mock.patch.object(migration.redis.Redis, "from_url", return_value=self.redis):
+            migration.drop_heuristic_verdicts(apps, None)
+
+        self.assertFalse(ScannedURL.objects.exists())
+        verdict_cache._local.delete(key)
+        self.assertIsNone(verdict_cache.load(key))
+        doc = status_store.load(url)
+        self.assertIsNone(doc.get("threat_type"))
+        self.assertEqual(doc["job_status"], "PENDING")
@@ -0,0 +1,84 @@
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+
+# 공식 도메인(하위 도메인 포함). 리다이렉트/단축 URL을 제공하는 호스트는 제외
+DEFAULT_ALLOWLIST = (
+    "naver.com",
+    "google.com",
+    "google.co.kr",
+    "daum.net",
+    "kakao.com",
+    "youtube.com",
+    "apple.com",
+    "microsoft.com",
+    "coupang.com",
+    "gov.kr",
+    "go.kr",
+)
+
+# 허용 도메인 하위에 있더라도 다른 사이트로 보내는 호스트/경로는 LLM 분석이 필요
+_REDIRECT_HOSTS = frozenset({
+    "m.site.naver.com",
+    "naver.me",
+    "link.naver.com",
+    "me2.do",
+    "goo.gl",
+    "g.co",
+    "kko.to",
+})
+_REDIRECT_PATHS = ("/url", "/amp/", "/link", "/redirect")
+
+# 허용 도메인 하위에 있더라도 사용자가 만든 문서/폼/게시글/채널을 제공하는 호스트(하위 도메인 포함)는
+# 피싱 페이지를 올리는 데 자주 쓰이므로 LLM 분석이 필요
+_USER_CONTENT_HOSTS = (
+    "docs.google.com",
+    "sites.google.com",
+    "drive.google.com",
+    "script.google.com",
+    "groups.google.com",
+    "translate.google.com",
+    "translate.google.co.kr",
+    "blog.naver.com",
+    "cafe.naver.com",
+    "post.naver.com",
+    "in.naver.com",
+    "form.naver.com",
+    "kin.naver.com",
+    "smartstore.naver.com",
+    "blog.daum.net",
+    "cafe.daum.net",
+    "pf.kakao.com",
+    "open.kakao.com",
+    "story.kakao.com",
+)
+
+def _matches(host: str, domains) -> bool:
+    return any(host == domain or host.endswith(f".{domain}") for domain in domains)
+
+
+def _allowlisted(parts) -> bool:
+    host = parts.hostname or ""
+    if host in _REDIRECT_HOSTS or parts.path.startswith(_REDIRECT_PATHS):
+        return False
+    if _matches(host, _USER_CONTENT_HOSTS):
+        return False
+    if parts.username or parts.password:
+        return False
+    allowlist = tuple(DEFAULT_ALLOWLIST) + tuple(getattr(settings, "TRIAGE_ALLOWLIST", ()) or ())
+    return _matches(host, allowlist)
+
+
+def is_allowlisted(url: str) -> bool:
+    """
+    https이고 허용 도메인(하위 도메인 포함)이면 True. 그 외에는 모두 LLM 분석 대상.
+    어휘적 특징 점수로는 확실한 판정을 내릴 수 없어(사설망 관리 페이지, 매장 메뉴판 등 정상 URL도 점수가 높음)
+    로컬 판정은 허용 도메인과 차단 목록만 사용한다.
+    """
+    try:
+        parts = urlsplit(url)
+        parts.port
+    except ValueError:
+        return False
+    return parts.scheme == "https" and _allowlisted(parts)
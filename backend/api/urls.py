@@ -1,6 +1,6 @@
 
 from django.urls import path
-from api.views import QrScanView, GenerateReportView, InquireView, DashboardView, InquireEditView, LoginView
+from api.views import QrScanView, GenerateReportView, InquireView, DashboardView, InquireEditView, LoginView, MetricsView
 
 
 urlpatterns = [
@@ -10,4 +10,5 @@ urlpatterns = [
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
     path('inquire/<int:inquire_id>/edit/', InquireEditView.as_view(), name='inquire-edit'),
     path('login/', LoginView.as_view(), name='login'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
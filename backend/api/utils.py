@@ -4,6 +4,8 @@ from urllib.parse import urlparse
 
 from django.http import HttpRequest
 
+from .canonical import canonicalize_url
+
 
 def get_client_ip(request: HttpRequest) -> str:
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -35,7 +37,7 @@ def extract_and_classify_url(raw: str | None) -> tuple[str | None, str | None]:
     if scheme in ("http", "https"):
         if not parsed.netloc:
             return None, None
-        return candidate, "http"
+        return canonicalize_url(candidate), "http"
     # deep link scheme
     if scheme and (parsed.netloc or parsed.path):
         return candidate, "deeplink"
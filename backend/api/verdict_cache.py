@@ -0,0 +1,230 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import ReportJob, ScannedURL
+
+logger = logging.getLogger(__name__)
+
+
+class VerdictRecord:
+    __slots__ = (
+        "url",
+        "site_name",
+        "threat_type",
+        "description",
+        "threat_score",
+        "report_job_status",
+    )
+
+    def __init__(
+        self,
+        url: str,
+        site_name: str | None,
+        threat_type: str | None,
+        description: str | None,
+        threat_score: int | None,
+        report_job_status: str | None,
+    ):
+        self.url = url
+        self.site_name = site_name
+        self.threat_type = threat_type
+        self.description = description
+        self.threat_score = threat_score
+        self.report_job_status = report_job_status
+
+    def to_tuple(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @classmethod
+    def from_tuple(cls, values) -> "VerdictRecord":
+        return cls(*values)
+
+
+class _LocalLRU:
+    """프로세스 내부 1차 캐시. 다른 프로세스의 무효화를 받을 수 없으므로 TTL을 짧게 유지한다."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._items: OrderedDict[str, tuple[float, VerdictRecord]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> VerdictRecord | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, record = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return record
+
+    def set(self, key: str, record: VerdictRecord) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, record)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+_local = _LocalLRU(
+    max_size=int(getattr(settings, "VERDICT_CACHE_L1_SIZE", 10000)),
+    ttl=float(getattr(settings, "VERDICT_CACHE_L1_TTL", 10)),
+)
+_counters = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "invalidations": 0}
+_counters_lock = threading.Lock()
+
+
+def _incr(name: str) -> None:
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def _shared_cache():
+    return caches[getattr(settings, "VERDICT_CACHE_ALIAS", "verdict")]
+
+
+def _shared_key(key: str) -> str:
+    return f"verdict:{key}"
+
+
+def _get_local(key: str) -> VerdictRecord | None:
+    record = _local.get(key)
+    if record is not None:
+        _incr("l1_hits")
+    return record
+
+
+def _from_shared(key: str, values) -> VerdictRecord | None:
+    if values is None:
+        _incr("misses")
+        return None
+    record = VerdictRecord.from_tuple(values)
+    _local.set(key, record)
+    _incr("l2_hits")
+    return record
+
+
+def _l2_ttl() -> int:
+    return int(getattr(settings, "VERDICT_CACHE_L2_TTL", 600))
+
+
+def get(key: str) -> VerdictRecord | None:
+    record = _get_local(key)
+    if record is not None:
+        return record
+    try:
+        values = _shared_cache().get(_shared_key(key))
+    except Exception:
+        # 공유 캐시 장애 시 DB 조회로 폴백
+        logger.exception("Failed to read verdict cache. key=%s", key)
+        values = None
+    return _from_shared(key, values)
+
+
+async def aget(key: str) -> VerdictRecord | None:
+    record = _get_local(key)
+    if record is not None:
+        return record
+    try:
+        values = await _shared_cache().aget(_shared_key(key))
+    except Exception:
+        logger.exception("Failed to read verdict cache. key=%s", key)
+        values = None
+    return _from_shared(key, values)
+
+
+def put(key: str, record: VerdictRecord) -> None:
+    _local.set(key, record)
+    try:
+        _shared_cache().set(_shared_key(key), record.to_tuple(), timeout=_l2_ttl())
+    except Exception:
+        logger.exception("Failed to write verdict cache. key=%s", key)
+
+
+async def aput(key: str, record: VerdictRecord) -> None:
+    _local.set(key, record)
+    try:
+        await _shared_cache().aset(_shared_key(key), record.to_tuple(), timeout=_l2_ttl())
+    except Exception:
+        logger.exception("Failed to write verdict cache. key=%s", key)
+
+
+def invalidate(key: str) -> None:
+    _local.delete(key)
+    _incr("invalidations")
+    try:
+        _shared_cache().delete(_shared_key(key))
+    except Exception:
+        logger.exception("Failed to invalidate verdict cache. key=%s", key)
+
+
+def load(key: str) -> VerdictRecord | None:
+    """캐시를 먼저 확인하고, 없으면 DB에서 판정 결과를 읽어 두 계층 모두에 채운다."""
+    record = get(key)
+    if record is not None:
+        return record
+
+    scanned_url = ScannedURL.objects.filter(url_hash=key).first()
+    if not scanned_url:
+        return None
+    record = _record_from_db(
+        scanned_url,
+        ReportJob.objects.filter(url_hash=key).values_list("status", flat=True).first(),
+    )
+    put(key, record)
+    return record
+
+
+async def aload(key: str) -> VerdictRecord | None:
+    """load()의 async 버전 (async view에서 sync 스레드 풀을 거치지 않고 async ORM/캐시 API 사용)"""
+    record = await aget(key)
+    if record is not None:
+        return record
+
+    scanned_url = await ScannedURL.objects.filter(url_hash=key).afirst()
+    if not scanned_url:
+        return None
+    record = _record_from_db(
+        scanned_url,
+        await ReportJob.objects.filter(url_hash=key).values_list("status", flat=True).afirst(),
+    )
+    await aput(key, record)
+    return record
+
+
+def _record_from_db(scanned_url: ScannedURL, report_job_status: str | None) -> VerdictRecord:
+    return VerdictRecord(
+        url=scanned_url.url,
+        site_name=scanned_url.site_name,
+        threat_type=scanned_url.threat_type,
+        description=scanned_url.description,
+        threat_score=scanned_url.threat_score,
+        report_job_status=report_job_status,
+    )
+
+
+def stats() -> dict:
+    with _counters_lock:
+        counters = dict(_counters)
+    lookups = counters["l1_hits"] + counters["l2_hits"] + counters["misses"]
+    hits = counters["l1_hits"] + counters["l2_hits"]
+    return {
+        **counters,
+        "l1_size": len(_local),
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+    }
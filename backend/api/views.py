@@ -1,19 +1,30 @@
 
-import hashlib
+import asyncio
+import os
+import time
 import urllib.parse
 
-from django.core.cache import cache
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
 from django.contrib.auth import authenticate, login
 from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import render
 from django.shortcuts import redirect
 from django.utils import timezone
+from django.views import View
+from django.views.static import serve
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from . import circuit_breaker, locks, metrics, report_queue, screenshots, status_store, verdict_cache
+from .canonical import url_hash
+from .clients import connection_stats
 from .utils import get_client_ip, extract_and_classify_url
 from .report_queue import ensure_generate_report_queued, ensure_urlscanio_queued
+from .services import triage_scan
 from .tasks import scan_url_task
 from .models import (
     ScannedURL,
@@ -24,22 +35,19 @@ from .models import (
     ScannedURLEditLog,
     GeneratedReportEditLog,
 )
-from .ws import notify_qr_scan_status
+from .ws import anotify_qr_scan_status, qr_scan_group_name
 
 
-def _serialize_scanned_url(scanned_url: ScannedURL) -> dict:
-    report_job_status = (
-        ReportJob.objects.filter(url=scanned_url.url).values_list("status", flat=True).first()
-    )
+def _serialize_verdict(verdict: verdict_cache.VerdictRecord) -> dict:
     return {
-        "url": scanned_url.url,
-        "site_name": scanned_url.site_name,
-        "threat_type": scanned_url.threat_type,
-        "description": scanned_url.description,
-        "threat_score": scanned_url.threat_score,
+        "url": verdict.url,
+        "site_name": verdict.site_name,
+        "threat_type": verdict.threat_type,
+        "description": verdict.description,
+        "threat_score": verdict.threat_score,
         "is_processing": False,
         "job_status": "SCANNED",
-        "report_job_status": report_job_status,
+        "report_job_status": verdict.report_job_status,
         "status_ws_path": "/ws/qr-scan/status/",
     }
 
@@ -57,36 +65,40 @@ def _processing_response(url: str) -> dict:
     }
 
 
-def _get_urlscan_screenshot(url: str) -> tuple[bool, str | None]:
-    urlscanio_response = (
-        URLScanIOResponse.objects.filter(url=url)
-        .only("screenshot", "response")
-        .first()
-    )
-    if not urlscanio_response:
-        return False, None
-    if urlscanio_response.screenshot:
-        return True, urlscanio_response.screenshot.url
-    response = urlscanio_response.response or {}
-    task = response.get("task") if response else None
-    screenshot_url = task.get("screenshotURL") if task else None
-    return bool(screenshot_url), screenshot_url
-
-
-def _queue_qr_scan_followups(url: str, ip: str) -> None:
-    ensure_urlscanio_queued(url, ip)
-    scanned_url = ScannedURL.objects.filter(url=url).first()
+def _queue_qr_scan_followups(
+    url: str,
+    ip: str,
+    verdict: verdict_cache.VerdictRecord | None = None,
+) -> None:
+    if verdict is not None:
+        # 캐시된 판정으로 응답한 경우: 보고서가 완료되었고 urlscan도 판정 후에 처리하는 정책이면 할 일이 없으므로 종료.
+        # 그 외(보고서 미생성/진행 중/실패)에도 DB 확인은 URL별로 일정 간격에 1번만 수행
+        if verdict.report_job_status == ReportJob.Status.SUCCESS and not report_queue.urlscan_on_qr_scan():
+            return
+        if not report_queue.claim_followup_check(url_hash(url)):
+            return
+    if report_queue.urlscan_on_qr_scan():
+        ensure_urlscanio_queued(url, ip)
+    if verdict and verdict.report_job_status == ReportJob.Status.SUCCESS:
+        return
+    scanned_url = ScannedURL.objects.filter(url_hash=url_hash(url)).first()
     if scanned_url:
-        ensure_generate_report_queued(scanned_url, ip)
+        # 정책(REPORT_PIPELINE_POLICY)에 따라 보고서/urlscan 큐잉 또는 보류
+        report_queue.queue_followups(scanned_url, ip)
     else:
         _queue_scan_url_task(url=url, ip=ip)
 
 
 def _queue_scan_url_task(url: str, ip: str) -> None:
-    GeneratedReport.objects.get_or_create(url=url, defaults={"is_processed": False})
-    lock_key = f"qrscan:scan:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
-    if cache.add(lock_key, "1", timeout=300):
-        scan_url_task.apply_async(kwargs={"ip": ip, "url": url})
+    key = url_hash(url)
+    GeneratedReport.objects.get_or_create(url_hash=key, defaults={"url": url, "is_processed": False})
+    lock_token = locks.acquire(locks.scan_lock_name(key), timeout=300)
+    if lock_token:
+        scan_url_task.apply_async(kwargs={"ip": ip, "url": url, "lock_token": lock_token})
+
+
+def _json_response(payload: dict) -> JsonResponse:
+    return JsonResponse(payload, json_dumps_params={"ensure_ascii": False})
 
 
 def _threat_label_from_score(score: int | None) -> str:
@@ -118,47 +130,104 @@ def _admin_redirect(request):
     return redirect(f"/api/login/?next={next_url}")
 
 
-class QrScanView(APIView):
-    def get(self, request) -> Response:
-        url, url_kind = extract_and_classify_url(request.query_params.get("url", ""))
+def _qr_scan_wait_seconds(request) -> float:
+    """wait_ms 쿼리 파라미터(없으면 QR_SCAN_DEFAULT_WAIT_MS)를 QR_SCAN_MAX_WAIT_MS로 제한한 대기 시간(초)"""
+    try:
+        wait_ms = int(request.GET.get("wait_ms", getattr(settings, "QR_SCAN_DEFAULT_WAIT_MS", 0)))
+    except (TypeError, ValueError):
+        wait_ms = 0
+    return max(0, min(wait_ms, int(getattr(settings, "QR_SCAN_MAX_WAIT_MS", 3000)))) / 1000
+
+
+async def _wait_for_scan_signal(channel_layer, channel_name: str, timeout: float) -> bool:
+    """스캔 완료(SCANNED) 알림을 받으면 True, 실패 알림이나 시간 초과면 False"""
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        try:
+            message = await asyncio.wait_for(channel_layer.receive(channel_name), remaining)
+        except asyncio.TimeoutError:
+            return False
+        job_status = (message.get("payload") or {}).get("job_status")
+        if job_status == "SCANNED":
+            return True
+        if job_status == "FAILURE":
+            return False
+
+
+class QrScanView(View):
+    """
+    판정 결과가 없으면 wait_ms(최대 QR_SCAN_MAX_WAIT_MS)까지 스캔 완료 알림을 기다렸다가 실제 판정을 반환하고,
+    그 안에 끝나지 않으면 기존처럼 분석 중 응답을 반환한다. 대기 중 sync 스레드를 점유하지 않도록 async view로 처리.
+    """
+
+    async def get(self, request) -> JsonResponse:
+        url, url_kind = extract_and_classify_url(request.GET.get("url", ""))
         ip = get_client_ip(request)
         if not url:
-            return Response({"error": "URL이 아닙니다."})
+            return _json_response({"error": "URL이 아닙니다."})
         if url_kind == "deeplink":
-            return Response({"error": "딥링크입니다."})
-
-        scanned_url = ScannedURL.objects.filter(url=url).first()
-        result = _serialize_scanned_url(scanned_url) if scanned_url else _processing_response(url)
-        notify_qr_scan_status(
-            url,
-            is_processing=result["is_processing"],
-            job_status=result["job_status"],
-            site_name=result.get("site_name"),
-            threat_type=result.get("threat_type"),
-            description=result.get("description"),
-            threat_score=result.get("threat_score"),
-            report_job_status=result.get("report_job_status"),
-        )
-        response = Response(result)
+            return _json_response({"error": "딥링크입니다."})
+
+        key = url_hash(url)
+        verdict = await verdict_cache.aload(key)
+        if verdict is None and await sync_to_async(triage_scan)(url):
+            # 허용 도메인/명백한 피싱 URL은 LLM 분석 없이 즉시 판정
+            verdict = await verdict_cache.aload(key)
+
+        queued = False
+        wait_seconds = _qr_scan_wait_seconds(request) if verdict is None else 0
+        channel_layer = get_channel_layer() if wait_seconds else None
+        if channel_layer:
+            # 스캔 완료 알림을 놓치지 않도록 큐잉 전에 URL별 그룹을 구독
+            group_name = qr_scan_group_name(url)
+            channel_name = await channel_layer.new_channel()
+            await channel_layer.group_add(group_name, channel_name)
+            try:
+                await sync_to_async(_queue_qr_scan_followups)(url=url, ip=ip)
+                queued = True
+                if await _wait_for_scan_signal(channel_layer, channel_name, wait_seconds):
+                    verdict = await verdict_cache.aload(key)
+            finally:
+                await channel_layer.group_discard(group_name, channel_name)
+            await sync_to_async(metrics.incr)(f"qr_scan.wait.{'hit' if verdict else 'timeout'}")
+
+        result = _serialize_verdict(verdict) if verdict else _processing_response(url)
+        status = {
+            "is_processing": result["is_processing"],
+            "job_status": result["job_status"],
+            "site_name": result.get("site_name"),
+            "threat_type": result.get("threat_type"),
+            "description": result.get("description"),
+            "threat_score": result.get("threat_score"),
+        }
+        if verdict:
+            # 분석 대기 응답이 상태 문서의 보고서 상태를 지우지 않도록 판정 결과가 있을 때만 포함
+            status["report_job_status"] = result.get("report_job_status")
+        await anotify_qr_scan_status(url, **status)
+        response = _json_response(result)
+        if queued:
+            return response
 
         # 응답 반환 직후(close 시점) 후속 작업을 비동기로 큐잉
         def _enqueue_after_response():
             try:
-                _queue_qr_scan_followups(url=url, ip=ip)
+                _queue_qr_scan_followups(url=url, ip=ip, verdict=verdict)
             except Exception:
                 # qr-scan 응답은 빠르게 반환하고, 큐잉 실패는 서버 로그로만 처리
                 return
 
-        if hasattr(response, "_resource_closers"):
-            response._resource_closers.append(_enqueue_after_response)
-        else:
-            _enqueue_after_response()
+        response._resource_closers.append(_enqueue_after_response)
         return response
 
 
-class GenerateReportView(APIView):
-    def get(self, request):
-        url, url_kind = extract_and_classify_url(request.query_params.get("url", ""))
+class GenerateReportView(View):
+    """조회는 async ORM으로 처리하고, 큐잉(트랜잭션/락)이 필요한 경우에만 sync 함수를 스레드에서 실행"""
+
+    async def get(self, request):
+        url, url_kind = extract_and_classify_url(request.GET.get("url", ""))
         ip = get_client_ip(request)
         payload = {
             "input_payload": {},
@@ -167,6 +236,7 @@ class GenerateReportView(APIView):
             "is_processing": False,
             "job_status": None,
             "screenshot": None,
+            "screenshot_srcset": {},
         }
 
         if not url:
@@ -177,12 +247,17 @@ class GenerateReportView(APIView):
             return render(request, "reports.html", payload)
 
         payload["input_payload"]["url"] = url
+        key = url_hash(url)
 
-        screenshot_ready, screenshot_url = _get_urlscan_screenshot(url)
-        if screenshot_ready and screenshot_url:
-            payload["screenshot"] = screenshot_url
+        # 상태 문서 1건으로 스크린샷/보고서/판정 상태를 확인하고, 필요한 경우에만 DB 조회
+        status = await sync_to_async(status_store.load)(url)
+        if status.get("screenshot_ready") and status.get("screenshot_url"):
+            payload["screenshot"] = status["screenshot_url"]
+            payload["screenshot_srcset"] = status.get("screenshot_srcset") or {}
 
-        generated = GeneratedReport.objects.filter(url=url, is_processed=True).first()
+        generated = None
+        if status.get("report_ready"):
+            generated = await GeneratedReport.objects.filter(url_hash=key, is_processed=True).afirst()
         if generated:
             payload["report_json"] = {
                 "url": generated.url,
@@ -195,11 +270,15 @@ class GenerateReportView(APIView):
             }
             payload["job_status"] = ReportJob.Status.SUCCESS
         else:
-            job_status = (
-                ReportJob.objects.filter(url=url).values_list("status", flat=True).first()
-                or None
+            # 스캔이 아직 진행 중이면 완료 시 정책과 관계없이 보고서를 생성하도록 요청 기록
+            await sync_to_async(report_queue.mark_requested)(url)
+            job_status = status.get("report_job_status") or None
+            # 판정 결과가 있을 때만 큐잉에 필요한 ScannedURL 행을 조회
+            scanned_url = (
+                await ScannedURL.objects.filter(url_hash=key).afirst()
+                if status.get("job_status") == "SCANNED"
+                else None
             )
-            scanned_url = ScannedURL.objects.filter(url=url).first()
             if scanned_url:
                 payload["input_payload"].update(
                     {
@@ -210,19 +289,19 @@ class GenerateReportView(APIView):
                     }
                 )
                 try:
-                    job = ensure_generate_report_queued(scanned_url, ip)
+                    job = await sync_to_async(ensure_generate_report_queued)(scanned_url, ip)
                 except Exception as e:
                     payload["api_error"] = f"보고서 생성 큐잉 실패: {e}"
                     return render(request, "reports.html", payload)
                 job_status = job.status if job else ReportJob.Status.PENDING
             else:
-                _queue_scan_url_task(url=url, ip=ip)
+                await sync_to_async(_queue_scan_url_task)(url=url, ip=ip)
                 job_status = job_status or "SCANNING"
 
             payload["job_status"] = job_status or ReportJob.Status.PENDING
 
         if not payload["screenshot"]:
-            ensure_urlscanio_queued(url, ip)
+            await sync_to_async(ensure_urlscanio_queued)(url, ip)
 
         payload["is_processing"] = not (payload["report_json"] and payload["screenshot"])
         return render(request, "reports.html", payload)
@@ -234,7 +313,7 @@ class InquireView(APIView):
         url, url_kind = extract_and_classify_url(raw_url)
         if not url or url_kind == "deeplink":
             url = ""
-        scanned = ScannedURL.objects.filter(url=url).first() if url else None
+        scanned = ScannedURL.objects.filter(url_hash=url_hash(url)).first() if url else None
         ai_score = scanned.threat_score if scanned else None
         context = {
             "target_url": url,
@@ -258,7 +337,7 @@ class InquireView(APIView):
         if actual_threat not in dict(Inquire.ActualThreat.choices):
             error = "실제 위험도를 선택해주세요."
 
-        scanned = ScannedURL.objects.filter(url=url).first() if url else None
+        scanned = ScannedURL.objects.filter(url_hash=url_hash(url)).first() if url else None
         ai_score = scanned.threat_score if scanned else None
         ai_label = _threat_label_from_score(ai_score)
 
@@ -324,10 +403,34 @@ class DashboardView(APIView):
                 "paginator": paginator,
                 "status": status,
                 "q": q,
+                "circuit_breakers": circuit_breaker.states(),
             },
         )
 
 
+def serve_screenshot_blob(request, path):
+    """내용 기준 이름(immutable)의 스크린샷 blob은 장기 캐시 헤더와 함께 제공"""
+    response = serve(request, path, document_root=os.path.join(settings.MEDIA_ROOT, screenshots.BLOB_PREFIX))
+    max_age = int(getattr(settings, "SCREENSHOT_BLOB_CACHE_MAX_AGE", 365 * 24 * 3600))
+    response["Cache-Control"] = f"public, max-age={max_age}, immutable"
+    return response
+
+
+class MetricsView(APIView):
+    def get(self, request):
+        if not _is_admin_user(request):
+            return Response({"error": "관리자 권한이 필요합니다."}, status=403)
+        # verdict_cache/connections는 이 응답을 처리한 프로세스 기준, 나머지는 Redis 공유 값
+        return Response({
+            "counters": metrics.snapshot(),
+            "circuit_breakers": circuit_breaker.states(),
+            "verdict_cache": verdict_cache.stats(),
+            "connections": connection_stats(),
+            "report_pipeline": report_queue.pipeline_stats(),
+            "screenshot_backlog": screenshots.backlog_stats(),
+        })
+
+
 class InquireEditView(APIView):
     def get(self, request, inquire_id: int):
         if not _is_admin_user(request):
@@ -336,8 +439,9 @@ class InquireEditView(APIView):
         if not inquiry:
             return render(request, "edit.html", {"error": "문의 정보를 찾을 수 없습니다."})
 
-        scanned = ScannedURL.objects.filter(url=inquiry.url).first()
-        report = GeneratedReport.objects.filter(url=inquiry.url).first()
+        key = url_hash(inquiry.url)
+        scanned = ScannedURL.objects.filter(url_hash=key).first()
+        report = GeneratedReport.objects.filter(url_hash=key).first()
 
         return render(
             request,
@@ -361,8 +465,9 @@ class InquireEditView(APIView):
         if not inquiry:
             return render(request, "edit.html", {"error": "문의 정보를 찾을 수 없습니다."})
 
-        scanned = ScannedURL.objects.filter(url=inquiry.url).first()
-        report = GeneratedReport.objects.filter(url=inquiry.url).first()
+        key = url_hash(inquiry.url)
+        scanned = ScannedURL.objects.filter(url_hash=key).first()
+        report = GeneratedReport.objects.filter(url_hash=key).first()
         ip = get_client_ip(request)
 
         if scanned:
@@ -392,6 +497,8 @@ class InquireEditView(APIView):
                 "is_edit",
                 "updated_at",
             ])
+            verdict_cache.invalidate(scanned.url_hash)
+            status_store.invalidate(scanned.url_hash)
 
         if report:
             GeneratedReportEditLog.objects.create(
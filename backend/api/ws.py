@@ -1,10 +1,11 @@
 import asyncio
-import hashlib
 import logging
 
-from asgiref.sync import async_to_sync
+from asgiref.sync import async_to_sync, sync_to_async
 from channels.layers import get_channel_layer
-from django.core.cache import cache
+
+from . import metrics, status_store
+from .canonical import url_hash
 
 logger = logging.getLogger(__name__)
 
@@ -28,41 +29,59 @@ def _safe_group_send(group_name: str, event: dict) -> None:
         logger.exception("Failed to dispatch websocket status event. group=%s", group_name)
 
 
-def _send_status(url: str, payload: dict) -> None:
-    _safe_group_send(
-        "report_status",
-        {
-            "type": "report_status",
-            "payload": {"type": "status", "url": url, **payload},
-        },
-    )
+def report_status_group_name(url: str) -> str:
+    # URL별 그룹으로 보내 해당 보고서 페이지에만 전달 (전체 broadcast 후 클라이언트 필터링하지 않음)
+    return f"report_status_{url_hash(url)}"
 
 
 def qr_scan_group_name(url: str) -> str:
-    return f"qr_scan_status_{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
+    return f"qr_scan_status_{url_hash(url)}"
+
+
+def _apply_status(url: str, fields: dict) -> tuple[dict, dict]:
+    """
+    상태 문서에 반영하고 (문서, 실제로 바뀐 필드)를 반환한다. 바뀐 필드가 없으면 알림을 보내지 않는다.
+    Redis 장애 시에는 비교할 수 없으므로 전달받은 값을 그대로 변경분으로 보고 전송
+    """
+    result = status_store.update(url, **fields)
+    if result is None:
+        return {"url": url, **fields}, fields
+    doc, changed = result
+    if not changed:
+        metrics.incr("ws.status.suppressed")
+    return result
+
 
+def _record_published(*kinds: str) -> None:
+    for kind in kinds:
+        metrics.incr(f"ws.{kind}.published")
 
-def qr_scan_status_cache_key(url: str) -> str:
-    return f"qr_scan:last_status:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
+
+def _qr_scan_event(doc: dict, changed: dict, payload: dict) -> dict:
+    # 문서에 저장하지 않는 필드도 이번 알림에는 포함. changed로 이번에 바뀐 필드를 알림
+    return {
+        "type": "qr_scan_status",
+        "payload": {"type": "qr_scan_status", **doc, **payload, "changed": sorted(changed)},
+    }
 
 
-def _persist_qr_scan_status(url: str, payload: dict) -> dict:
-    cache_key = qr_scan_status_cache_key(url)
-    existing = cache.get(cache_key, {})
-    merged = {"url": url, **existing, **payload}
-    cache.set(cache_key, merged, timeout=600)
-    return merged
+def _report_event(url: str, payload: dict, version: int | None) -> dict:
+    return {
+        "type": "report_status",
+        "payload": {"type": "status", "url": url, **payload, "version": version},
+    }
 
 
-def _send_qr_scan_status(url: str, payload: dict) -> None:
-    merged_payload = _persist_qr_scan_status(url, payload)
-    _safe_group_send(
-        qr_scan_group_name(url),
-        {
-            "type": "qr_scan_status",
-            "payload": {"type": "qr_scan_status", **merged_payload},
-        },
-    )
+def _publish(url: str, fields: dict, report_payload: dict | None = None, qr_payload: dict | None = None) -> None:
+    """상태가 실제로 바뀐 경우에만 qr-scan 그룹(전체 문서)과 보고서 그룹(report_payload가 있을 때)에 전송"""
+    doc, changed = _apply_status(url, fields)
+    if not changed:
+        return
+    if report_payload is not None:
+        _safe_group_send(report_status_group_name(url), _report_event(url, report_payload, doc.get("version")))
+        _record_published("report")
+    _safe_group_send(qr_scan_group_name(url), _qr_scan_event(doc, changed, qr_payload or {}))
+    _record_published("qr_scan")
 
 
 def notify_report_status(
@@ -85,15 +104,16 @@ def notify_report_status(
         payload["retrying"] = bool(retrying)
     if retry_count is not None:
         payload["retry_count"] = int(retry_count)
-    _send_status(url, payload)
-    _send_qr_scan_status(
-        url,
-        {
-            "report_ready": is_processed,
-            "report_job_status": job_status,
-            "report_last_error": last_error,
-        },
-    )
+    fields = {
+        "report_ready": is_processed,
+        "report_job_status": job_status,
+        "report_last_error": last_error or "",
+    }
+    if retrying is not None:
+        fields["retrying"] = bool(retrying)
+    if retry_count is not None:
+        fields["retry_count"] = int(retry_count)
+    _publish(url, fields, report_payload=payload)
 
 
 def notify_urlscan_status(
@@ -103,19 +123,37 @@ def notify_urlscan_status(
     retrying: bool | None = None,
     retry_count: int | None = None,
     last_error: str | None = None,
+    screenshot_srcset: dict | None = None,
 ):
     payload = {"screenshot_ready": screenshot_ready}
     if screenshot_url:
         payload["screenshot_url"] = screenshot_url
+    if screenshot_srcset:
+        payload["screenshot_srcset"] = screenshot_srcset
     if retrying is not None:
         payload["retrying"] = bool(retrying)
     if retry_count is not None:
         payload["retry_count"] = int(retry_count)
     if last_error:
         payload["last_error"] = last_error
-    _send_status(url, payload)
-    _send_qr_scan_status(url, payload)
+    fields = {key: value for key, value in payload.items() if key != "last_error"}
+    fields["screenshot_last_error"] = last_error or ""
+    _publish(url, fields, report_payload=payload, qr_payload=payload)
 
 
 def notify_qr_scan_status(url: str, **payload):
-    _send_qr_scan_status(url, payload)
+    _publish(url, payload, qr_payload=payload)
+
+
+async def anotify_qr_scan_status(url: str, **payload):
+    """notify_qr_scan_status의 async 버전 (async view에서 async_to_sync 없이 channel layer로 직접 전송)"""
+    try:
+        doc, changed = await sync_to_async(_apply_status)(url, payload)
+        if not changed:
+            return
+        channel_layer = get_channel_layer()
+        if channel_layer:
+            await channel_layer.group_send(qr_scan_group_name(url), _qr_scan_event(doc, changed, payload))
+            await sync_to_async(_record_published)("qr_scan")
+    except Exception:
+        logger.exception("Failed to dispatch websocket status event. url=%s", url)
@@ -1,7 +1,7 @@
-
 import os
 import sys
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
@@ -12,3 +12,12 @@ if any("celery" in arg.lower() for arg in sys.argv):
 app = Celery("backend")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+@worker_init.connect
+@worker_process_init.connect
+def _init_provider_clients(**kwargs):
+    # worker 프로세스마다 provider 클라이언트와 keep-alive 커넥션 풀을 한 번만 생성
+    from api.clients import init_client_registry
+
+    init_client_registry()
@@ -142,6 +142,7 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 # Celery (Redis broker 예시)
 CELERY_BROKER_URL = "redis://127.0.0.1:6379/0"
+REDIS_URL = os.getenv("REDIS_URL", CELERY_BROKER_URL)
 
 # 결과 백엔드: Redis 사용 (gevent/eventlet 환경에서 Django ORM async 충돌 방지)
 _result_backend = os.getenv("CELERY_RESULT_BACKEND", CELERY_BROKER_URL)
@@ -156,7 +157,7 @@ CELERY_TASK_IGNORE_RESULT = os.getenv("CELERY_TASK_IGNORE_RESULT", "1").lower()
 CELERY_BEAT_SCHEDULE = {
     "urlscanio-screenshot-poll": {
         "task": "api.urlscanio_screenshot_poll_task",
-        "schedule": 10.0,
+        "schedule": float(os.getenv("SCREENSHOT_BACKFILL_INTERVAL", "10")),
     }
 }
 
@@ -175,6 +176,134 @@ REPORT_JOB_STALE_SECONDS = int(os.getenv("REPORT_JOB_STALE_SECONDS", "2700"))
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
-        "CONFIG": {"hosts": [os.getenv("REDIS_URL", CELERY_BROKER_URL)]},
+        "CONFIG": {"hosts": [REDIS_URL]},
     }
 }
+
+CACHES = {
+    # 상태 스냅샷 등을 Daphne/Celery worker 프로세스 간에 공유
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "seeqr",
+    },
+    # QR 스캔 판정 결과 2차 캐시 (프로세스 간 공유)
+    "verdict": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "seeqr",
+    },
+}
+
+# api.verdict_cache: 1차(프로세스 내부 LRU) 크기/TTL, 2차(Redis) TTL
+VERDICT_CACHE_L1_SIZE = int(os.getenv("VERDICT_CACHE_L1_SIZE", "10000"))
+VERDICT_CACHE_L1_TTL = float(os.getenv("VERDICT_CACHE_L1_TTL", "10"))
+VERDICT_CACHE_L2_TTL = int(os.getenv("VERDICT_CACHE_L2_TTL", "600"))
+# 캐시된 판정으로 응답할 때 후속 작업(보고서/urlscan) 큐잉 여부를 DB에서 확인하는 최소 간격(초, URL별)
+VERDICT_FOLLOWUP_CHECK_INTERVAL = int(os.getenv("VERDICT_FOLLOWUP_CHECK_INTERVAL", "60"))
+
+# URL 정규화 규칙 (api.canonical.DEFAULT_RULES 중 변경할 항목만 지정)
+# 예: {"drop_fragment": False, "tracking_params": ("utm_*", "fbclid")}
+URL_CANONICAL_RULES = {}
+
+# urlscan 결과 조회(api.urlscanio_poll_task) 스케줄: 최초 대기, 폴링 간격(1.5배씩 증가, 상한), 전체 대기 한도(초)
+URLSCAN_POLL_DELAY = int(os.getenv("URLSCAN_POLL_DELAY", "10"))
+URLSCAN_POLL_INTERVAL = int(os.getenv("URLSCAN_POLL_INTERVAL", "2"))
+URLSCAN_POLL_MAX_INTERVAL = int(os.getenv("URLSCAN_POLL_MAX_INTERVAL", "15"))
+URLSCAN_POLL_TIMEOUT = int(os.getenv("URLSCAN_POLL_TIMEOUT", "120"))
+
+# OpenAI 배경 응답을 짧은 재예약 task로 이어서 조회 (재시도/재전달 시 기존 응답을 재사용)
+OPENAI_RESUMABLE_RESPONSES = os.getenv("OPENAI_RESUMABLE_RESPONSES", "1").lower() in ("1", "true", "yes")
+OPENAI_POLL_INTERVAL = int(os.getenv("OPENAI_POLL_INTERVAL", "2"))
+OPENAI_POLL_TIMEOUT = int(os.getenv("OPENAI_POLL_TIMEOUT", "240"))
+
+# provider 클라이언트 커넥션 풀 (api.clients 레지스트리)
+# - HTTP_POOL_*: urlscan API/스크린샷 다운로드용 requests 세션 (호스트 풀 수, 호스트당 최대 연결 수)
+# - LLM_HTTP_*: OpenAI/Gemini SDK용 httpx 클라이언트
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "50"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+
+# LLM 호출 전 로컬 판정(api.triage): 허용 도메인(https, 하위 도메인 포함)이면 안전으로 즉시 저장. 허용 도메인 추가
+TRIAGE_ENABLED = os.getenv("TRIAGE_ENABLED", "1").lower() in ("1", "true", "yes")
+TRIAGE_ALLOWLIST = [d.strip().lower() for d in os.getenv("TRIAGE_ALLOWLIST", "").split(",") if d.strip()]
+
+# 알려진 악성 URL/도메인 차단 목록(api.blocklist): manage.py import_blocklist로 생성되는 mmap 인덱스 파일, 변경 감지 주기(초)
+BLOCKLIST_INDEX_PATH = os.getenv("BLOCKLIST_INDEX_PATH", str(BASE_DIR / "data" / "blocklist.idx"))
+BLOCKLIST_RELOAD_INTERVAL = int(os.getenv("BLOCKLIST_RELOAD_INTERVAL", "30"))
+
+# 모델 tier 라우팅(api.clients.DEFAULT_MODEL_TIERS): lite 먼저 호출 후 threat_score 2/검증 실패/낮은 confidence일 때만 heavy로 재요청
+# MODEL_TIERS로 {category: {provider: {tier: {...}}}} 항목 단위 덮어쓰기 가능
+MODEL_TIERING_ENABLED = os.getenv("MODEL_TIERING_ENABLED", "1").lower() in ("1", "true", "yes")
+MODEL_TIER_CONFIDENCE_THRESHOLD = int(os.getenv("MODEL_TIER_CONFIDENCE_THRESHOLD", "70"))
+MODEL_TIERS = {}
+
+# 스캔 hedging(api.services.scan_url): 주 provider(AGENT_MODEL)가 지연되면 다른 provider에도 요청하여 먼저 온 유효 응답 사용
+# SCAN_HEDGE_DELAY는 초 단위 값 또는 "auto"(최근 스캔 지연 p95, 표본 부족 시 SCAN_HEDGE_FALLBACK_DELAY)
+SCAN_HEDGE_ENABLED = os.getenv("SCAN_HEDGE_ENABLED", "0").lower() in ("1", "true", "yes")
+SCAN_HEDGE_DELAY = os.getenv("SCAN_HEDGE_DELAY", "auto")
+SCAN_HEDGE_FALLBACK_DELAY = float(os.getenv("SCAN_HEDGE_FALLBACK_DELAY", "8"))
+SCAN_HEDGE_SAMPLE_SIZE = int(os.getenv("SCAN_HEDGE_SAMPLE_SIZE", "200"))
+SCAN_HEDGE_MAX_WORKERS = int(os.getenv("SCAN_HEDGE_MAX_WORKERS", "8"))
+
+# provider별 circuit breaker(api.circuit_breaker): WINDOW(초) 동안 MIN_CALLS 이상 호출 중 오류율이 ERROR_RATE 이상이면
+# COOLDOWN(초) 동안 차단 후 시험 호출 1건으로 복구 여부 확인. 차단 중 scan/report는 다른 provider로 우회하고 urlscan은 연기
+CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "1").lower() in ("1", "true", "yes")
+CIRCUIT_BREAKER_WINDOW = int(os.getenv("CIRCUIT_BREAKER_WINDOW", "60"))
+CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "10"))
+CIRCUIT_BREAKER_ERROR_RATE = float(os.getenv("CIRCUIT_BREAKER_ERROR_RATE", "0.5"))
+CIRCUIT_BREAKER_COOLDOWN = int(os.getenv("CIRCUIT_BREAKER_COOLDOWN", "30"))
+CIRCUIT_BREAKER_PROBE_TIMEOUT = int(os.getenv("CIRCUIT_BREAKER_PROBE_TIMEOUT", "30"))
+CIRCUIT_BREAKER_MAX_DEFERRALS = int(os.getenv("CIRCUIT_BREAKER_MAX_DEFERRALS", "10"))
+
+# provider 요청 한도(api.rate_limit): Redis 토큰 버킷을 모든 worker가 공유
+# RATE_LIMITS로 {"openai:gpt-5-mini": {"rate": 초당 토큰, "burst": 최대 토큰, "reserve": 보고서 등 BACKGROUND가 남겨 둘 비율}} 덮어쓰기
+# 스캔(INTERACTIVE)은 RATE_LIMIT_MAX_WAIT초까지 대기, BACKGROUND 작업은 즉시 포기 후 task 재시도. 429 응답은 Retry-After(없으면 기본값) 동안 차단
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1").lower() in ("1", "true", "yes")
+RATE_LIMITS = {}
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "10"))
+RATE_LIMIT_DEFAULT_PENALTY = int(os.getenv("RATE_LIMIT_DEFAULT_PENALTY", "5"))
+
+# LLM 응답 파싱(api.parsing): STRUCTURED_OUTPUT_ENABLED면 provider의 JSON 스키마 구조화 출력 사용(스캔: json_schema, 보고서: json_object)
+# 코드 펜스/앞뒤 설명이 섞인 응답은 JSON만 추출하여 검증하고, 그래도 실패하면 JSON_REPAIR_ENABLED일 때 lite 모델로 교정만 1회 요청
+STRUCTURED_OUTPUT_ENABLED = os.getenv("STRUCTURED_OUTPUT_ENABLED", "1").lower() in ("1", "true", "yes")
+JSON_REPAIR_ENABLED = os.getenv("JSON_REPAIR_ENABLED", "1").lower() in ("1", "true", "yes")
+
+# 보고서/urlscan 후속 작업 정책(api.report_queue): eager(스캔 직후 생성), lazy(/api/report/ 요청 또는 /ws/reports/ 구독 시 생성),
+# score_gated(threat_score >= REPORT_EAGER_MIN_SCORE만 eager). 보류/요청 건수는 관리자 지표(report_pipeline)에서 확인
+REPORT_PIPELINE_POLICY = os.getenv("REPORT_PIPELINE_POLICY", "eager").lower()
+REPORT_EAGER_MIN_SCORE = int(os.getenv("REPORT_EAGER_MIN_SCORE", "2"))
+REPORT_REQUEST_TTL = int(os.getenv("REPORT_REQUEST_TTL", "3600"))
+REPORT_PIPELINE_DEFERRAL_TTL = int(os.getenv("REPORT_PIPELINE_DEFERRAL_TTL", str(7 * 24 * 3600)))
+
+# /api/qr-scan/ 판정 대기: 판정 결과가 없으면 wait_ms(기본 QR_SCAN_DEFAULT_WAIT_MS, 최대 QR_SCAN_MAX_WAIT_MS)까지
+# 스캔 완료 알림을 기다렸다가 실제 판정을 반환하고, 시간 안에 끝나지 않으면 분석 중 응답을 반환
+QR_SCAN_DEFAULT_WAIT_MS = int(os.getenv("QR_SCAN_DEFAULT_WAIT_MS", "0"))
+QR_SCAN_MAX_WAIT_MS = int(os.getenv("QR_SCAN_MAX_WAIT_MS", "3000"))
+
+# WebSocket(/ws/reports/, /ws/qr-scan/status/) 연결 하나에서 subscribe로 구독할 수 있는 최대 URL 수
+WS_MAX_SUBSCRIPTIONS = int(os.getenv("WS_MAX_SUBSCRIPTIONS", "50"))
+
+# URL별 상태 문서(api.status_store, Redis hash status:{url_hash}) 유지 시간(초). 쓰기 경로가 갱신할 때마다 연장되며,
+# 만료/누락 시 consumers와 /api/report/가 DB에서 다시 만든다
+STATUS_STORE_TTL = int(os.getenv("STATUS_STORE_TTL", str(24 * 3600)))
+
+# 스크린샷 보충(api.screenshots.backfill, beat 주기 SCREENSHOT_BACKFILL_INTERVAL초): 1회 실행당 BATCH_SIZE개,
+# 동시 다운로드 CONCURRENCY개. 실패 시 BACKOFF_BASE초부터 2배씩(최대 BACKOFF_MAX초) 미루고 MAX_ATTEMPTS회 실패하면 GAVE_UP
+SCREENSHOT_BACKFILL_BATCH_SIZE = int(os.getenv("SCREENSHOT_BACKFILL_BATCH_SIZE", "50"))
+SCREENSHOT_BACKFILL_CONCURRENCY = int(os.getenv("SCREENSHOT_BACKFILL_CONCURRENCY", "4"))
+SCREENSHOT_BACKFILL_MAX_ATTEMPTS = int(os.getenv("SCREENSHOT_BACKFILL_MAX_ATTEMPTS", "8"))
+SCREENSHOT_BACKFILL_BACKOFF_BASE = int(os.getenv("SCREENSHOT_BACKFILL_BACKOFF_BASE", "60"))
+SCREENSHOT_BACKFILL_BACKOFF_MAX = int(os.getenv("SCREENSHOT_BACKFILL_BACKOFF_MAX", str(6 * 3600)))
+SCREENSHOT_BACKFILL_LOCK_TIMEOUT = int(os.getenv("SCREENSHOT_BACKFILL_LOCK_TIMEOUT", "300"))
+
+# 스크린샷 축소본(api.screenshots.build_variants): 저장 시 너비별(원본보다 작은 너비만) WebP/JPEG를 만들어
+# 상태 알림/보고서 페이지에 srcset으로 제공. SCREENSHOT_COMPRESS_ORIGINAL이면 원본 PNG도 무손실 재압축
+SCREENSHOT_VARIANT_WIDTHS = os.getenv("SCREENSHOT_VARIANT_WIDTHS", "320,640,1080")
+SCREENSHOT_VARIANT_QUALITY = int(os.getenv("SCREENSHOT_VARIANT_QUALITY", "75"))
+SCREENSHOT_COMPRESS_ORIGINAL = os.getenv("SCREENSHOT_COMPRESS_ORIGINAL", "0").lower() in ("1", "true", "yes")
+
+# 스크린샷 blob(media/screenshots/blobs/, 내용 SHA-256 기준 이름)의 Cache-Control max-age(초).
+# 리버스 프록시가 media를 직접 제공한다면 같은 경로에 "public, max-age=..., immutable"을 설정
+SCREENSHOT_BLOB_CACHE_MAX_AGE = int(os.getenv("SCREENSHOT_BLOB_CACHE_MAX_AGE", str(365 * 24 * 3600)))
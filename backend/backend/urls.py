@@ -19,9 +19,12 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.templatetags.static import static as static_url
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.views.generic import RedirectView
 
+from api.screenshots import BLOB_PREFIX
+from api.views import serve_screenshot_blob
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
@@ -33,5 +36,9 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
+    # 스크린샷 blob은 일반 media보다 먼저 매칭하여 immutable 캐시 헤더를 붙임
+    urlpatterns += [
+        re_path(rf"^{settings.MEDIA_URL.lstrip('/')}{BLOB_PREFIX}(?P<path>.*)$", serve_screenshot_blob),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += staticfiles_urlpatterns()